@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     'players',
     'matches',
     'notifications',
+    'jobs',
     'webpush',
 ]
 
@@ -135,6 +136,17 @@ STORAGES = {
     },
 }
 
+# Local stand-in for Cloudinary (offline development / upload benchmarks), see core/storage.py
+if os.environ.get('MEDIA_STORAGE') == 'filesystem':
+    STORAGES["default"] = {
+        "BACKEND": "core.storage.StandInStorage",
+        "OPTIONS": {"latency": float(os.environ.get('MEDIA_STORAGE_LATENCY', 0))},
+    }
+
+# Uploaded photos wait here until a job moves them to storage (players/uploads.py).
+# Must be shared by the web and worker processes.
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR', str(BASE_DIR / 'upload_spool'))
+
 # FORCE Cloudinary Proxy Configuration (PythonAnywhere Free Tier Fix)
 import cloudinary
 if os.environ.get('http_proxy'):
@@ -149,9 +161,23 @@ if os.environ.get('http_proxy'):
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework settings
+# Process pool for password hashing in the async auth views (core/hashing.py)
+PASSWORD_HASHING = {
+    'WORKERS': int(os.environ.get('PASSWORD_HASHING_WORKERS', 0)) or None,  # None: one per core
+    'MAX_PENDING': 64,
+    'RETRY_AFTER': 2,
+}
+
+# Email login (players.backends.EmailBackend); ModelBackend keeps username logins (admin) working
+AUTHENTICATION_BACKENDS = [
+    'players.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication with the user's claims cached (no User query per request)
+        'players.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -206,6 +232,13 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 EMAIL_FAIL_SILENTLY = False
+# Sender threads of utils.email_service.MailPool; each keeps one SMTP connection open
+EMAIL_POOL = {
+    'WORKERS': int(os.environ.get('EMAIL_POOL_WORKERS', 2)),
+    'BATCH_SIZE': 20,
+    'MAX_QUEUE': 1000,
+    'IDLE_TIMEOUT': 30,
+}
 
 # WebPush Configuration
 vapid_public = os.environ.get("VAPID_PUBLIC_KEY", "")
@@ -219,3 +252,40 @@ WEBPUSH_SETTINGS = {
     "VAPID_PRIVATE_KEY": vapid_private,
     "VAPID_ADMIN_EMAIL": vapid_contact
 }
+
+# Parallel requests per broadcast (notifications/push.py)
+PUSH_CONCURRENCY = int(os.environ.get('PUSH_CONCURRENCY', 16))
+# Subscriptions failing this many times in a row are skipped, and retried once a day
+PUSH_MAX_FAILURES = 5
+PUSH_RETRY_SKIPPED_AFTER = 24 * 60 * 60
+
+# Notification retention in days, per notification_type (None = keep forever).
+# Enforced by `python manage.py prune_notifications`.
+NOTIFICATION_RETENTION = {
+    'TEAM_REQUEST': {'read': 30, 'unread': 90},
+    'TEAM_RESPONSE': {'read': 30, 'unread': 90},
+    'SYSTEM': {'read': 60, 'unread': 180},
+}
+# Broadcasts (and their read receipts) are kept this many days (None = forever)
+BROADCAST_RETENTION = 365
+
+# Photo and logo thumbnails, rendered by a job in a process pool (core/thumbnails.py)
+THUMBNAILS = {
+    'WORKERS': int(os.environ.get('THUMBNAIL_WORKERS', 2)),
+    'SIZES': {'list': (128, 128), 'card': (400, 400), 'detail': (1024, 1024)},
+    'FORMAT': 'WEBP',
+    'QUALITY': 80,
+}
+
+# Background jobs (jobs/queue.py, run with `python manage.py run_worker`)
+JOBS = {
+    'CONCURRENCY': int(os.environ.get('JOBS_CONCURRENCY', 4)),
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 10,
+    # Run jobs in-process after commit, e.g. for local development without a worker
+    'EAGER': os.environ.get('JOBS_EAGER', 'False') == 'True',
+    # Finished (DONE/FAILED) jobs are deleted after this many seconds
+    'KEEP_FINISHED': 7 * 24 * 60 * 60,
+    # Periodic jobs, (re)started by every run_worker
+    'STARTUP': ['notifications.counters.reconcile_periodically', 'jobs.queue.prune_periodically'],
+}
@@ -0,0 +1,101 @@
+"""
+Password hashing off the request workers.
+
+PBKDF2 is deliberately CPU-heavy; done inline, a login burst occupies every worker and the
+rest of the API waits behind it. The async auth views (players/auth_views.py) send the hashing
+to a process pool sized to the cores instead. The number of hashes in flight is bounded by
+settings.PASSWORD_HASHING; past it `Overloaded` is raised and the view answers 503 with
+Retry-After, so a burst is shed instead of piling up until requests time out.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+DEFAULTS = {
+    'WORKERS': None,     # processes; None = one per core
+    'MAX_PENDING': 64,   # hashes waiting for a free process before requests are turned away
+    'RETRY_AFTER': 2,    # seconds, sent with the 503
+}
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Password hashing queue is full, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+def get_setting(name):
+    return getattr(settings, 'PASSWORD_HASHING', {}).get(name, DEFAULTS[name])
+
+
+# Run in the pool processes (module level, so they can be pickled)
+
+def _make_password(password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def _check_password(password, encoded):
+    from django.contrib.auth.hashers import check_password
+    return check_password(password, encoded)
+
+
+class HashingPool:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.in_flight = 0
+
+    @property
+    def workers(self):
+        return get_setting('WORKERS') or os.cpu_count() or 1
+
+    def submit(self, fn, *args):
+        with self.lock:
+            if self.in_flight >= self.workers + get_setting('MAX_PENDING'):
+                raise Overloaded(get_setting('RETRY_AFTER'))
+            if self.executor is None:
+                # spawn: forking a process that runs an event loop and threads is not safe
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            self.in_flight += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self.lock:
+            self.in_flight -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = HashingPool()
+
+
+async def make_password(password):
+    """make_password in the pool; raises Overloaded when the queue is full"""
+    return await pool.run(_make_password, password)
+
+
+async def check_password(password, encoded):
+    """check_password in the pool (no rehash-on-upgrade); raises Overloaded when the queue is full"""
+    if not encoded:
+        return False
+    return await pool.run(_check_password, password, encoded)
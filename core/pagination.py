@@ -0,0 +1,124 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # Full-precision isoformat (DjangoJSONEncoder drops microseconds, which breaks the seek)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination.
+
+    `ordering` must be unique (end it with 'id' / '-id'). The cursor carries the ordering
+    values of the last row of the page, so the next page is fetched with a
+    WHERE (a, b) < (x, y) range condition instead of OFFSET: every page costs the same,
+    however deep the client scrolls, and no COUNT(*) is needed.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Geçersiz cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        try:
+            rows = list(self.seek(queryset, cursor)[:self.page_size + 1])
+        except (ValidationError, ValueError, TypeError):
+            # Cursor values the fields cannot take (a tampered cursor), as DRF's CursorPagination
+            if cursor is None:
+                raise
+            raise NotFound(self.invalid_cursor_message)
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last_values = self.values_of(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # --- Cursor handling ---
+
+    def seek(self, queryset, cursor):
+        """`queryset` ordered, starting right after the cursor position"""
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+        return queryset.order_by(*self.ordering)
+
+    def after(self, values):
+        """Rows strictly after `values` in `ordering` (row-value comparison spelled out as OR/AND)"""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def values_of(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj
+            for part in field.lstrip('-').split('__'):
+                value = value[part] if isinstance(value, dict) else getattr(value, part)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, default=_encode_value)
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    # --- Response ---
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_values))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,19 @@
+"""
+Filesystem stand-in for the remote media storage (Cloudinary), for running and benchmarking
+uploads offline. Selected with MEDIA_STORAGE=filesystem; MEDIA_STORAGE_LATENCY (seconds)
+adds a delay to every save, like a remote round trip.
+"""
+import time
+
+from django.core.files.storage import FileSystemStorage
+
+
+class StandInStorage(FileSystemStorage):
+    def __init__(self, latency=0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+
+    def _save(self, name, content):
+        if self.latency:
+            time.sleep(self.latency)
+        return super()._save(name, content)
@@ -0,0 +1,204 @@
+"""
+Thumbnails of player photos and team logos.
+
+Resizing is too slow to do inside the upload request, so saving a model with a new image
+queues a job (jobs/queue.py) that renders fixed-size variants (settings.THUMBNAILS['SIZES'])
+in a process pool, stores them next to the original and records their names in the model's
+`<field>_variants` JSON field:
+
+    {"source": "player_photos/<uuid>.jpg", "list": "thumbnails/<uuid>_list.webp", ...}
+
+The variants are only used while "source" is the current image; until the job has run,
+ThumbnailField serves the original. `manage.py build_thumbnails` backfills existing images.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 2,      # rendering processes
+    'SIZES': {         # name: bounding box, smallest first
+        'list': (128, 128),
+        'card': (400, 400),
+        'detail': (1024, 1024),
+    },
+    'FORMAT': 'WEBP',  # JPEG where Pillow has no WebP support
+    'QUALITY': 80,
+}
+
+# Image fields with thumbnails; crop: fill the box (avatars) instead of fitting into it (logos)
+FIELDS = {
+    'players.Player': {'field': 'photo', 'crop': True},
+    'teams.Team': {'field': 'logo', 'crop': False},
+}
+
+DIRECTORY = 'thumbnails'
+
+
+def get_setting(name):
+    return getattr(settings, 'THUMBNAILS', {}).get(name, DEFAULTS[name])
+
+
+def variants_field(field):
+    return f'{field}_variants'
+
+
+def output_format():
+    from PIL import features
+
+    fmt = get_setting('FORMAT').upper()
+    if fmt == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return fmt
+
+
+# Runs in the pool processes (module level, so it can be pickled)
+
+def _render(data, sizes, fmt, quality, crop):
+    """Encoded thumbnails of the image in `data`, by size name"""
+    from io import BytesIO
+    from PIL import Image, ImageOps
+
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'JPEG' and has_alpha:
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    rendered = {}
+    for name, box in sizes.items():
+        if crop:
+            thumbnail = ImageOps.fit(image, tuple(box), Image.LANCZOS)
+        else:
+            thumbnail = image.copy()
+            thumbnail.thumbnail(tuple(box), Image.LANCZOS)  # never upscales
+        buffer = BytesIO()
+        thumbnail.save(buffer, fmt, quality=quality)
+        rendered[name] = buffer.getvalue()
+    return rendered
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn: the worker runs threads, forking it is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=get_setting('WORKERS'), mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def render(data, crop=False):
+    """Thumbnails of an image (bytes) rendered in the pool: {size name: encoded bytes}"""
+    future = get_executor().submit(_render, data, get_setting('SIZES'), output_format(), get_setting('QUALITY'), crop)
+    return future.result()
+
+
+def generate(model, pk, field, force=False):
+    """
+    Job: render and store the thumbnails of one image (unless it has them, or force=True).
+    model is the model label ('players.Player'), field the image field's name.
+    """
+    from django.apps import apps
+    from django.core.files.base import ContentFile
+    from PIL import UnidentifiedImageError
+
+    Model = apps.get_model(model)
+    instance = Model.objects.filter(pk=pk).only('pk', field, variants_field(field)).first()
+    if instance is None:
+        return
+    image = getattr(instance, field)
+    old = getattr(instance, variants_field(field)) or {}
+    if not image or (old.get('source') == image.name and not force):
+        return
+
+    with image.storage.open(image.name, 'rb') as source:
+        data = source.read()
+    variants = {'source': image.name}
+    try:
+        rendered = render(data, crop=FIELDS[model]['crop'])
+    except (UnidentifiedImageError, OSError) as error:
+        # Not retried: the original stays in use
+        logger.warning('No thumbnails for %s %s (%s): %s', model, pk, image.name, error)
+        rendered = {}
+
+    extension = 'jpg' if output_format() == 'JPEG' else output_format().lower()
+    base = os.path.splitext(os.path.basename(image.name))[0]
+    for size, content in rendered.items():
+        variants[size] = image.storage.save(f'{DIRECTORY}/{base}_{size}.{extension}', ContentFile(content))
+
+    # Only if the image was not replaced meanwhile (that save queued its own job)
+    updated = Model.objects.filter(pk=pk, **{field: image.name}).update(**{variants_field(field): variants})
+    delete_files(image.storage, old if updated else variants)
+
+
+def delete_files(storage, variants):
+    for size, name in variants.items():
+        if size != 'source':
+            try:
+                storage.delete(name)
+            except Exception:
+                logger.exception('Could not delete thumbnail %s', name)
+
+
+def schedule(instance, update_fields=None):
+    """Queue the thumbnail job of a model instance if its image has no current thumbnails"""
+    from jobs import queue
+
+    model = instance._meta.label
+    field = FIELDS[model]['field']
+    # Not loaded or not saved: cannot have changed
+    if field in instance.get_deferred_fields() or (update_fields is not None and field not in update_fields):
+        return
+    image = getattr(instance, field)
+    variants = getattr(instance, variants_field(field)) or {}
+    if image and variants.get('source') != image.name:
+        queue.enqueue(generate, model=model, pk=instance.pk, field=field, unique=True)
+
+
+class ThumbnailField(serializers.ImageField):
+    """
+    Read-only image URL of the `size` thumbnail (the next larger one if it is missing),
+    or of the original while there are no thumbnails yet.
+    """
+    def __init__(self, size, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+        self.size = size
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        variants = getattr(value.instance, variants_field(value.field.name), None) or {}
+        if variants.get('source') != value.name:
+            return super().to_representation(value)
+
+        sizes = list(get_setting('SIZES'))
+        candidates = sizes[sizes.index(self.size):] if self.size in sizes else []
+        name = next((variants[size] for size in candidates if size in variants), None)
+        if name is None:
+            return super().to_representation(value)
+
+        url = value.storage.url(name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+from . import queue
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status', 'attempts', 'max_attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'last_error']
+    readonly_fields = ['task', 'payload', 'attempts', 'locked_at', 'last_error', 'created_at', 'finished_at']
+    actions = ['retry_jobs']
+    change_list_template = 'admin/jobs/job/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['queue_depth'] = queue.queue_depth()
+        return super().changelist_view(request, extra_context=extra_context)
+
+    @admin.action(description='Seçili işleri yeniden kuyruğa al')
+    def retry_jobs(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.PENDING, run_at=timezone.now(), locked_at=None, attempts=0
+        )
+        self.message_user(request, f"{count} iş yeniden kuyruğa alındı.")
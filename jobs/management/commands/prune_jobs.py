@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = "Delete DONE and FAILED jobs older than JOBS['KEEP_FINISHED'] in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the finished jobs past their retention')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Jobs deleted per statement')
+
+    def handle(self, *args, **options):
+        count = queue.prune(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{count} tamamlanmış işin saklama süresi dolmuş (silinmedi)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{count} tamamlanmış iş silindi."))
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the DB queue (jobs.Job).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='Worker threads (default: JOBS["CONCURRENCY"])')
+        parser.add_argument('--poll-interval', type=float, default=None, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Run due jobs until the queue is empty, then exit')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency'] or queue.get_setting('CONCURRENCY')
+        poll_interval = options['poll_interval'] or queue.get_setting('POLL_INTERVAL')
+
+        queue.enqueue_startup()
+        self.stdout.write(f"Worker başladı (eşzamanlılık: {concurrency}).")
+        done = failed = 0
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job') as pool:
+            try:
+                while True:
+                    queue.release_stale()
+                    free = concurrency - len(running)
+                    if free > 0:
+                        for pk in queue.claim(free):
+                            running.add(pool.submit(self.run_job, pk))
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    finished, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                self.stdout.write("Durduruluyor, çalışan işler bekleniyor...")
+
+        self.stdout.write(self.style.SUCCESS(f"Worker durdu: {done} başarılı, {failed} başarısız."))
+
+    @staticmethod
+    def run_job(pk):
+        try:
+            return queue.run_job(pk)
+        finally:
+            connection.close()  # each pool thread owns its own connection
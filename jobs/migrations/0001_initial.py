@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-17 00:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(max_length=200, verbose_name='Görev')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Parametreler')),
+                ('status', models.CharField(choices=[('PENDING', 'Bekliyor'), ('RUNNING', 'Çalışıyor'), ('DONE', 'Tamamlandı'), ('FAILED', 'Başarısız')], default='PENDING', max_length=10, verbose_name='Durum')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('max_attempts', models.PositiveIntegerField(default=5, verbose_name='En Fazla Deneme')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Çalışma Zamanı')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Başlama Zamanı')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Arka Plan İşi',
+                'verbose_name_plural': 'Arka Plan İşleri',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx')],
+            },
+        ),
+    ]
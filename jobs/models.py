@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A unit of background work (see jobs/queue.py).
+    `task` is the dotted path of a function, called with `payload` as keyword arguments.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = (
+        (PENDING, 'Bekliyor'),
+        (RUNNING, 'Çalışıyor'),
+        (DONE, 'Tamamlandı'),
+        (FAILED, 'Başarısız'),
+    )
+
+    task = models.CharField(max_length=200, verbose_name='Görev')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Parametreler')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name='Durum')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')
+    max_attempts = models.PositiveIntegerField(default=5, verbose_name='En Fazla Deneme')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Çalışma Zamanı')
+    locked_at = models.DateTimeField(blank=True, null=True, verbose_name='Başlama Zamanı')
+    last_error = models.TextField(blank=True, verbose_name='Son Hata')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Zamanı')
+
+    class Meta:
+        verbose_name = 'Arka Plan İşi'
+        verbose_name_plural = 'Arka Plan İşleri'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+            # Finished jobs past their retention (queue.prune)
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.get_status_display()})"
@@ -0,0 +1,199 @@
+"""
+Small DB-backed job queue.
+
+    from jobs import queue
+    queue.enqueue('utils.email_service.send_html_now', subject=..., ...)
+
+Jobs are written with transaction.on_commit, so nothing runs for a rolled-back request,
+and are executed by `manage.py run_worker`. A failing job is retried with exponential
+backoff until `max_attempts` is reached. A job still RUNNING after LOCK_TIMEOUT is put back
+(or failed) by release_stale; that run counts as one of its attempts, and its outcome is
+dropped if it does finish later. DONE and FAILED jobs are deleted after JOBS['KEEP_FINISHED']
+by prune (a periodic job; `manage.py prune_jobs` runs it by hand).
+
+With outbox=True the job row is written right away, inside the caller's transaction
+(transactional outbox): it commits or rolls back together with the data it belongs to,
+and cannot be lost between the commit and the on_commit callback.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CONCURRENCY': 4,         # worker threads of run_worker
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 10,       # seconds, doubled on every retry
+    'BACKOFF_MAX': 60 * 60,
+    'LOCK_TIMEOUT': 10 * 60,  # RUNNING jobs older than this are considered crashed
+    'POLL_INTERVAL': 2,
+    'EAGER': False,           # run jobs in-process right after commit (no worker needed)
+    'STARTUP': (),            # tasks queued (unique) whenever run_worker starts, e.g. periodic jobs
+    'KEEP_FINISHED': 7 * 24 * 60 * 60,  # seconds DONE/FAILED jobs are kept; None keeps them forever
+    'PRUNE_INTERVAL': 60 * 60,          # seconds between prune_periodically runs
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'JOBS', {}).get(name, DEFAULTS[name])
+
+
+def task_path(task):
+    if callable(task):
+        return f'{task.__module__}.{task.__qualname__}'
+    return task
+
+
+def enqueue(task, *, run_at=None, max_attempts=None, unique=False, outbox=False, **payload):
+    """
+    Queue `task` (a function or its dotted path) to run with `payload` after the current
+    transaction commits. `payload` must be JSON-serializable.
+    With unique=True the job is skipped if an identical one is still waiting.
+    With outbox=True the job is written in the current transaction instead of after it.
+    """
+    path = task_path(task)
+
+    def create():
+        if unique and Job.objects.filter(task=path, payload=payload, status=Job.PENDING).exists():
+            return None
+        return Job.objects.create(
+            task=path,
+            payload=payload,
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts or get_setting('MAX_ATTEMPTS'),
+        )
+
+    def run_eagerly(job):
+        if job and get_setting('EAGER') and job.run_at <= timezone.now() and take(job.pk):
+            run_job(job.pk)
+
+    if outbox:
+        job = create()
+        transaction.on_commit(lambda: run_eagerly(job))
+    else:
+        transaction.on_commit(lambda: run_eagerly(create()))
+
+
+def enqueue_startup():
+    """Queue the JOBS['STARTUP'] tasks unless they are already waiting (called by run_worker)"""
+    with transaction.atomic():
+        for task in get_setting('STARTUP'):
+            enqueue(task, unique=True)
+
+
+def backoff(attempts):
+    return min(get_setting('BACKOFF_BASE') * 2 ** max(attempts - 1, 0), get_setting('BACKOFF_MAX'))
+
+
+STALE_ERROR = 'Lock timed out (worker crashed or job too slow)'
+
+
+def release_stale():
+    """
+    Put jobs of a crashed (or too slow) worker back into the queue. The timed-out run was
+    one attempt (take() counted it): jobs out of attempts are failed instead.
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=get_setting('LOCK_TIMEOUT')))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_at=None, finished_at=now, last_error=STALE_ERROR,
+    )
+    released = stale.update(status=Job.PENDING, locked_at=None, run_at=now, last_error=STALE_ERROR)
+    return failed + released
+
+
+def claim(limit):
+    """
+    Claim up to `limit` due jobs. Each job is taken with a conditional UPDATE,
+    so two workers can never run the same job.
+    """
+    candidates = Job.objects.filter(
+        status=Job.PENDING, run_at__lte=timezone.now()
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit]
+    return [pk for pk in candidates if take(pk)]
+
+
+def take(pk):
+    """Atomically move one job from PENDING to RUNNING; False if someone else got it first"""
+    return bool(Job.objects.filter(pk=pk, status=Job.PENDING).update(
+        status=Job.RUNNING,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    ))
+
+
+def run_job(pk):
+    """
+    Execute one claimed job and record the outcome, unless release_stale() took the job
+    away meanwhile (its lock no longer matches).
+    """
+    job = Job.objects.get(pk=pk)
+    ours = Job.objects.filter(pk=pk, status=Job.RUNNING, locked_at=job.locked_at)
+
+    try:
+        import_string(job.task)(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s:\n%s", job.pk, job.task, job.attempts, error)
+        if job.attempts < job.max_attempts:
+            ours.update(
+                status=Job.PENDING,
+                locked_at=None,
+                run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+                last_error=error,
+            )
+        else:
+            ours.update(status=Job.FAILED, finished_at=timezone.now(), last_error=error)
+        return False
+    else:
+        if not ours.update(status=Job.DONE, finished_at=timezone.now()):
+            logger.warning("Job %s (%s) finished after its lock timed out", job.pk, job.task)
+        return True
+
+
+def finished_before(cutoff):
+    return Job.objects.filter(status__in=(Job.DONE, Job.FAILED), finished_at__lt=cutoff)
+
+
+def prune(batch_size=1000, dry_run=False):
+    """
+    Delete DONE and FAILED jobs finished more than KEEP_FINISHED ago, `batch_size` rows per
+    statement. Returns the number of jobs.
+    """
+    keep = get_setting('KEEP_FINISHED')
+    if keep is None:
+        return 0
+    finished = finished_before(timezone.now() - timedelta(seconds=keep))
+    if dry_run:
+        return finished.count()
+
+    deleted = 0
+    while True:
+        pks = list(finished.order_by('finished_at').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += Job.objects.filter(pk__in=pks).delete()[0]
+
+
+def prune_periodically():
+    """Background job: prune, then schedule the next run."""
+    deleted = prune()
+    enqueue(prune_periodically, run_at=timezone.now() + timedelta(seconds=get_setting('PRUNE_INTERVAL')), unique=True)
+    return deleted
+
+
+def queue_depth():
+    """{status: count} of all jobs, plus how many pending jobs are already due"""
+    depth = dict.fromkeys(dict(Job.STATUS_CHOICES), 0)
+    depth.update(Job.objects.values_list('status').annotate(total=Count('pk')).order_by())
+    depth['DUE'] = Job.objects.filter(status=Job.PENDING, run_at__lte=timezone.now()).count()
+    return depth
@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Job
+
+CALLS = []
+
+
+def record(**payload):
+    CALLS.append(payload)
+
+
+def explode(**payload):
+    raise RuntimeError('patladı')
+
+
+def outlive_lock(**payload):
+    """Runs past LOCK_TIMEOUT: the worker loop releases the job while it is still running"""
+    Job.objects.filter(task=queue.task_path(outlive_lock)).update(locked_at=timezone.now() - timedelta(hours=1))
+    queue.release_stale()
+
+
+@override_settings(JOBS={'EAGER': False, 'BACKOFF_BASE': 10, 'LOCK_TIMEOUT': 60})
+class QueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def enqueue(self, task, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue.enqueue(task, **kwargs)
+        return Job.objects.latest('pk')
+
+    def test_job_is_written_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            queue.enqueue(record, value=1)
+            self.assertFalse(Job.objects.exists())
+        callbacks[0]()
+        job = Job.objects.get()
+        self.assertEqual((job.task, job.payload, job.status), ('jobs.tests.record', {'value': 1}, Job.PENDING))
+
+    def test_outbox_job_rolls_back_with_the_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                queue.enqueue(record, outbox=True, value=1)
+                self.assertTrue(Job.objects.exists())
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
+
+    def test_unique_skips_a_waiting_duplicate(self):
+        self.enqueue(record, unique=True, value=1)
+        self.enqueue(record, unique=True, value=1)
+        self.enqueue(record, unique=True, value=2)
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_take_locks_a_job_once(self):
+        job = self.enqueue(record, value=1)
+        self.assertEqual(queue.claim(10), [job.pk])
+        self.assertEqual(queue.claim(10), [])
+        self.assertFalse(queue.take(job.pk))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+        self.assertTrue(queue.run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(CALLS, [{'value': 1}])
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        job = self.enqueue(explode, max_attempts=2)
+        queue.take(job.pk)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertFalse(queue.run_job(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('patladı', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        queue.take(job.pk)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            queue.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_release_counts_as_an_attempt(self):
+        job = self.enqueue(record, max_attempts=2)
+        for expected in (Job.PENDING, Job.FAILED):
+            self.assertTrue(queue.take(job.pk))
+            Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(queue.release_stale(), 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, expected)
+            self.assertEqual(job.last_error, queue.STALE_ERROR)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(queue.take(job.pk))
+
+    def test_fresh_running_job_is_not_released(self):
+        job = self.enqueue(record)
+        queue.take(job.pk)
+        self.assertEqual(queue.release_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_late_finish_does_not_override_the_release(self):
+        job = self.enqueue(outlive_lock, max_attempts=3)
+        queue.take(job.pk)
+        with self.assertLogs('jobs.queue', 'WARNING') as logs:
+            queue.run_job(job.pk)
+        self.assertIn('after its lock timed out', logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 1))
+        self.assertIsNone(job.finished_at)
+
+    @override_settings(JOBS={'EAGER': True})
+    def test_eager_runs_after_commit(self):
+        job = self.enqueue(record, value=1)
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(CALLS, [{'value': 1}])
+
+    @override_settings(JOBS={'STARTUP': ['jobs.tests.record']})
+    def test_startup_jobs_are_queued_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            queue.enqueue_startup()
+        with self.captureOnCommitCallbacks(execute=True):
+            queue.enqueue_startup()
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['jobs.tests.record'])
+
+    @override_settings(JOBS={'KEEP_FINISHED': 60 * 60, 'PRUNE_INTERVAL': 60})
+    def test_prune_deletes_old_finished_jobs(self):
+        now = timezone.now()
+        old = now - timedelta(hours=2)
+        for status, finished_at in ((Job.DONE, old), (Job.FAILED, old), (Job.DONE, now), (Job.PENDING, None)):
+            Job.objects.create(task='jobs.tests.record', status=status, finished_at=finished_at)
+
+        self.assertEqual(queue.prune(dry_run=True), 2)
+        self.assertEqual(queue.prune(batch_size=1), 2)
+        self.assertEqual(sorted(Job.objects.values_list('status', flat=True)), [Job.DONE, Job.PENDING])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(queue.prune_periodically(), 0)
+        next_run = Job.objects.get(task='jobs.queue.prune_periodically')
+        self.assertGreater(next_run.run_at, now)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from matches import standings
+
+
+class Command(BaseCommand):
+    help = 'Recompute every team\'s standings from Match history and report drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift, do not write')
+
+    def handle(self, *args, **options):
+        drift = standings.rebuild(dry_run=options['dry_run'])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Puan durumu maç geçmişiyle tutarlı."))
+            return
+
+        for team, diff in drift:
+            changes = ', '.join(f"{field}: {stored} -> {expected}" for field, (stored, expected) in diff.items())
+            self.stdout.write(f"  {team.name}: {changes}")
+
+        verb = "tutarsız" if options['dry_run'] else "düzeltildi"
+        self.stdout.write(self.style.WARNING(f"{len(drift)} takımın puan durumu {verb}."))
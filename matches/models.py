@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from teams.models import Team
 from players.models import Player
+from . import standings
 
 
 class Match(models.Model):
@@ -43,76 +44,25 @@ class Match(models.Model):
         return None  # Beraberlik
     
     def save(self, *args, **kwargs):
-        """Update team statistics when match is finished"""
-        is_new = self.pk is None
-        old_match = None
-        
-        if not is_new:
-            old_match = Match.objects.get(pk=self.pk)
-        
-        super().save(*args, **kwargs)
-        
-        # If the match is finished, update team statistics
-        if self.is_finished:
-            if is_new or (old_match and not old_match.is_finished):
-                self._update_team_stats()
-            elif old_match and (old_match.team1_score != self.team1_score or old_match.team2_score != self.team2_score):
-                # Revert old scores
-                self._revert_team_stats(old_match)
-                # Apply new scores
-                self._update_team_stats()
-    
-    def _update_team_stats(self):
-        """Update team statistics (Points, G, B, M, Goals)"""
-        # Process goals
-        self.team1.goals_scored += self.team1_score
-        self.team1.goals_conceded += self.team2_score
-        self.team2.goals_scored += self.team2_score
-        self.team2.goals_conceded += self.team1_score
-        
-        # Process result
-        if self.team1_score > self.team2_score:
-            self.team1.wins += 1
-            self.team1.points += 3
-            self.team2.losses += 1
-        elif self.team2_score > self.team1_score:
-            self.team2.wins += 1
-            self.team2.points += 3
-            self.team1.losses += 1
-        else:
-            self.team1.draws += 1
-            self.team1.points += 1
-            self.team2.draws += 1
-            self.team2.points += 1
-        
-        self.team1.save()
-        self.team2.save()
-    
-    def _revert_team_stats(self, old_match):
-        """Revert old match result"""
-        # Revert goals
-        self.team1.goals_scored -= old_match.team1_score
-        self.team1.goals_conceded -= old_match.team2_score
-        self.team2.goals_scored -= old_match.team2_score
-        self.team2.goals_conceded -= old_match.team1_score
-        
-        # Revert result
-        if old_match.team1_score > old_match.team2_score:
-            self.team1.wins -= 1
-            self.team1.points -= 3
-            self.team2.losses -= 1
-        elif old_match.team2_score > old_match.team1_score:
-            self.team2.wins -= 1
-            self.team2.points -= 3
-            self.team1.losses -= 1
-        else:
-            self.team1.draws -= 1
-            self.team1.points -= 1
-            self.team2.draws -= 1
-            self.team2.points -= 1
-        
-        self.team1.save()
-        self.team2.save()
+        """
+        Update team statistics atomically.
+        The old row is locked and re-read inside the transaction, and only the difference
+        between the old and new result is applied (see matches/standings.py), so score edits,
+        team changes and un-finishing a match are all reverted correctly.
+        The lock is a no-op UPDATE: SQLite ignores select_for_update(), but a write takes its
+        database write lock, so a concurrent save waits and then reads the result of this one.
+        """
+        with transaction.atomic():
+            old_match = None
+            if self.pk is not None:
+                Match.objects.filter(pk=self.pk).update(is_finished=models.F('is_finished'))
+                old_match = Match.objects.filter(pk=self.pk).values(
+                    'team1_id', 'team2_id', 'team1_score', 'team2_score', 'is_finished'
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            standings.apply(standings.contribution_of(old_match), standings.contribution_of(self))
 
 
 class PlayerMatchStats(models.Model):
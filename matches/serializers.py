@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.thumbnails import ThumbnailField
 from .models import Match, PlayerMatchStats
 from teams.serializers import TeamListSerializer
 
@@ -6,7 +7,7 @@ from teams.serializers import TeamListSerializer
 class PlayerMatchStatsSerializer(serializers.ModelSerializer):
     """Player's performance statistics in a match serializer"""
     player_name = serializers.CharField(source='player.name', read_only=True)
-    player_photo = serializers.ImageField(source='player.photo', read_only=True)
+    player_photo = ThumbnailField('list', source='player.photo')
     player_id = serializers.IntegerField(source='player.id', read_only=True)
     team_name = serializers.CharField(source='team.name', read_only=True)
     
@@ -21,8 +22,8 @@ class MatchListSerializer(serializers.ModelSerializer):
     team2_name = serializers.CharField(source='team2.name', read_only=True)
     team1_short_name = serializers.CharField(source='team1.short_name', read_only=True)
     team2_short_name = serializers.CharField(source='team2.short_name', read_only=True)
-    team1_logo = serializers.ImageField(source='team1.logo', read_only=True)
-    team2_logo = serializers.ImageField(source='team2.logo', read_only=True)
+    team1_logo = ThumbnailField('list', source='team1.logo')
+    team2_logo = ThumbnailField('list', source='team2.logo')
     winner_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -88,13 +89,28 @@ class PlayerMatchHistorySerializer(serializers.ModelSerializer):
     team1_score = serializers.IntegerField(source='match.team1_score', read_only=True)
     team2_score = serializers.IntegerField(source='match.team2_score', read_only=True)
     team_name = serializers.CharField(source='team.name', read_only=True)
+    result = serializers.SerializerMethodField()
     
     class Meta:
         model = PlayerMatchStats
         fields = [
-            'match_id', 'match_date',
+            'id', 'match_id', 'match_date',
             'team_name', 'team1_name', 'team2_name',
             'team1_short_name', 'team2_short_name',
             'team1_score', 'team2_score',
-            'goals', 'assists', 'played'
+            'goals', 'assists', 'played', 'result'
         ]
+
+    def get_result(self, obj):
+        """W / D / L from the player's team point of view (None while the match is running)"""
+        match = obj.match
+        if not match.is_finished:
+            return None
+        own, other = match.team1_score, match.team2_score
+        if obj.team_id == match.team2_id:
+            own, other = other, own
+        if own > other:
+            return 'W'
+        if own < other:
+            return 'L'
+        return 'D'
@@ -0,0 +1,97 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Match, PlayerMatchStats
+from players import career_stats, leaderboards
+from . import standings
+
+
+def _contribution(stats):
+    """(player_id, goals, assists, appearances) a stats row adds to the career totals"""
+    return stats.player_id, stats.goals, stats.assists, 1 if stats.played else 0
+
+
+@receiver(pre_save, sender=PlayerMatchStats)
+def remember_old_stats(sender, instance, **kwargs):
+    """Keep the stored version of the row so post_save can apply only the difference."""
+    instance._old_stats = None
+    if instance.pk:
+        instance._old_stats = PlayerMatchStats.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=PlayerMatchStats)
+def update_career_stats_on_save(sender, instance, created, **kwargs):
+    """
+    Apply the delta between the old and new version of the row to PlayerCareerStats.
+    """
+    old = getattr(instance, '_old_stats', None)
+    player_id, goals, assists, appearances = _contribution(instance)
+    match_date = instance.match.date if instance.played else None
+
+    if old is None or old.player_id != player_id:
+        if old is not None:
+            # Row moved to another player: take everything back from the old one
+            old_player_id, old_goals, old_assists, old_appearances = _contribution(old)
+            career_stats.apply_delta(old_player_id, -old_goals, -old_assists, -old_appearances)
+            if old.played:
+                career_stats.refresh_last_played(old_player_id)
+        career_stats.apply_delta(player_id, goals, assists, appearances, match_date)
+        return
+
+    _, old_goals, old_assists, old_appearances = _contribution(old)
+    career_stats.apply_delta(
+        player_id,
+        goals - old_goals,
+        assists - old_assists,
+        appearances - old_appearances,
+        match_date
+    )
+    if old.played and (not instance.played or old.match_id != instance.match_id):
+        career_stats.refresh_last_played(player_id)
+
+
+@receiver(post_delete, sender=PlayerMatchStats)
+def update_career_stats_on_delete(sender, instance, **kwargs):
+    player_id, goals, assists, appearances = _contribution(instance)
+    # A player's delete cascades here after their career row is gone: don't build it again
+    career_stats.apply_delta(player_id, -goals, -assists, -appearances, rebuild_missing=False)
+    if instance.played:
+        career_stats.refresh_last_played(player_id)
+
+
+@receiver(pre_save, sender=Match)
+def remember_old_match_date(sender, instance, **kwargs):
+    instance._old_date = None
+    if instance.pk:
+        instance._old_date = Match.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver(post_save, sender=Match)
+def update_last_played_on_reschedule(sender, instance, created, **kwargs):
+    """Moving a match in time can change last_played of everyone who played in it."""
+    old_date = getattr(instance, '_old_date', None)
+    if created or old_date is None or old_date == instance.date:
+        return
+
+    player_ids = instance.player_stats.filter(played=True).values_list('player_id', flat=True)
+    for player_id in player_ids:
+        career_stats.refresh_last_played(player_id)
+
+
+@receiver(post_save, sender=PlayerMatchStats)
+@receiver(post_delete, sender=PlayerMatchStats)
+@receiver(post_delete, sender=Match)
+def mark_leaderboards_stale(sender, **kwargs):
+    """
+    Leaderboard snapshots are rebuilt from career stats by a background job
+    (or on their next read, whichever comes first).
+    """
+    from jobs import queue
+
+    leaderboards.mark_stale()
+    queue.enqueue(leaderboards.rebuild_stale, unique=True)
+
+
+@receiver(post_delete, sender=Match)
+def revert_standings_on_delete(sender, instance, **kwargs):
+    """Deleting a finished match (also via queryset/cascade deletes) takes its result back."""
+    standings.apply(standings.contribution_of(instance), {})
@@ -0,0 +1,106 @@
+"""
+Team standings engine.
+
+Every finished match contributes a fixed set of counters to its two teams. Saving, editing,
+un-finishing or deleting a match applies the difference between the old and the new
+contribution as atomic F() updates, so concurrent result entries cannot lose updates.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import F
+
+from teams.models import Team
+
+STANDING_FIELDS = Team.STANDING_FIELDS
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+
+def contribution(team1_id, team2_id, team1_score, team2_score, is_finished):
+    """{team_id: Counter(field -> value)} a match adds to the standings"""
+    if not is_finished:
+        return {}
+
+    home = Counter(goals_scored=team1_score, goals_conceded=team2_score)
+    away = Counter(goals_scored=team2_score, goals_conceded=team1_score)
+
+    if team1_score > team2_score:
+        home.update(wins=1, points=POINTS_WIN)
+        away.update(losses=1)
+    elif team2_score > team1_score:
+        away.update(wins=1, points=POINTS_WIN)
+        home.update(losses=1)
+    else:
+        home.update(draws=1, points=POINTS_DRAW)
+        away.update(draws=1, points=POINTS_DRAW)
+
+    return {team1_id: home, team2_id: away}
+
+
+def contribution_of(match):
+    """Contribution of a Match instance or a values() dict of one (None -> nothing)"""
+    if match is None:
+        return {}
+    if isinstance(match, dict):
+        return contribution(
+            match['team1_id'], match['team2_id'],
+            match['team1_score'], match['team2_score'], match['is_finished']
+        )
+    return contribution(match.team1_id, match.team2_id, match.team1_score, match.team2_score, match.is_finished)
+
+
+def apply(old, new):
+    """
+    Move the standings from the `old` contribution to the `new` one.
+    Issues one UPDATE ... SET x = x + delta per affected team; call inside a transaction.
+    """
+    for team_id in set(old) | set(new):
+        delta = Counter(new.get(team_id, {}))
+        delta.subtract(old.get(team_id, {}))
+        updates = {field: F(field) + value for field, value in delta.items() if value}
+        if updates:
+            Team.objects.filter(pk=team_id).update(**updates)
+
+
+def compute_all():
+    """Standings of every team from Match history, in one pass over finished matches"""
+    from .models import Match
+
+    totals = defaultdict(Counter)
+    matches = Match.objects.filter(is_finished=True).values_list(
+        'team1_id', 'team2_id', 'team1_score', 'team2_score'
+    ).order_by()
+    for team1_id, team2_id, team1_score, team2_score in matches.iterator():
+        for team_id, counters in contribution(team1_id, team2_id, team1_score, team2_score, True).items():
+            totals[team_id].update(counters)
+    return totals
+
+
+def rebuild(dry_run=False):
+    """
+    Recompute every Team row from Match history.
+    Returns the drift found: [(team, {field: (stored, expected)})].
+    """
+    from django.db import transaction
+
+    totals = compute_all()
+    drift = []
+    with transaction.atomic():
+        teams = list(Team.objects.select_for_update().order_by('pk'))
+        for team in teams:
+            expected = totals.get(team.pk, Counter())
+            diff = {
+                field: (getattr(team, field), expected[field])
+                for field in STANDING_FIELDS
+                if getattr(team, field) != expected[field]
+            }
+            if diff:
+                drift.append((team, diff))
+                for field, (_, value) in diff.items():
+                    setattr(team, field, value)
+
+        if drift and not dry_run:
+            Team.objects.bulk_update([team for team, _ in drift], STANDING_FIELDS)
+
+    return drift
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from players.models import Player
+from teams.models import Team
+from teams.serializers import TeamUpdateSerializer
+from . import standings
+from .models import Match
+
+
+class StandingsTests(TestCase):
+    """Team standings follow every match change through F() deltas and are never saved back from a Team instance."""
+
+    def setUp(self):
+        self.home = Team.objects.create(name='Akdeniz FC', short_name='AKD')
+        self.away = Team.objects.create(name='Rakip FC', short_name='RKP')
+
+    def play(self, home_score, away_score, is_finished=True):
+        return Match.objects.create(
+            date=timezone.now(), team1=self.home, team2=self.away,
+            team1_score=home_score, team2_score=away_score, is_finished=is_finished,
+        )
+
+    def assertStandings(self, team, **expected):
+        row = Team.objects.values(*Team.STANDING_FIELDS).get(pk=team.pk)
+        values = dict.fromkeys(Team.STANDING_FIELDS, 0)
+        values.update(expected)
+        self.assertEqual(row, values)
+
+    def test_finished_match_counts(self):
+        self.play(3, 1)
+        self.play(2, 2)
+        self.assertStandings(self.home, wins=1, draws=1, goals_scored=5, goals_conceded=3, points=4)
+        self.assertStandings(self.away, losses=1, draws=1, goals_scored=3, goals_conceded=5, points=1)
+
+    def test_unfinished_match_does_not_count(self):
+        self.play(3, 1, is_finished=False)
+        self.assertStandings(self.home)
+        self.assertStandings(self.away)
+
+    def test_score_edit_moves_the_result(self):
+        match = self.play(3, 1)
+        match.team1_score, match.team2_score = 0, 2
+        match.save()
+        self.assertStandings(self.home, losses=1, goals_scored=0, goals_conceded=2)
+        self.assertStandings(self.away, wins=1, goals_scored=2, goals_conceded=0, points=3)
+
+    def test_old_result_is_read_after_the_write_lock(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        match = self.play(3, 1)
+        match.team1_score = 4
+        with CaptureQueriesContext(connection) as queries:
+            match.save()
+        statements = [query['sql'].split()[0] for query in queries if 'matches_match' in query['sql']]
+        self.assertEqual(statements[:2], ['UPDATE', 'SELECT'])
+
+    def test_unfinishing_and_deleting_revert(self):
+        match = self.play(3, 1)
+        match.is_finished = False
+        match.save()
+        self.assertStandings(self.home)
+
+        match.is_finished = True
+        match.save()
+        match.delete()
+        self.assertStandings(self.home)
+        self.assertStandings(self.away)
+
+    def test_stale_team_save_keeps_standings(self):
+        team = Team.objects.get(pk=self.home.pk)
+        self.play(3, 1)
+
+        team.name = 'Akdeniz Spor'
+        team.save()
+
+        self.assertEqual(Team.objects.get(pk=self.home.pk).name, 'Akdeniz Spor')
+        self.assertStandings(self.home, wins=1, goals_scored=3, goals_conceded=1, points=3)
+
+    def test_captain_update_keeps_standings(self):
+        user = User.objects.create(username='kaptan', email='kaptan@example.com')
+        captain = Player.objects.create(user=user, current_team=self.home, is_email_verified=True)
+        Team.objects.filter(pk=self.home.pk).update(captain=captain)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # A result is entered while the captain's request holds the loaded team
+        update = TeamUpdateSerializer.update
+
+        def update_after_a_match(serializer, instance, validated_data):
+            self.play(3, 1)
+            return update(serializer, instance, validated_data)
+
+        with mock.patch.object(TeamUpdateSerializer, 'update', update_after_a_match):
+            response = client.patch(f'/api/teams/{self.home.pk}/', {'short_name': 'AKS'}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(Team.objects.get(pk=self.home.pk).short_name, 'AKS')
+        self.assertStandings(self.home, wins=1, goals_scored=3, goals_conceded=1, points=3)
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        self.play(3, 1)
+        Team.objects.filter(pk=self.home.pk).update(wins=5, points=0)
+
+        drift = standings.rebuild(dry_run=True)
+        self.assertEqual([(team.pk, diff) for team, diff in drift], [(self.home.pk, {'wins': (5, 1), 'points': (0, 3)})])
+        self.assertStandings(self.home, wins=5, goals_scored=3, goals_conceded=1)
+
+        standings.rebuild()
+        self.assertStandings(self.home, wins=1, goals_scored=3, goals_conceded=1, points=3)
+        self.assertEqual(standings.rebuild(dry_run=True), [])
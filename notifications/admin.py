@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import Broadcast, SubscriptionHealth
 
-# Register your models here.
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('title', 'target', 'status', 'total', 'sent', 'failed', 'pruned', 'skipped', 'created_at', 'finished_at')
+    list_filter = ('status', 'target')
+    readonly_fields = ('status', 'total', 'sent', 'failed', 'pruned', 'skipped', 'error', 'created_by', 'recipient', 'created_at', 'finished_at')
+
+
+@admin.register(SubscriptionHealth)
+class SubscriptionHealthAdmin(admin.ModelAdmin):
+    list_display = ('subscription', 'failures', 'last_status', 'last_failure_at')
+    list_filter = ('last_status',)
+    ordering = ('-failures',)
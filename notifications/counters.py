@@ -0,0 +1,185 @@
+"""
+Per-user unread counters (NotificationCounter).
+
+Every change to the unread state applies a delta with a single UPDATE ... SET unread = unread + n,
+so concurrent requests never lose an increment. A new broadcast is counted in the transaction
+that inserts it, so it is never visible without being counted (or counted twice).
+`reconcile` recomputes everything from the inbox tables and repairs any drift; it runs
+periodically in the background worker (JOBS['STARTUP']).
+"""
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Broadcast, BroadcastReceipt, Notification, NotificationCounter
+
+CACHE_TIMEOUT = 30
+RECONCILE_INTERVAL = 60 * 60  # seconds
+
+_local = threading.local()
+
+
+def cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def add(user_id, delta):
+    """
+    Apply `delta` to a user's unread counter (never below zero).
+    A missing row is left alone; `unread` builds it from the tables on first read.
+    """
+    if not delta:
+        return
+    NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F('unread') + delta, 0))
+    cache.delete(cache_key(user_id))
+
+
+def add_many(deltas):
+    """Apply {user_id: delta} at once: one UPDATE per distinct delta (and 500 users)"""
+    users_by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            users_by_delta[delta].append(user_id)
+    for delta, user_ids in users_by_delta.items():
+        for i in range(0, len(user_ids), 500):
+            NotificationCounter.objects.filter(user_id__in=user_ids[i:i + 500]).update(unread=Greatest(F('unread') + delta, 0))
+    cache.delete_many([cache_key(user_id) for user_ids in users_by_delta.values() for user_id in user_ids])
+
+
+@contextmanager
+def batched():
+    """
+    Bulk deletes (notifications/retention.py): inside the block the delete signals leave
+    the counters alone, the caller applies the deltas of the whole batch with add_many.
+    """
+    _local.batched = True
+    try:
+        yield
+    finally:
+        _local.batched = False
+
+
+def in_batch():
+    return getattr(_local, 'batched', False)
+
+
+def unread(user):
+    """Unread count of a user: cache, then the counter row (built on first use)."""
+    key = cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+        if count is None:
+            count = rebuild_for_user(user.pk)
+        cache.set(key, count, CACHE_TIMEOUT)
+    return count
+
+
+def broadcast_created(broadcast):
+    """
+    One unread item more for every user who sees the broadcast.
+    Call in the transaction that inserts it (see signals.count_broadcast).
+    """
+    if broadcast.recipient_id:
+        add(broadcast.recipient_id, 1)
+    else:
+        # One UPDATE for everyone; cached counts catch up within CACHE_TIMEOUT.
+        # Users without a counter row get theirs built, broadcast included, on first read.
+        NotificationCounter.objects.filter(user__date_joined__lte=broadcast.created_at).update(unread=F('unread') + 1)
+
+
+# --- Reconciliation ---
+
+def rebuild_for_user(user_id):
+    """Recompute one user's counter from the inbox tables"""
+    from .inbox import unread_count
+
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return 0
+    count = unread_count(user)
+    NotificationCounter.objects.update_or_create(user=user, defaults={'unread': count})
+    return count
+
+
+def compute_all():
+    """{user_id: unread} for every user, with a handful of aggregate queries"""
+    personal = dict(
+        Notification.objects.filter(is_read=False).values_list('recipient').annotate(n=Count('pk')).order_by()
+    )
+    direct = dict(
+        Broadcast.objects.filter(recipient__isnull=False).values_list('recipient').annotate(n=Count('pk')).order_by()
+    )
+    receipts = dict(
+        BroadcastReceipt.objects.values_list('user').annotate(n=Count('pk')).order_by()
+    )
+    # Global broadcasts are visible to users who joined before them
+    global_dates = sorted(Broadcast.objects.filter(recipient__isnull=True).values_list('created_at', flat=True))
+
+    totals = {}
+    for user_id, date_joined in User.objects.values_list('pk', 'date_joined').iterator():
+        visible = len(global_dates) - bisect_left(global_dates, date_joined) + direct.get(user_id, 0)
+        totals[user_id] = personal.get(user_id, 0) + max(visible - receipts.get(user_id, 0), 0)
+    return totals
+
+
+def broadcast_deltas(broadcasts):
+    """
+    {user_id: -n}: counter deltas for deleting `broadcasts` (values() dicts with id,
+    recipient_id, created_at), n being how many of them are unread in the user's inbox.
+    """
+    deltas = Counter()
+    for broadcast in broadcasts:
+        if broadcast['recipient_id'] is not None:
+            deltas[broadcast['recipient_id']] -= 1
+
+    global_dates = sorted(broadcast['created_at'] for broadcast in broadcasts if broadcast['recipient_id'] is None)
+    if global_dates:
+        for user_id, date_joined in NotificationCounter.objects.values_list('user_id', 'user__date_joined').iterator():
+            deltas[user_id] -= len(global_dates) - bisect_left(global_dates, date_joined)
+
+    # Receipts only exist for broadcasts the user could see
+    read = BroadcastReceipt.objects.filter(broadcast_id__in=[broadcast['id'] for broadcast in broadcasts])
+    for user_id, count in read.values_list('user_id').annotate(n=Count('pk')).order_by():
+        deltas[user_id] += count
+    return deltas
+
+
+def reconcile(dry_run=False):
+    """
+    Recompute every counter and fix the ones that drifted.
+    A counter is only overwritten if it still holds the value read before the recount
+    (compare-and-set): one that changed meanwhile is left for the next run.
+    Returns the drift found: [(user_id, stored, expected)].
+    """
+    stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+    expected = compute_all()
+
+    drift = [(user_id, stored.get(user_id), count) for user_id, count in expected.items() if stored.get(user_id) != count]
+    if drift and not dry_run:
+        missing = [NotificationCounter(user_id=user_id, unread=count) for user_id, old, count in drift if old is None]
+        NotificationCounter.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+
+        for user_id, old, count in drift:
+            if old is not None:
+                NotificationCounter.objects.filter(user_id=user_id, unread=old).update(unread=count)
+            cache.delete(cache_key(user_id))
+
+    return drift
+
+
+def reconcile_periodically():
+    """Background job: reconcile, then schedule the next run."""
+    from jobs import queue
+
+    drift = reconcile()
+    queue.enqueue(reconcile_periodically, run_at=timezone.now() + timedelta(seconds=RECONCILE_INTERVAL), unique=True)
+    return len(drift)
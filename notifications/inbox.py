@@ -0,0 +1,113 @@
+"""
+A user's inbox: their personal Notification rows merged with the Broadcasts they can see.
+
+Broadcasts are stored once (fan-out on read). In the inbox they are identified as
+'b<id>' so they never collide with notification ids; read state comes from BroadcastReceipt.
+"""
+from django.db import transaction
+from django.db.models import CharField, Exists, F, OuterRef, Value
+
+from .models import Broadcast, BroadcastReceipt, Notification
+from . import counters
+
+BROADCAST_PREFIX = 'b'
+
+# Column order of the UNION (every column is an annotation, so both sides line up)
+ITEM_FIELDS = ('item_id', 'kind', 'item_title', 'item_message', 'item_type', 'item_is_read', 'item_link', 'item_created_at')
+
+
+def broadcast_id(item_id):
+    """Broadcast pk of an inbox id like 'b12', None for notification ids"""
+    item_id = str(item_id)
+    if item_id.startswith(BROADCAST_PREFIX) and item_id[len(BROADCAST_PREFIX):].isdigit():
+        return int(item_id[len(BROADCAST_PREFIX):])
+    return None
+
+
+def read_receipt(user):
+    return BroadcastReceipt.objects.filter(user=user, broadcast=OuterRef('pk'))
+
+
+def personal_items(user):
+    return Notification.objects.filter(recipient=user).annotate(
+        item_id=F('id'),
+        kind=Value('notification', output_field=CharField()),
+        item_title=F('title'),
+        item_message=F('message'),
+        item_type=F('notification_type'),
+        item_is_read=F('is_read'),
+        item_link=F('related_link'),
+        item_created_at=F('created_at'),
+    ).values(*ITEM_FIELDS).order_by()
+
+
+def broadcast_items(user):
+    return Broadcast.objects.visible_to(user).annotate(
+        item_id=F('id'),
+        kind=Value('broadcast', output_field=CharField()),
+        item_title=F('title'),
+        item_message=F('message'),
+        item_type=Value('SYSTEM', output_field=CharField()),
+        item_is_read=Exists(read_receipt(user)),
+        item_link=Value(None, output_field=CharField()),
+        item_created_at=F('created_at'),
+    ).values(*ITEM_FIELDS).order_by()
+
+
+def parts(user):
+    """The querysets the inbox UNION is made of (paginated by notifications.pagination.InboxPagination)"""
+    return [personal_items(user), broadcast_items(user)]
+
+
+def items(user):
+    """Every inbox item of `user`, newest first, in one UNION ALL query"""
+    personal, broadcasts = parts(user)
+    return personal.union(broadcasts, all=True).order_by('-item_created_at', '-item_id', '-kind')
+
+
+def unread_count(user):
+    """Unread items computed from the tables; requests use the maintained counter (counters.unread)"""
+    personal = Notification.objects.filter(recipient=user, is_read=False).values('id').order_by()
+    broadcasts = Broadcast.objects.visible_to(user).exclude(Exists(read_receipt(user))).values('id').order_by()
+    return personal.union(broadcasts, all=True).count()
+
+
+def mark_read(user, item_id):
+    """Mark one inbox item as read. Returns False if the user has no such item."""
+    pk = broadcast_id(item_id)
+    if pk is None:
+        if not str(item_id).isdigit():
+            return False
+        notifications = Notification.objects.filter(recipient=user, pk=item_id)
+        updated = notifications.filter(is_read=False).update(is_read=True)
+        counters.add(user.pk, -updated)
+        return bool(updated) or notifications.exists()
+
+    if not Broadcast.objects.visible_to(user).filter(pk=pk).exists():
+        return False
+    _, created = BroadcastReceipt.objects.get_or_create(user=user, broadcast_id=pk)
+    if created:
+        counters.add(user.pk, -1)
+    return True
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        unread = list(Broadcast.objects.visible_to(user).exclude(Exists(read_receipt(user))).values_list('pk', flat=True))
+        updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        BroadcastReceipt.objects.bulk_create(
+            [BroadcastReceipt(user=user, broadcast_id=pk) for pk in unread], ignore_conflicts=True
+        )
+        counters.add(user.pk, -(updated + len(unread)))
+
+
+def deliver(recipient_id, message, notification_type='SYSTEM', title=None):
+    """
+    Background job: create a Notification. Lets busy write transactions (e.g. registration)
+    queue it through the job outbox instead of creating it, and its push, inline.
+    """
+    fields = {'title': title} if title else {}
+    with transaction.atomic():
+        Notification.objects.create(
+            recipient_id=recipient_id, message=message, notification_type=notification_type, **fields
+        )
@@ -0,0 +1,71 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notifications import retention
+
+
+def days_label(days):
+    return '∞' if days is None else days
+
+
+class Command(BaseCommand):
+    help = 'Delete (or archive, then delete) notifications and broadcasts past their retention, in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired rows')
+        parser.add_argument(
+            '--archive', metavar='DIR',
+            help='Write the rows to DIR/notifications-<time>.jsonl.gz, DIR/broadcasts-<time>.jsonl.gz '
+                 'and DIR/broadcast-receipts-<time>.jsonl.gz before deleting'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        for notification_type, days in retention.policy().items():
+            self.stdout.write(
+                f"  {notification_type}: okunmuş {days_label(days['read'])} gün, okunmamış {days_label(days['unread'])} gün"
+            )
+        self.stdout.write(f"  Toplu bildirimler: {days_label(retention.broadcast_days())} gün")
+
+        archive_paths = dict.fromkeys(('notifications', 'broadcasts', 'broadcast-receipts'))
+        if options['archive'] and not options['dry_run']:
+            os.makedirs(options['archive'], exist_ok=True)
+            stamp = f"{timezone.now():%Y%m%d-%H%M%S}"
+            archive_paths = {name: os.path.join(options['archive'], f"{name}-{stamp}.jsonl.gz") for name in archive_paths}
+
+        stats = retention.prune(
+            batch_size=options['batch_size'],
+            archive_path=archive_paths['notifications'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+        broadcast_stats = retention.prune_broadcasts(
+            batch_size=options['batch_size'],
+            archive_path=archive_paths['broadcasts'],
+            receipts_archive_path=archive_paths['broadcast-receipts'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+
+        for notification_type, count in sorted(stats['by_type'].items()):
+            self.stdout.write(f"  {notification_type}: {count}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['rows']} bildirimin, {broadcast_stats['rows']} toplu bildirimin "
+                f"({broadcast_stats['receipts']} okundu bilgisi) süresi dolmuş (silinmedi)."
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['rows']} bildirim, {broadcast_stats['rows']} toplu bildirim "
+            f"({broadcast_stats['receipts']} okundu bilgisi) silindi."
+        ))
+        if options['archive']:
+            for path in archive_paths.values():
+                if os.path.exists(path):
+                    self.stdout.write(f"Arşiv: {path} ({os.path.getsize(path)} bayt)")
+        if stats['freed_bytes'] is not None:
+            self.stdout.write(f"Veritabanında boşalan alan: {stats['freed_bytes']} bayt (dosyayı küçültmek için VACUUM)")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from notifications import push
+from notifications.models import SubscriptionHealth
+
+
+class Command(BaseCommand):
+    help = 'Delete push subscriptions that keep failing (see notifications.SubscriptionHealth).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-failures', type=int, default=None, help='Default: PUSH_MAX_FAILURES')
+        parser.add_argument('--dry-run', action='store_true', help='Only count, do not delete')
+
+    def handle(self, *args, **options):
+        min_failures = options['min_failures'] or push.max_failures()
+        ids = list(SubscriptionHealth.objects.filter(failures__gte=min_failures).values_list('subscription_id', flat=True))
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(ids)} abonelik en az {min_failures} kez art arda başarısız oldu.")
+            return
+
+        push.prune(ids)
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} bozuk abonelik silindi."))
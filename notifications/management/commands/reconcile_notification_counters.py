@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from notifications import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the unread notification counters and repair drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the drift, do not write')
+        parser.add_argument('--schedule', action='store_true', help='Start the hourly reconciliation job now (run_worker also starts it, JOBS["STARTUP"])')
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            from jobs import queue
+            queue.enqueue(counters.reconcile_periodically, unique=True)
+            self.stdout.write(self.style.SUCCESS("Periyodik sayaç kontrolü kuyruğa alındı."))
+            return
+
+        drift = counters.reconcile(dry_run=options['dry_run'])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Tüm bildirim sayaçları tutarlı."))
+            return
+
+        for user_id, stored, expected in drift[:20]:
+            self.stdout.write(f"  kullanıcı #{user_id}: {stored} -> {expected}")
+
+        verb = "tutarsız" if options['dry_run'] else "düzeltildi"
+        self.stdout.write(self.style.WARNING(f"{len(drift)} kullanıcının sayacı {verb}."))
@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-17 00:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_title'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255, verbose_name='Başlık')),
+                ('message', models.TextField(verbose_name='Mesaj')),
+                ('target', models.CharField(choices=[('all', 'Tüm Cihazlar'), ('users', 'Kayıtlı Kullanıcılar'), ('single', 'Tek Kullanıcı')], default='users', max_length=10, verbose_name='Hedef')),
+                ('username', models.CharField(blank=True, max_length=150, verbose_name='Kullanıcı Adı')),
+                ('status', models.CharField(choices=[('PENDING', 'Bekliyor'), ('RUNNING', 'Gönderiliyor'), ('DONE', 'Tamamlandı'), ('FAILED', 'Başarısız')], default='PENDING', max_length=10, verbose_name='Durum')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Toplam Abonelik')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Başarılı')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Başarısız')),
+                ('pruned', models.PositiveIntegerField(default=0, verbose_name='Silinen Abonelik')),
+                ('error', models.TextField(blank=True, verbose_name='Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Zamanı')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Gönderen')),
+            ],
+            options={
+                'verbose_name': 'Toplu Bildirim',
+                'verbose_name_plural': 'Toplu Bildirimler',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
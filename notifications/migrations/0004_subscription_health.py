@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-17 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_broadcastjob'),
+        ('webpush', '0005_auto_20230614_1529'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionHealth',
+            fields=[
+                ('subscription', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='health', serialize=False, to='webpush.subscriptioninfo', verbose_name='Abonelik')),
+                ('failures', models.PositiveIntegerField(default=0, verbose_name='Art Arda Hata')),
+                ('last_status', models.PositiveIntegerField(blank=True, null=True, verbose_name='Son Durum Kodu')),
+                ('last_error', models.TextField(blank=True, verbose_name='Son Hata')),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True, verbose_name='Son Hata Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Abonelik Durumu',
+                'verbose_name_plural': 'Abonelik Durumları',
+            },
+        ),
+        migrations.AddField(
+            model_name='broadcastjob',
+            name='skipped',
+            field=models.PositiveIntegerField(default=0, verbose_name='Atlanan Abonelik'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0004_subscription_health'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='BroadcastJob',
+            new_name='Broadcast',
+        ),
+        migrations.RemoveField(
+            model_name='broadcast',
+            name='username',
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='recipient',
+            field=models.ForeignKey(blank=True, help_text="Sadece target='single' için", null=True, on_delete=django.db.models.deletion.CASCADE, related_name='direct_broadcasts', to=settings.AUTH_USER_MODEL, verbose_name='Alıcı'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['-created_at'], name='broadcast_created_idx'),
+        ),
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True, verbose_name='Okunma Tarihi')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.broadcast', verbose_name='Toplu Bildirim')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Okundu Bilgisi',
+                'verbose_name_plural': 'Okundu Bilgileri',
+                'constraints': [models.UniqueConstraint(fields=('user', 'broadcast'), name='unique_broadcast_receipt')],
+            },
+        ),
+    ]
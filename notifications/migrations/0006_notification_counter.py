@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-17 00:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('notifications', '0005_broadcast_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+                ('unread', models.PositiveIntegerField(default=0, verbose_name='Okunmamış')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Bildirim Sayacı',
+                'verbose_name_plural': 'Bildirim Sayaçları',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-17 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_inbox_indexes'),
+        ('webpush', '0005_auto_20230614_1529'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='Gönderilme Zamanı')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='notifications.broadcast', verbose_name='Toplu Bildirim')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_deliveries', to='webpush.subscriptioninfo', verbose_name='Abonelik')),
+            ],
+            options={
+                'verbose_name': 'Toplu Bildirim Gönderimi',
+                'verbose_name_plural': 'Toplu Bildirim Gönderimleri',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='broadcastdelivery',
+            constraint=models.UniqueConstraint(fields=('broadcast', 'subscription'), name='unique_broadcast_delivery'),
+        ),
+    ]
@@ -20,6 +20,146 @@ class Notification(models.Model):
         verbose_name = 'Bildirim'
         verbose_name_plural = 'Bildirimler'
         ordering = ['-created_at']
+        indexes = [
+            # Inbox pages (keyset on created_at, id) and unread lookups of one recipient
+            models.Index(fields=['recipient', '-created_at', '-id'], name='notif_recipient_created_idx'),
+            models.Index(fields=['recipient', 'is_read'], name='notif_recipient_read_idx'),
+        ]
 
     def __str__(self):
         return f"{self.recipient.username} - {self.get_notification_type_display()}"
+
+
+class BroadcastQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Broadcasts in a user's inbox: every broadcast since they joined, plus the ones sent to them"""
+        return self.filter(
+            models.Q(recipient__isnull=True, created_at__gte=user.date_joined) | models.Q(recipient=user)
+        )
+
+
+class Broadcast(models.Model):
+    """
+    An announcement, stored once and shown in the inbox of every user (fan-out on read;
+    read state lives in BroadcastReceipt). Its push delivery is done by the background
+    worker, which tracks the progress here.
+    """
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = (
+        (PENDING, 'Bekliyor'),
+        (RUNNING, 'Gönderiliyor'),
+        (DONE, 'Tamamlandı'),
+        (FAILED, 'Başarısız'),
+    )
+    TARGET_CHOICES = (
+        ('all', 'Tüm Cihazlar'),
+        ('users', 'Kayıtlı Kullanıcılar'),
+        ('single', 'Tek Kullanıcı'),
+    )
+
+    title = models.CharField(max_length=255, verbose_name='Başlık')
+    message = models.TextField(verbose_name='Mesaj')
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES, default='users', verbose_name='Hedef')
+    recipient = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='direct_broadcasts',
+        verbose_name='Alıcı', help_text="Sadece target='single' için"
+    )
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name='Gönderen')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name='Durum')
+    total = models.PositiveIntegerField(default=0, verbose_name='Toplam Abonelik')
+    sent = models.PositiveIntegerField(default=0, verbose_name='Başarılı')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Başarısız')
+    pruned = models.PositiveIntegerField(default=0, verbose_name='Silinen Abonelik')
+    skipped = models.PositiveIntegerField(default=0, verbose_name='Atlanan Abonelik')
+    error = models.TextField(blank=True, verbose_name='Hata')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Zamanı')
+
+    objects = BroadcastQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Toplu Bildirim'
+        verbose_name_plural = 'Toplu Bildirimler'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='broadcast_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.get_status_display()})"
+
+
+class BroadcastReceipt(models.Model):
+    """A user has read a broadcast"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts', verbose_name='Kullanıcı')
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='receipts', verbose_name='Toplu Bildirim')
+    read_at = models.DateTimeField(auto_now_add=True, verbose_name='Okunma Tarihi')
+
+    class Meta:
+        verbose_name = 'Okundu Bilgisi'
+        verbose_name_plural = 'Okundu Bilgileri'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'broadcast'], name='unique_broadcast_receipt'),
+        ]
+
+
+class BroadcastDelivery(models.Model):
+    """
+    A broadcast was pushed to a subscription. Lets a re-run of the broadcast job
+    (retry, or a stale worker's job released again) skip the devices it already reached.
+    """
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='deliveries', verbose_name='Toplu Bildirim')
+    subscription = models.ForeignKey(
+        'webpush.SubscriptionInfo', on_delete=models.CASCADE, related_name='broadcast_deliveries', verbose_name='Abonelik'
+    )
+    sent_at = models.DateTimeField(auto_now_add=True, verbose_name='Gönderilme Zamanı')
+
+    class Meta:
+        verbose_name = 'Toplu Bildirim Gönderimi'
+        verbose_name_plural = 'Toplu Bildirim Gönderimleri'
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'subscription'], name='unique_broadcast_delivery'),
+        ]
+
+
+class SubscriptionHealth(models.Model):
+    """
+    Delivery failures of a push subscription (webpush.SubscriptionInfo).
+    Subscriptions that keep failing are skipped by notifications/push.py; a successful
+    push resets the counter.
+    """
+    subscription = models.OneToOneField(
+        'webpush.SubscriptionInfo', on_delete=models.CASCADE, primary_key=True,
+        related_name='health', verbose_name='Abonelik'
+    )
+    failures = models.PositiveIntegerField(default=0, verbose_name='Art Arda Hata')
+    last_status = models.PositiveIntegerField(blank=True, null=True, verbose_name='Son Durum Kodu')
+    last_error = models.TextField(blank=True, verbose_name='Son Hata')
+    last_failure_at = models.DateTimeField(blank=True, null=True, verbose_name='Son Hata Zamanı')
+
+    class Meta:
+        verbose_name = 'Abonelik Durumu'
+        verbose_name_plural = 'Abonelik Durumları'
+
+    def __str__(self):
+        return f"{self.subscription_id} ({self.failures} hata)"
+
+
+class NotificationCounter(models.Model):
+    """
+    Unread inbox items (personal notifications + broadcasts) of a user, maintained
+    incrementally by notifications/counters.py so unread_count is a primary-key lookup.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter', verbose_name='Kullanıcı')
+    unread = models.PositiveIntegerField(default=0, verbose_name='Okunmamış')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')
+
+    class Meta:
+        verbose_name = 'Bildirim Sayacı'
+        verbose_name_plural = 'Bildirim Sayaçları'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
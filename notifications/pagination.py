@@ -0,0 +1,19 @@
+from core.pagination import KeysetPagination
+
+
+class InboxPagination(KeysetPagination):
+    """
+    Keyset pagination over the inbox UNION (notifications/inbox.py).
+    A compound query cannot be filtered, so the seek condition goes into every part;
+    each part is then a range scan on its (recipient, -created_at) index.
+    """
+    page_size = 20
+    max_page_size = 100
+    # `kind` only breaks ties between a notification and a broadcast with the same time and id
+    ordering = ('-item_created_at', '-item_id', '-kind')
+
+    def seek(self, parts, cursor):
+        if cursor is not None:
+            parts = [part.filter(self.after(cursor)) for part in parts]
+        first, *rest = parts
+        return first.union(*rest, all=True).order_by(*self.ordering)
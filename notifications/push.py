@@ -0,0 +1,305 @@
+"""
+Web push delivery. Runs in the background worker (see jobs/queue.py), never in a request.
+"""
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PUSH_TTL = 60
+PUSH_TIMEOUT = 10        # seconds per request to the push service
+PROGRESS_EVERY = 100     # broadcast counters are saved every N results
+
+# How a failed push is handled, by the push service's status code:
+GONE = 'gone'            # subscription expired or unsubscribed -> delete it
+OUR_FAULT = 'our_fault'  # bad VAPID key / payload too large -> not the subscription's fault
+TRANSIENT = 'transient'  # rate limit, 5xx, network errors, refused subscriptions -> count towards the failure limit
+
+GONE_STATUS_CODES = (404, 410)
+OUR_FAULT_STATUS_CODES = (401, 413)
+# 403 is also sent for subscriptions made with another key (or revoked): it is only our
+# fault when the push service says our VAPID signature/JWT is wrong
+VAPID_ERROR_MARKERS = ('vapid', 'jwt', 'crypto-key', 'authorization header', 'invalid credentials')
+
+
+def build_payload(title, message, url=None):
+    return json.dumps({
+        "title": title or "Bildirim",
+        "body": message,
+        "icon": "/logo1.png",
+        "url": url or "/"
+    })
+
+
+def status_code_of(exception):
+    response = getattr(exception, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def response_text_of(exception):
+    response = getattr(exception, 'response', None)
+    try:
+        return response.text if response is not None else ''
+    except Exception:
+        return ''
+
+
+def classify(status_code, text=''):
+    if status_code in GONE_STATUS_CODES:
+        return GONE
+    if status_code in OUR_FAULT_STATUS_CODES:
+        return OUR_FAULT
+    if status_code == 403 and any(marker in (text or '').lower() for marker in VAPID_ERROR_MARKERS):
+        return OUR_FAULT
+    return TRANSIENT
+
+
+def max_failures():
+    return getattr(settings, 'PUSH_MAX_FAILURES', 5)
+
+
+def retry_skipped_after():
+    """Skipped subscriptions get one more chance after this long (seconds)"""
+    return getattr(settings, 'PUSH_RETRY_SKIPPED_AFTER', 24 * 60 * 60)
+
+
+class Sender:
+    """
+    Sends pushes concurrently on a bounded thread pool.
+    Each push service origin (fcm.googleapis.com, web.push.apple.com, ...) gets its own
+    requests.Session, so TLS connections are kept alive and reused across messages.
+    """
+    def __init__(self, concurrency=None):
+        from py_vapid import Vapid
+
+        self.concurrency = concurrency or getattr(settings, 'PUSH_CONCURRENCY', 16)
+        self.vapid = Vapid.from_string(private_key=settings.WEBPUSH_SETTINGS['VAPID_PRIVATE_KEY'])
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session_for(self, endpoint):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        parts = urlsplit(endpoint)
+        origin = f'{parts.scheme}://{parts.netloc}'
+        with self.lock:
+            session = self.sessions.get(origin)
+            if session is None:
+                session = requests.Session()
+                session.mount(origin, HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency))
+                self.sessions[origin] = session
+        return session
+
+    def send(self, subscription, payload):
+        """Send one push message. Raises pywebpush.WebPushException on failure."""
+        from pywebpush import webpush
+
+        webpush(
+            subscription_info={
+                "endpoint": subscription.endpoint,
+                "keys": {
+                    "auth": subscription.auth,
+                    "p256dh": subscription.p256dh
+                }
+            },
+            data=payload,
+            vapid_private_key=self.vapid,
+            vapid_claims={"sub": settings.WEBPUSH_SETTINGS['VAPID_ADMIN_EMAIL']},
+            ttl=PUSH_TTL,
+            timeout=PUSH_TIMEOUT,
+            requests_session=self.session_for(subscription.endpoint)
+        )
+
+    def send_many(self, subscriptions, payload, progress=None):
+        """
+        Send the same payload to many subscriptions. Returns
+        {'sent': [ids], 'gone': [ids], 'failed': {id: (kind, status_code, error)}}.
+        `progress(result)` is called every PROGRESS_EVERY results.
+        """
+        result = {'sent': [], 'gone': [], 'failed': {}}
+        if not subscriptions:
+            return result
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(subscriptions))) as executor:
+            futures = {executor.submit(self.send, sub, payload): sub for sub in subscriptions}
+            for done, future in enumerate(as_completed(futures), start=1):
+                subscription = futures[future]
+                try:
+                    future.result()
+                    result['sent'].append(subscription.pk)
+                except Exception as e:
+                    # WebPushException carries the response; connection errors and timeouts don't
+                    status_code = status_code_of(e)
+                    kind = classify(status_code, response_text_of(e))
+                    if kind == GONE:
+                        result['gone'].append(subscription.pk)
+                    else:
+                        result['failed'][subscription.pk] = (kind, status_code, str(e)[:500])
+                        logger.warning("Push failed (%s) for %s...: %s", status_code, subscription.endpoint[:40], e)
+
+                if progress and done % PROGRESS_EVERY == 0:
+                    progress(result)
+
+        return result
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
+
+
+def chunked(ids, size=500):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def prune(subscription_ids):
+    """Delete subscriptions the push service reported as gone (their PushInformation cascades)."""
+    from webpush.models import SubscriptionInfo
+
+    for ids in chunked(subscription_ids):
+        SubscriptionInfo.objects.filter(pk__in=ids).delete()
+    return len(subscription_ids)
+
+
+def record(result):
+    """
+    Store the outcome of a send: delete gone subscriptions, count transient failures
+    and reset the counter of subscriptions that work again.
+    """
+    from django.db.models import F
+    from .models import SubscriptionHealth
+
+    pruned = prune(result['gone'])
+
+    # One UPDATE per distinct status code
+    failures = {}
+    for pk, (kind, status, error) in result['failed'].items():
+        if kind == TRANSIENT:
+            failures.setdefault(status, (error, []))[1].append(pk)
+
+    now = timezone.now()
+    for status, (error, pks) in failures.items():
+        SubscriptionHealth.objects.bulk_create(
+            [SubscriptionHealth(subscription_id=pk) for pk in pks], ignore_conflicts=True
+        )
+        for ids in chunked(pks):
+            SubscriptionHealth.objects.filter(subscription_id__in=ids).update(
+                failures=F('failures') + 1, last_status=status, last_error=error, last_failure_at=now
+            )
+
+    for ids in chunked(result['sent']):
+        SubscriptionHealth.objects.filter(subscription_id__in=ids, failures__gt=0).update(failures=0)
+
+    return pruned
+
+
+def healthy(queryset):
+    """
+    Leave out subscriptions that failed `PUSH_MAX_FAILURES` times in a row,
+    unless their last failure is older than `PUSH_RETRY_SKIPPED_AFTER`.
+    """
+    from datetime import timedelta
+
+    cutoff = timezone.now() - timedelta(seconds=retry_skipped_after())
+    return queryset.exclude(health__failures__gte=max_failures(), health__last_failure_at__gt=cutoff)
+
+
+def user_subscriptions(user_ids):
+    from webpush.models import SubscriptionInfo
+
+    return SubscriptionInfo.objects.filter(webpush_info__user_id__in=user_ids).distinct()
+
+
+def broadcast_subscriptions(broadcast):
+    """Subscriptions a broadcast goes to: 'all' devices, registered 'users' or a 'single' user"""
+    from webpush.models import SubscriptionInfo
+
+    if broadcast.target == 'all':
+        return SubscriptionInfo.objects.all()
+    if broadcast.target == 'single':
+        return user_subscriptions([broadcast.recipient_id])
+    return SubscriptionInfo.objects.filter(webpush_info__user__isnull=False).distinct()
+
+
+# --- Jobs ---
+
+def send_notification(notification_id):
+    """Push a stored Notification to every working device of its recipient."""
+    from .models import Notification
+
+    notification = Notification.objects.filter(pk=notification_id).first()
+    if notification is None:
+        return
+
+    subscriptions = list(healthy(user_subscriptions([notification.recipient_id])))
+    if not subscriptions:
+        return
+
+    sender = Sender()
+    try:
+        payload = build_payload(notification.title, notification.message, notification.related_link)
+        result = sender.send_many(subscriptions, payload)
+    finally:
+        sender.close()
+    record(result)
+    logger.info("Auto-push %s/%s sent to user %s", len(result['sent']), len(subscriptions), notification.recipient_id)
+
+
+def run_broadcast(broadcast_id):
+    """
+    Push a Broadcast to its devices, saving sent/failed/pruned counts as it goes.
+    Every successful push is recorded (BroadcastDelivery) with the progress, so a re-run
+    only sends to the devices that were not reached yet.
+    """
+    from django.db import transaction
+    from .models import Broadcast, BroadcastDelivery
+
+    broadcast = Broadcast.objects.get(pk=broadcast_id)
+    targets = broadcast_subscriptions(broadcast)
+    delivered = BroadcastDelivery.objects.filter(broadcast=broadcast).values('subscription_id')
+    already_sent = delivered.count()
+    subscriptions = list(healthy(targets).exclude(pk__in=delivered).order_by('pk'))
+    total = already_sent + len(subscriptions)
+    Broadcast.objects.filter(pk=broadcast.pk).update(
+        status=Broadcast.RUNNING, total=total, skipped=targets.count() - total, sent=already_sent, error=''
+    )
+
+    recorded = 0
+
+    def save_progress(result, **extra):
+        nonlocal recorded
+        sent = result['sent'][recorded:]
+        with transaction.atomic():
+            BroadcastDelivery.objects.bulk_create(
+                [BroadcastDelivery(broadcast=broadcast, subscription_id=pk) for pk in sent], ignore_conflicts=True
+            )
+            Broadcast.objects.filter(pk=broadcast.pk).update(
+                sent=already_sent + len(result['sent']), failed=len(result['failed']), pruned=len(result['gone']), **extra
+            )
+        recorded += len(sent)
+
+    try:
+        sender = Sender()
+        try:
+            result = sender.send_many(subscriptions, build_payload(broadcast.title, broadcast.message), save_progress)
+        finally:
+            sender.close()
+    except Exception as e:
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            status=Broadcast.FAILED, error=str(e), finished_at=timezone.now()
+        )
+        raise
+
+    save_progress(result)
+    record(result)
+    Broadcast.objects.filter(pk=broadcast.pk).update(status=Broadcast.DONE, finished_at=timezone.now())
+    logger.info(
+        "Broadcast %s: %s/%s sent, %s pruned", broadcast.pk, len(result['sent']), len(subscriptions), len(result['gone'])
+    )
@@ -0,0 +1,199 @@
+"""
+Notification retention (settings.NOTIFICATION_RETENTION, settings.BROADCAST_RETENTION).
+
+Expired rows are removed in small batches, each in its own short transaction, so SQLite's
+write lock is never held for long; each batch moves the unread counters with one aggregated
+delta per user instead of a signal per row. Rows can be archived to gzip-compressed JSONL
+files first (broadcasts together with their read receipts).
+"""
+import gzip
+import json
+import os
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import counters
+from .models import Broadcast, BroadcastReceipt, Notification
+
+ARCHIVE_FIELDS = ('id', 'recipient_id', 'title', 'message', 'notification_type', 'is_read', 'related_link', 'created_at')
+BROADCAST_ARCHIVE_FIELDS = (
+    'id', 'title', 'message', 'target', 'recipient_id', 'created_by_id', 'status',
+    'total', 'sent', 'failed', 'pruned', 'skipped', 'created_at', 'finished_at',
+)
+RECEIPT_ARCHIVE_FIELDS = ('broadcast_id', 'user_id', 'read_at')
+
+
+def policy():
+    """{notification_type: {'read': days, 'unread': days}} for every type"""
+    configured = getattr(settings, 'NOTIFICATION_RETENTION', {})
+    return {
+        notification_type: {**{'read': None, 'unread': None}, **configured.get(notification_type, {})}
+        for notification_type, _ in Notification.TYPE_CHOICES
+    }
+
+
+def expired_condition(now=None):
+    """Q matching the rows past their retention; None if nothing ever expires"""
+    now = now or timezone.now()
+    condition = Q()
+    for notification_type, days in policy().items():
+        for state, is_read in (('read', True), ('unread', False)):
+            if days[state] is not None:
+                condition |= Q(
+                    notification_type=notification_type,
+                    is_read=is_read,
+                    created_at__lt=now - timedelta(days=days[state])
+                )
+    return condition or None
+
+
+def expired(now=None):
+    condition = expired_condition(now)
+    if condition is None:
+        return Notification.objects.none()
+    return Notification.objects.filter(condition)
+
+
+def broadcast_days():
+    """Days broadcasts are kept (None = forever)"""
+    return getattr(settings, 'BROADCAST_RETENTION', None)
+
+
+def expired_broadcasts(now=None):
+    """Broadcasts past BROADCAST_RETENTION, except the ones still being sent"""
+    days = broadcast_days()
+    if days is None:
+        return Broadcast.objects.none()
+    now = now or timezone.now()
+    return Broadcast.objects.filter(created_at__lt=now - timedelta(days=days)).exclude(status=Broadcast.RUNNING)
+
+
+def free_bytes():
+    """Free space inside the SQLite file (pages released by deletes); None on other databases"""
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA freelist_count')
+        free_pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return free_pages * cursor.fetchone()[0]
+
+
+def open_archive(path):
+    return gzip.open(path, 'at', encoding='utf-8') if path else None
+
+
+def archive_size(path):
+    return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+
+def write_rows(archive, rows):
+    for row in rows:
+        archive.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+    archive.flush()
+
+
+def prune(batch_size=500, archive_path=None, pause=0.0, dry_run=False):
+    """
+    Delete (and optionally archive) expired notifications, `batch_size` rows per transaction.
+    Returns {'rows': n, 'by_type': Counter, 'archive_bytes': n, 'freed_bytes': n or None}.
+    """
+    now = timezone.now()
+    queryset = expired(now)
+    stats = {'rows': 0, 'by_type': Counter(), 'archive_bytes': 0, 'freed_bytes': None}
+
+    if dry_run:
+        stats['by_type'].update(dict(queryset.values_list('notification_type').annotate(n=Count('pk')).order_by()))
+        stats['rows'] = sum(stats['by_type'].values())
+        return stats
+
+    free_before = free_bytes()
+    archive_before = archive_size(archive_path)
+    archive = open_archive(archive_path)
+    last_pk = 0
+    try:
+        while True:
+            # Walk by primary key so every batch is a short range read
+            rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1]['id']
+
+            if archive:
+                write_rows(archive, rows)
+
+            unread = Counter(row['recipient_id'] for row in rows if not row['is_read'])
+            with transaction.atomic(), counters.batched():
+                Notification.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+                counters.add_many({user_id: -count for user_id, count in unread.items()})
+
+            stats['rows'] += len(rows)
+            stats['by_type'].update(row['notification_type'] for row in rows)
+            if pause:
+                time.sleep(pause)
+    finally:
+        if archive:
+            archive.close()
+
+    if archive_path:
+        stats['archive_bytes'] = archive_size(archive_path) - archive_before
+    if free_before is not None:
+        stats['freed_bytes'] = free_bytes() - free_before
+    return stats
+
+
+def prune_broadcasts(batch_size=500, archive_path=None, receipts_archive_path=None, pause=0.0, dry_run=False):
+    """
+    Delete (and optionally archive) expired broadcasts and their read receipts,
+    `batch_size` broadcasts per transaction.
+    Returns {'rows': n, 'receipts': n, 'archive_bytes': n}.
+    """
+    queryset = expired_broadcasts()
+    stats = {'rows': 0, 'receipts': 0, 'archive_bytes': 0}
+
+    if dry_run:
+        stats['rows'] = queryset.count()
+        stats['receipts'] = BroadcastReceipt.objects.filter(broadcast__in=queryset).count()
+        return stats
+
+    archive_before = archive_size(archive_path) + archive_size(receipts_archive_path)
+    archive, receipts_archive = open_archive(archive_path), open_archive(receipts_archive_path)
+    last_pk = 0
+    try:
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').values(*BROADCAST_ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1]['id']
+            ids = [row['id'] for row in rows]
+            receipts = BroadcastReceipt.objects.filter(broadcast_id__in=ids)
+
+            if archive:
+                write_rows(archive, rows)
+            if receipts_archive:
+                write_rows(receipts_archive, receipts.order_by('pk').values(*RECEIPT_ARCHIVE_FIELDS).iterator())
+
+            with transaction.atomic(), counters.batched():
+                deltas = counters.broadcast_deltas(rows)
+                stats['receipts'] += receipts.count()
+                # Receipts and delivery records cascade
+                Broadcast.objects.filter(pk__in=ids).delete()
+                counters.add_many(deltas)
+
+            stats['rows'] += len(rows)
+            if pause:
+                time.sleep(pause)
+    finally:
+        for file in (archive, receipts_archive):
+            if file:
+                file.close()
+
+    stats['archive_bytes'] = archive_size(archive_path) + archive_size(receipts_archive_path) - archive_before
+    return stats
@@ -1,7 +1,35 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Broadcast, Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'title', 'message', 'notification_type', 'is_read', 'related_link', 'created_at']
+
+
+class InboxItemSerializer(serializers.Serializer):
+    """
+    A row of notifications/inbox.py: a personal notification or a broadcast ('b<id>').
+    Same fields as NotificationSerializer, plus `kind`.
+    """
+    id = serializers.SerializerMethodField()
+    kind = serializers.CharField()
+    title = serializers.CharField(source='item_title')
+    message = serializers.CharField(source='item_message')
+    notification_type = serializers.CharField(source='item_type')
+    is_read = serializers.BooleanField(source='item_is_read')
+    related_link = serializers.CharField(source='item_link', allow_null=True)
+    created_at = serializers.DateTimeField(source='item_created_at')
+
+    def get_id(self, item):
+        from .inbox import BROADCAST_PREFIX
+
+        if item['kind'] == 'broadcast':
+            return f"{BROADCAST_PREFIX}{item['item_id']}"
+        return item['item_id']
+
+
+class BroadcastStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Broadcast
+        fields = ['id', 'title', 'target', 'status', 'total', 'sent', 'failed', 'pruned', 'skipped', 'error', 'created_at', 'finished_at']
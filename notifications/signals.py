@@ -1,52 +1,76 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Notification
-from webpush import send_user_notification
-import os
+from .models import Broadcast, Notification, NotificationCounter
+from . import counters
+
+
 @receiver(post_save, sender=Notification)
 def send_push_notification(sender, instance, created, **kwargs):
+    """Push is delivered by the background worker once the notification is committed."""
+    if created:
+        from jobs import queue
+        from . import push
+
+        queue.enqueue(push.send_notification, notification_id=instance.pk)
+
+
+@receiver(post_save, sender=Notification)
+def publish_to_stream(sender, instance, created, **kwargs):
+    """Wake up the recipient's open SSE streams (notifications/stream.py) once committed."""
+    if created:
+        from django.db import transaction
+        from . import stream
+
+        transaction.on_commit(lambda: stream.notification_created(instance.pk, instance.recipient_id))
+
+
+@receiver(post_save, sender=Broadcast)
+def publish_broadcast_to_stream(sender, instance, created, **kwargs):
+    """Wake up the open SSE streams the broadcast is for, once committed."""
+    if created:
+        from django.db import transaction
+        from . import stream
+
+        transaction.on_commit(lambda: stream.broadcast_created(instance.pk, instance.recipient_id))
+
+
+# --- Unread counters (queryset updates are counted in notifications/inbox.py) ---
+
+@receiver(post_save, sender=User)
+def create_notification_counter(sender, instance, created, **kwargs):
+    if created:
+        NotificationCounter.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Notification)
+def remember_read_state(sender, instance, **kwargs):
+    instance._was_read = None
+    if instance.pk:
+        instance._was_read = Notification.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+
+
+@receiver(post_save, sender=Notification)
+def count_notification(sender, instance, created, **kwargs):
+    was_unread = not created and instance._was_read is False
+    counters.add(instance.recipient_id, int(not instance.is_read) - int(was_unread))
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_notification(sender, instance, **kwargs):
+    if not instance.is_read and not counters.in_batch():
+        counters.add(instance.recipient_id, -1)
+
+
+@receiver(post_save, sender=Broadcast)
+def count_broadcast(sender, instance, created, **kwargs):
+    # Same transaction as the insert: readers see the broadcast and the count together
     if created:
-        try:
-            from webpush.models import PushInformation
-            from pywebpush import webpush
-            import json
-            import sys
-
-            # 1. User's subscriptions
-            push_infos = PushInformation.objects.filter(user=instance.recipient).select_related('subscription')
-            
-            if not push_infos.exists():
-                return
-
-            # 2. Payload
-            payload = json.dumps({
-                "title": instance.title if instance.title else "Bildirim",
-                "body": instance.message,
-                "icon": "/logo1.png",
-                "url": instance.related_link if instance.related_link else "/"
-            })
-
-            # 3. Send to each subscription (Hardcoded Keys) TODO get keys from environment
-            for pi in push_infos:
-                sub = pi.subscription
-                try:
-                    webpush(
-                        subscription_info={
-                            "endpoint": sub.endpoint,
-                            "keys": {
-                                "auth": sub.auth,
-                                "p256dh": sub.p256dh
-                            }
-                        },
-                        data=payload,
-                        vapid_private_key=os.getenv("VAPID_PRIVATE_KEY"),
-                        vapid_claims={"sub": "mailto:akdenizcselig@gmail.com"},
-                        ttl=60
-                    )
-                    print(f"=======Auto-Push Sent to {instance.recipient.username}", file=sys.stdout, flush=True)
-                except Exception as inner_e:
-                    print(f"=======Auto-Push Error: {inner_e}", file=sys.stdout, flush=True)
-                    pass
-
-        except Exception as e:
-            print(f"=======Signal Error: {e}", file=sys.stdout, flush=True)
+        counters.broadcast_created(instance)
+
+
+@receiver(post_delete, sender=Broadcast)
+def recount_after_broadcast_delete(sender, instance, **kwargs):
+    if not counters.in_batch():
+        from jobs import queue
+        queue.enqueue(counters.reconcile, unique=True)
@@ -0,0 +1,267 @@
+"""
+Real-time inbox events for the SSE endpoint (GET /api/notifications/stream/).
+
+Each connected client is an asyncio.Queue on the ASGI event loop; no thread is held per
+connection. `publish` is called from sync code (after a notification or broadcast is
+committed) and wakes the stream with call_soon_threadsafe; the stream then reads the new
+inbox rows by id. Heartbeats only send a keep-alive comment. Rows created in other processes
+(other server processes, the background worker) are found by one watcher task per process,
+which wakes the streams they concern. The same read serves Last-Event-ID reconnects.
+
+Event ids are '<last notification id>:<last broadcast id>', the stream's position in both tables.
+"""
+import asyncio
+import heapq
+import json
+import threading
+from collections import defaultdict
+
+HEARTBEAT = 15        # seconds between keep-alive comments
+WATCH_INTERVAL = 15   # seconds between the watcher's checks for rows from other processes
+RETRY = 5000          # ms the browser waits before reconnecting
+QUEUE_SIZE = 100      # pending wake-ups per connection; extra ones are redundant and dropped
+REPLAY_LIMIT = 50
+
+
+class Hub:
+    def __init__(self):
+        self.listeners = defaultdict(set)
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        listener = (loop, asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self.lock:
+            self.listeners[user_id].add(listener)
+            if self.watcher is None:
+                self.watcher = loop.create_task(self.watch())
+        return listener
+
+    def unsubscribe(self, user_id, listener):
+        with self.lock:
+            self.listeners[user_id].discard(listener)
+            if not self.listeners[user_id]:
+                del self.listeners[user_id]
+            if not self.listeners and self.watcher is not None:
+                self.watcher.get_loop().call_soon_threadsafe(self.watcher.cancel)
+                self.watcher = None
+
+    def publish(self, user_id, event):
+        """Thread-safe: hand `event` to every open stream of the user in this process"""
+        with self.lock:
+            listeners = list(self.listeners.get(user_id, ()))
+        self._wake(listeners, event)
+
+    def publish_all(self, event):
+        """Thread-safe: hand `event` to every open stream in this process"""
+        with self.lock:
+            listeners = [listener for user_listeners in self.listeners.values() for listener in user_listeners]
+        self._wake(listeners, event)
+
+    @staticmethod
+    def _wake(listeners, event):
+        for loop, queue in listeners:
+            loop.call_soon_threadsafe(_put, queue, event)
+
+    async def watch(self):
+        """
+        While streams are open: every WATCH_INTERVAL, one query round for the whole process
+        wakes the streams of users who got rows from another process.
+        """
+        from asgiref.sync import sync_to_async
+
+        query = sync_to_async(_on_pool_thread, thread_sensitive=False)
+        position = await query(latest_ids)
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            with self.lock:
+                user_ids = list(self.listeners)
+            position, woken, everyone = await query(changes_since, position, user_ids)
+            if everyone:
+                self.publish_all(None)
+            for user_id in woken:
+                self.publish(user_id, None)
+
+
+def _put(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        pass  # the stream already has wake-ups queued; it reads everything new at once
+
+
+hub = Hub()
+
+
+def notification_created(notification_id, user_id):
+    """Called on commit of a new Notification: wake up the user's open streams."""
+    hub.publish(user_id, notification_id)
+
+
+def broadcast_created(broadcast_id, recipient_id=None):
+    """Called on commit of a new Broadcast: wake up its recipient's streams, or every stream."""
+    if recipient_id is None:
+        hub.publish_all(broadcast_id)
+    else:
+        hub.publish(recipient_id, broadcast_id)
+
+
+# --- Positions and events ---
+
+def parse_cursor(value):
+    """(notification id, broadcast id) of a Last-Event-ID; a bare '<id>' is a notification id. None if invalid."""
+    parts = str(value or '').split(':')
+    if len(parts) == 1:
+        parts.append('0')
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return int(parts[0]), int(parts[1])
+
+
+def format_cursor(cursor):
+    return f'{cursor[0]}:{cursor[1]}'
+
+
+def format_event(event):
+    data = json.dumps({'notification': event['notification'], 'unread_count': event['unread_count']})
+    return f"id: {format_cursor(event['cursor'])}\nevent: notification\ndata: {data}\n\n"
+
+
+# Sync helpers for the async view (run via sync_to_async)
+
+def latest_cursor(user):
+    """Position of a new stream: after the user's last notification and the last broadcast"""
+    from .models import Broadcast, Notification
+
+    last_notification = Notification.objects.filter(recipient=user).order_by('-id').values_list('id', flat=True).first()
+    last_broadcast = Broadcast.objects.order_by('-id').values_list('id', flat=True).first()
+    return last_notification or 0, last_broadcast or 0
+
+
+def events_after(user, cursor):
+    """Inbox items after `cursor` (at most REPLAY_LIMIT), oldest first, each with the position after it"""
+    from . import counters
+    from .inbox import broadcast_items, personal_items
+    from .serializers import InboxItemSerializer
+
+    last_notification, last_broadcast = cursor
+    personal = list(personal_items(user).filter(id__gt=last_notification).order_by('id')[:REPLAY_LIMIT])
+    broadcasts = list(broadcast_items(user).filter(id__gt=last_broadcast).order_by('id')[:REPLAY_LIMIT])
+    if not personal and not broadcasts:
+        return []
+
+    unread_count = counters.unread(user)
+    events = []
+    # A merge keeps each kind in id order, so a cut at REPLAY_LIMIT never skips an item
+    for item in heapq.merge(personal, broadcasts, key=lambda item: item['item_created_at']):
+        if item['kind'] == 'broadcast':
+            last_broadcast = item['item_id']
+        else:
+            last_notification = item['item_id']
+        events.append({
+            'cursor': (last_notification, last_broadcast),
+            'notification': InboxItemSerializer(item).data,
+            'unread_count': unread_count,
+        })
+        if len(events) == REPLAY_LIMIT:
+            break
+    return events
+
+
+def latest_ids():
+    """Last notification and broadcast ids of the whole site"""
+    from django.db.models import Max
+    from .models import Broadcast, Notification
+
+    return (
+        Notification.objects.aggregate(last=Max('id'))['last'] or 0,
+        Broadcast.objects.aggregate(last=Max('id'))['last'] or 0,
+    )
+
+
+def changes_since(position, user_ids):
+    """
+    Watcher query round: rows created after `position` by any process.
+    Returns (new position, ids of listening users with new items, whether a broadcast for everyone came in).
+    """
+    from .models import Broadcast, Notification
+
+    last_notification, last_broadcast = position
+    latest_notification, latest_broadcast = latest_ids()
+    listening = set(user_ids)
+
+    woken = set(
+        Notification.objects.filter(id__gt=last_notification, id__lte=latest_notification, recipient_id__in=listening)
+        .values_list('recipient_id', flat=True).distinct()
+    )
+    recipients = list(
+        Broadcast.objects.filter(id__gt=last_broadcast, id__lte=latest_broadcast).values_list('recipient_id', flat=True)
+    )
+    woken.update(listening.intersection(recipients))
+    return (latest_notification, latest_broadcast), woken, None in recipients
+
+
+def _on_pool_thread(func, *args):
+    """Run a watcher query (thread_sensitive=False) and close that thread's connection"""
+    from django.db import connection
+
+    try:
+        return func(*args)
+    finally:
+        connection.close()
+
+
+def authenticate(request):
+    """User from the JWT access token (?token=..., or the Authorization header); None if invalid"""
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from players.authentication import ClaimsJWTAuthentication
+
+    authentication = ClaimsJWTAuthentication()
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = authentication.get_header(request)
+        raw_token = header and authentication.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+async def event_stream(user, cursor):
+    """
+    The SSE body. Waits on the hub without holding a thread; every wake-up (new notification
+    or broadcast) reads what is newer than the last sent position, so nothing is skipped or
+    repeated. A heartbeat only sends a comment.
+    """
+    from asgiref.sync import sync_to_async
+
+    loop, wakeups = listener = hub.subscribe(user.pk)
+    try:
+        yield f"retry: {RETRY}\n\n"
+        if cursor is None:
+            cursor = await sync_to_async(latest_cursor)(user)
+
+        # First round replays what was missed before a reconnect (Last-Event-ID)
+        events = await sync_to_async(events_after)(user, cursor)
+        while True:
+            for event in events:
+                cursor = event['cursor']
+                yield format_event(event)
+
+            if len(events) < REPLAY_LIMIT:  # otherwise there may be more to read right away
+                try:
+                    await asyncio.wait_for(wakeups.get(), HEARTBEAT)
+                    while not wakeups.empty():
+                        wakeups.get_nowait()
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    events = []
+                    continue
+
+            events = await sync_to_async(events_after)(user, cursor)
+    finally:
+        hub.unsubscribe(user.pk, listener)
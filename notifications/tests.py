@@ -1,3 +1,543 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import counters, inbox, push, stream
+from .models import Broadcast, BroadcastDelivery, Notification
+from .pagination import InboxPagination
+
+
+class InboxIndexTests(TestCase):
+    """
+    The inbox queries must be index seeks on the (recipient, ...) composite indexes,
+    never a scan of the whole notifications table (checked with EXPLAIN QUERY PLAN).
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('okur', 'okur@example.com', 'x')
+        cls.other = User.objects.create_user('diger', 'diger@example.com', 'x')
+        notifications = [
+            Notification(recipient=user, message=f'Bildirim {i}', is_read=i % 3 == 0)
+            for i in range(30) for user in (cls.user, cls.other)
+        ]
+        Notification.objects.bulk_create(notifications)
+
+    def assertUsesIndex(self, queryset, index):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plans are checked on SQLite')
+        plan = queryset.explain()
+        self.assertRegex(plan, rf'SEARCH notifications_notification USING (COVERING )?INDEX {index}\b')
+        self.assertNotIn('SCAN notifications_notification', plan)
+        return plan
+
+    def test_first_page_uses_recipient_created_index(self):
+        personal, _ = inbox.parts(self.user)
+        plan = self.assertUsesIndex(
+            personal.order_by('-item_created_at', '-item_id')[:21], 'notif_recipient_created_idx'
+        )
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_next_page_uses_recipient_created_index(self):
+        pagination = InboxPagination()
+        cursor = [timezone.now().isoformat(), 10, 'notification']
+        self.assertUsesIndex(pagination.seek(inbox.parts(self.user), cursor), 'notif_recipient_created_idx')
+
+    def test_unread_lookup_uses_recipient_read_index(self):
+        unread = Notification.objects.filter(recipient=self.user, is_read=False).values('id').order_by()
+        self.assertUsesIndex(unread, 'notif_recipient_read_idx')
+
+
+class InboxPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('okur', 'okur@example.com', 'x')
+        Notification.objects.bulk_create(
+            Notification(recipient=cls.user, message=f'Bildirim {i}') for i in range(25)
+        )
+        # Same timestamp for several rows: the id must break the tie
+        same_time = timezone.now() - timedelta(days=1)
+        Notification.objects.filter(pk__in=Notification.objects.order_by('pk').values('pk')[:5]).update(created_at=same_time)
+        Broadcast.objects.create(title='Duyuru', message='Herkese')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_the_whole_inbox_without_gaps_or_repeats(self):
+        seen = []
+        url = '/api/notifications/?page_size=7'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 26)
+        self.assertEqual(len(set(seen)), 26)
+        self.assertIn('b1', seen)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/notifications/?cursor=bozuk')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        for values in (['notadate', 'abc', 'notification'], [None, {}, 'broadcast']):
+            cursor = InboxPagination().encode_cursor(values)
+            response = self.client.get(f'/api/notifications/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, values)
+
+
+class WorkerDied(BaseException):
+    """Stands for a worker killed in the middle of a broadcast"""
+
+
+class FakeSender(push.Sender):
+    """Records pushes instead of sending them; dies on the endpoints in `die_on`"""
+    sent = []
+    die_on = set()
+
+    def __init__(self, concurrency=None):
+        self.concurrency = 1
+        self.sessions = {}
+
+    def send(self, subscription, payload):
+        if subscription.endpoint in self.die_on:
+            raise WorkerDied
+        self.sent.append(subscription.endpoint)
+
+
+@mock.patch.object(push, 'PROGRESS_EVERY', 1)
+@mock.patch.object(push, 'Sender', FakeSender)
+class BroadcastFanOutTests(TestCase):
+    """A re-run broadcast job (retry or stale release) only pushes to the devices not reached yet."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from webpush.models import SubscriptionInfo
+
+        cls.endpoints = [f'https://push.example.com/{i}' for i in range(4)]
+        SubscriptionInfo.objects.bulk_create(
+            SubscriptionInfo(browser='firefox', endpoint=endpoint, auth='a', p256dh='p') for endpoint in cls.endpoints
+        )
+        cls.broadcast = Broadcast.objects.create(title='Duyuru', message='Herkese', target='all')
+
+    def setUp(self):
+        FakeSender.sent = []
+        FakeSender.die_on = set()
+
+    def test_rerun_after_a_crash_skips_delivered_devices(self):
+        FakeSender.die_on = {self.endpoints[3]}
+        with self.assertRaises(WorkerDied):
+            push.run_broadcast(self.broadcast.pk)
+        self.assertEqual(FakeSender.sent, self.endpoints[:3])
+        self.assertEqual(BroadcastDelivery.objects.filter(broadcast=self.broadcast).count(), 3)
+
+        FakeSender.die_on = set()
+        push.run_broadcast(self.broadcast.pk)
+        self.assertEqual(FakeSender.sent, self.endpoints)
+
+        self.broadcast.refresh_from_db()
+        self.assertEqual(
+            (self.broadcast.status, self.broadcast.total, self.broadcast.sent),
+            (Broadcast.DONE, 4, 4)
+        )
+
+    def test_finished_broadcast_sends_nothing_again(self):
+        push.run_broadcast(self.broadcast.pk)
+        push.run_broadcast(self.broadcast.pk)
+        self.assertEqual(FakeSender.sent, self.endpoints)
+        self.broadcast.refresh_from_db()
+        self.assertEqual((self.broadcast.sent, self.broadcast.skipped), (4, 0))
+
+
+class PushRefused(Exception):
+    def __init__(self, status_code, text=''):
+        super().__init__(f'{status_code} {text}')
+        self.response = mock.Mock(status_code=status_code, text=text)
+
+
+class RefusingSender(FakeSender):
+    """Fails the endpoints in `errors` with the given exception"""
+    errors = {}
+
+    def send(self, subscription, payload):
+        if subscription.endpoint in self.errors:
+            raise self.errors[subscription.endpoint]
+        self.sent.append(subscription.endpoint)
+
+
+class SubscriptionHealthTests(TestCase):
+    """Failures count against a subscription only when the subscription is at fault."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from webpush.models import SubscriptionInfo
+
+        cls.subscriptions = SubscriptionInfo.objects.bulk_create(
+            SubscriptionInfo(browser='chrome', endpoint=f'https://push.example.com/{i}', auth='a', p256dh='p') for i in range(3)
+        )
+
+    def send(self, errors):
+        from webpush.models import SubscriptionInfo
+
+        RefusingSender.sent = []
+        RefusingSender.errors = errors
+        sender = RefusingSender()
+        with mock.patch.object(push.logger, 'warning'):
+            result = sender.send_many(list(SubscriptionInfo.objects.order_by('pk')), '{}')
+        push.record(result)
+        return result
+
+    def failures(self):
+        from .models import SubscriptionHealth
+
+        return dict(SubscriptionHealth.objects.values_list('subscription_id', 'failures'))
+
+    def test_classify(self):
+        self.assertEqual(push.classify(410), push.GONE)
+        self.assertEqual(push.classify(401), push.OUR_FAULT)
+        self.assertEqual(push.classify(413), push.OUR_FAULT)
+        self.assertEqual(push.classify(403, 'invalid JWT provided'), push.OUR_FAULT)
+        self.assertEqual(push.classify(403, 'Invalid VAPID credentials'), push.OUR_FAULT)
+        self.assertEqual(push.classify(403, 'the key does not match the subscription'), push.TRANSIENT)
+        self.assertEqual(push.classify(403), push.TRANSIENT)
+        self.assertEqual(push.classify(429), push.TRANSIENT)
+        self.assertEqual(push.classify(None), push.TRANSIENT)
+
+    def test_refused_subscription_counts_against_it(self):
+        first, second, third = self.subscriptions
+        self.send({first.endpoint: PushRefused(403, 'Forbidden'), second.endpoint: PushRefused(403, 'BadJwtToken')})
+        self.assertEqual(self.failures(), {first.pk: 1})
+
+    def test_gone_subscription_is_deleted(self):
+        from webpush.models import SubscriptionInfo
+
+        first = self.subscriptions[0]
+        self.send({first.endpoint: PushRefused(410)})
+        self.assertFalse(SubscriptionInfo.objects.filter(pk=first.pk).exists())
+
+    def test_failing_subscription_is_skipped_until_retry(self):
+        from webpush.models import SubscriptionInfo
+        from .models import SubscriptionHealth
+
+        first = self.subscriptions[0]
+        for _ in range(push.max_failures()):
+            self.send({first.endpoint: PushRefused(500)})
+        self.assertEqual(self.failures(), {first.pk: push.max_failures()})
+        self.assertNotIn(first.pk, push.healthy(SubscriptionInfo.objects.all()).values_list('pk', flat=True))
+
+        SubscriptionHealth.objects.update(last_failure_at=timezone.now() - timedelta(seconds=push.retry_skipped_after() + 1))
+        self.assertIn(first.pk, push.healthy(SubscriptionInfo.objects.all()).values_list('pk', flat=True))
+
+        self.send({})
+        self.assertEqual(self.failures(), {first.pk: 0})
+
+
+class InboxUnionTests(TestCase):
+    """Personal notifications and broadcasts share one inbox; broadcasts are 'b<id>'."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = User.objects.create(username='okur', email='okur@example.com', date_joined=now - timedelta(days=10))
+        cls.other = User.objects.create(username='diger', email='diger@example.com', date_joined=now - timedelta(days=10))
+        cls.newcomer = User.objects.create(username='yeni', email='yeni@example.com', date_joined=now)
+
+        cls.notification = Notification.objects.create(recipient=cls.user, message='Kişisel')
+        cls.announcement = Broadcast.objects.create(title='Duyuru', message='Herkese')
+        cls.direct = Broadcast.objects.create(title='Özel', message='Sadece diğerine', target='single', recipient=cls.other)
+        # Same pk as the notification on purpose: the prefix keeps them apart
+        assert cls.notification.pk == cls.announcement.pk
+        Notification.objects.filter(pk=cls.notification.pk).update(created_at=now - timedelta(days=3))
+        Broadcast.objects.filter(pk=cls.announcement.pk).update(created_at=now - timedelta(days=2))
+        Broadcast.objects.filter(pk=cls.direct.pk).update(created_at=now - timedelta(days=1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def inbox_ids(self, user):
+        self.client.force_authenticate(user)
+        return [(item['id'], item['is_read']) for item in self.client.get('/api/notifications/').data['results']]
+
+    def test_broadcast_id(self):
+        self.assertEqual(inbox.broadcast_id('b12'), 12)
+        self.assertIsNone(inbox.broadcast_id('12'))
+        self.assertIsNone(inbox.broadcast_id('bx'))
+        self.assertIsNone(inbox.broadcast_id('b'))
+
+    def test_union_merges_both_kinds_newest_first(self):
+        b = f'b{self.announcement.pk}'
+        self.assertEqual(self.inbox_ids(self.user), [(b, False), (self.notification.pk, False)])
+        self.assertEqual(self.inbox_ids(self.other), [(f'b{self.direct.pk}', False), (b, False)])
+        # Global broadcasts sent before the user joined are not in their inbox
+        self.assertEqual(self.inbox_ids(self.newcomer), [])
+
+    def test_mark_read_broadcast_is_per_user(self):
+        b = f'b{self.announcement.pk}'
+        response = self.client.post(f'/api/notifications/{b}/mark_read/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.inbox_ids(self.user), [(b, True), (self.notification.pk, False)])
+        self.assertEqual(self.inbox_ids(self.other), [(f'b{self.direct.pk}', False), (b, False)])
+        self.assertEqual(inbox.unread_count(self.user), 1)
+
+    def test_mark_read_unknown_items(self):
+        for item_id in (f'b{self.direct.pk}', 'b999', 'bx', '999'):
+            response = self.client.post(f'/api/notifications/{item_id}/mark_read/')
+            self.assertEqual(response.status_code, 404, item_id)
+
+    def test_mark_all_read_covers_both_kinds(self):
+        self.assertEqual(inbox.unread_count(self.user), 2)
+        self.client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(inbox.unread_count(self.user), 0)
+        self.assertEqual(inbox.unread_count(self.other), 2)
+
+
+class UnreadCounterTests(TestCase):
+    """The maintained unread counter always agrees with the inbox tables, whatever the order of events."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.user = User.objects.create(username='okur', email='okur@example.com', date_joined=timezone.now() - timedelta(days=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def counter(self):
+        from .models import NotificationCounter
+
+        return NotificationCounter.objects.filter(user=self.user).values_list('unread', flat=True).first()
+
+    def broadcast(self, **kwargs):
+        with transaction.atomic():
+            broadcast = Broadcast.objects.create(title='Duyuru', message='Herkese', **kwargs)
+            # Counted together with the insert, not by a later job
+            self.assertEqual(self.counter(), 1)
+        return broadcast
+
+    def test_broadcast_then_mark_all_read(self):
+        self.broadcast()
+        self.client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(self.counter(), 0)
+        self.assertEqual(counters.unread(self.user), inbox.unread_count(self.user))
+
+    def test_counter_built_on_read_counts_the_broadcast_once(self):
+        from .models import NotificationCounter
+
+        NotificationCounter.objects.filter(user=self.user).delete()
+        with transaction.atomic():
+            Broadcast.objects.create(title='Duyuru', message='Herkese')
+        self.assertEqual(counters.unread(self.user), 1)
+        self.assertEqual(self.counter(), 1)
+
+    def test_direct_broadcast_only_counts_for_its_recipient(self):
+        other = User.objects.create(username='diger', email='diger@example.com', date_joined=timezone.now() - timedelta(days=1))
+        self.broadcast(target='single', recipient=self.user)
+        self.assertEqual(counters.unread(other), 0)
+
+    def test_reconcile_repairs_drift(self):
+        from .models import NotificationCounter
+
+        self.broadcast()
+        NotificationCounter.objects.filter(user=self.user).update(unread=7)
+        self.assertEqual(counters.reconcile(dry_run=True), [(self.user.pk, 7, 1)])
+        counters.reconcile()
+        self.assertEqual(self.counter(), 1)
+        self.assertEqual(counters.reconcile(), [])
+
+    def test_reconcile_does_not_overwrite_a_concurrent_change(self):
+        from .models import NotificationCounter
+
+        NotificationCounter.objects.filter(user=self.user).update(unread=7)
+        compute_all = counters.compute_all
+
+        def notified_meanwhile():
+            expected = compute_all()
+            Notification.objects.create(recipient=self.user, message='Araya giren')
+            return expected
+
+        with mock.patch.object(counters, 'compute_all', notified_meanwhile):
+            counters.reconcile()
+        # 7 + 1: the stale recount (0) was not written over the newer value
+        self.assertEqual(self.counter(), 8)
+        counters.reconcile()
+        self.assertEqual(self.counter(), 1)
+
+
+async def idle(hub):
+    """Stands in for the watcher task in tests (it would query from another thread)"""
+
+
+@mock.patch.object(stream.Hub, 'watch', idle)
+@mock.patch.object(stream, 'HEARTBEAT', 0.05)
+class StreamTests(TestCase):
+    """The SSE stream carries broadcasts as well as personal notifications, and heartbeats do not query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = User.objects.create(username='okur', email='okur@example.com', date_joined=now - timedelta(days=1))
+        cls.other = User.objects.create(username='diger', email='diger@example.com', date_joined=now - timedelta(days=1))
+
+    async def next_event(self, events):
+        return await asyncio.wait_for(anext(events), 5)
+
+    async def test_live_broadcast_reaches_the_stream(self):
+        events = stream.event_stream(self.user, None)
+        self.assertTrue((await self.next_event(events)).startswith('retry:'))
+        waiting = asyncio.ensure_future(self.next_event(events))
+        await asyncio.sleep(0.01)  # the stream has its position and waits on the hub
+
+        broadcast = await Broadcast.objects.acreate(title='Duyuru', message='Herkese')
+        stream.broadcast_created(broadcast.pk)
+        event = await waiting
+        while event == ': ping\n\n':
+            event = await self.next_event(events)
+        await events.aclose()
+
+        self.assertIn(f'id: 0:{broadcast.pk}\n', event)
+        data = json.loads(event.split('data: ', 1)[1])
+        self.assertEqual(data['notification']['id'], f'b{broadcast.pk}')
+        self.assertEqual(data['notification']['kind'], 'broadcast')
+
+    async def test_heartbeat_does_not_query(self):
+        events = stream.event_stream(self.user, (0, 0))
+        await self.next_event(events)
+        with mock.patch.object(stream, 'events_after', wraps=stream.events_after) as events_after:
+            for _ in range(3):
+                self.assertEqual(await self.next_event(events), ': ping\n\n')
+        await events.aclose()
+        self.assertEqual(events_after.call_count, 1)  # the first read only
+
+    def test_replay_merges_both_kinds_after_the_cursor(self):
+        seen = Notification.objects.create(recipient=self.user, message='Görülmüş')
+        notification = Notification.objects.create(recipient=self.user, message='Kişisel')
+        broadcast = Broadcast.objects.create(title='Duyuru', message='Herkese')
+        Broadcast.objects.create(title='Özel', message='Diğerine', target='single', recipient=self.other)
+
+        events = stream.events_after(self.user, stream.parse_cursor(str(seen.pk)))
+        self.assertEqual(
+            [(event['notification']['id'], event['cursor']) for event in events],
+            [(notification.pk, (notification.pk, 0)), (f'b{broadcast.pk}', (notification.pk, broadcast.pk))]
+        )
+        self.assertEqual(stream.events_after(self.user, events[-1]['cursor']), [])
+
+    def test_parse_cursor(self):
+        self.assertEqual(stream.parse_cursor('12:3'), (12, 3))
+        self.assertEqual(stream.parse_cursor('12'), (12, 0))
+        self.assertIsNone(stream.parse_cursor('12:x'))
+        self.assertIsNone(stream.parse_cursor('1:2:3'))
+
+    def test_watcher_finds_rows_from_other_processes(self):
+        position = stream.latest_ids()
+        Notification.objects.create(recipient=self.user, message='Worker')
+        Notification.objects.create(recipient=User.objects.create(username='kapali'), message='Bağlı değil')
+        position, woken, everyone = stream.changes_since(position, [self.user.pk, self.other.pk])
+        self.assertEqual((woken, everyone), ({self.user.pk}, False))
+
+        Broadcast.objects.create(title='Özel', message='Diğerine', target='single', recipient=self.other)
+        position, woken, everyone = stream.changes_since(position, [self.user.pk, self.other.pk])
+        self.assertEqual((woken, everyone), ({self.other.pk}, False))
+
+        Broadcast.objects.create(title='Duyuru', message='Herkese')
+        position, woken, everyone = stream.changes_since(position, [self.user.pk])
+        self.assertTrue(everyone)
+        self.assertEqual(stream.changes_since(position, [self.user.pk]), (position, set(), False))
+
+
+@override_settings(
+    NOTIFICATION_RETENTION={'SYSTEM': {'read': 30, 'unread': 90}},
+    BROADCAST_RETENTION=365,
+)
+class RetentionTests(TestCase):
+    """Expired notifications and broadcasts are archived, deleted in batches and uncounted with one delta per batch."""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        joined = timezone.now() - timedelta(days=500)
+        self.users = [
+            User.objects.create(username=f'okur{i}', email=f'okur{i}@example.com', date_joined=joined) for i in range(3)
+        ]
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def age(self, queryset, days):
+        queryset.update(created_at=timezone.now() - timedelta(days=days))
+
+    def assertCountersMatchTables(self):
+        for user in self.users:
+            self.assertEqual(counters.unread(user), inbox.unread_count(user), user.username)
+
+    def read_archive(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            return [json.loads(line) for line in archive]
+
+    def test_prune_notifications_with_one_delta_per_batch(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from . import retention
+
+        for user, unread in zip(self.users, (2, 2, 1)):
+            Notification.objects.bulk_create(Notification(recipient=user, message='Eski') for _ in range(unread))
+            Notification.objects.create(recipient=user, message='Yeni')
+        for user in self.users:
+            counters.rebuild_for_user(user.pk)
+        self.age(Notification.objects.filter(message='Eski'), 100)
+
+        path = os.path.join(self.archive_dir, 'notifications.jsonl.gz')
+        with CaptureQueriesContext(connection) as queries:
+            stats = retention.prune(archive_path=path)
+
+        self.assertEqual(stats['rows'], 5)
+        self.assertEqual(len(self.read_archive(path)), 5)
+        self.assertEqual(set(Notification.objects.values_list('message', flat=True)), {'Yeni'})
+        counter_updates = [q for q in queries if q['sql'].startswith('UPDATE "notifications_notificationcounter"')]
+        self.assertEqual(len(counter_updates), 2)  # deltas -2 and -1
+        self.assertCountersMatchTables()
+
+    def test_prune_broadcasts_archives_receipts(self):
+        from . import retention
+        from .models import BroadcastReceipt
+
+        old = Broadcast.objects.create(title='Eski', message='Herkese', status=Broadcast.DONE)
+        direct = Broadcast.objects.create(title='Özel', message='Tek', target='single', recipient=self.users[1])
+        running = Broadcast.objects.create(title='Gönderiliyor', message='Herkese', status=Broadcast.RUNNING)
+        recent = Broadcast.objects.create(title='Yeni', message='Herkese')
+        inbox.mark_read(self.users[0], f'b{old.pk}')
+        self.age(Broadcast.objects.exclude(pk=recent.pk), 400)
+
+        self.assertEqual(retention.prune_broadcasts(dry_run=True), {'rows': 2, 'receipts': 1, 'archive_bytes': 0})
+        broadcasts_path = os.path.join(self.archive_dir, 'broadcasts.jsonl.gz')
+        receipts_path = os.path.join(self.archive_dir, 'receipts.jsonl.gz')
+        stats = retention.prune_broadcasts(batch_size=1, archive_path=broadcasts_path, receipts_archive_path=receipts_path)
+
+        self.assertEqual((stats['rows'], stats['receipts']), (2, 1))
+        self.assertEqual([row['title'] for row in self.read_archive(broadcasts_path)], ['Eski', 'Özel'])
+        self.assertEqual(self.read_archive(receipts_path)[0]['user_id'], self.users[0].pk)
+        self.assertEqual(set(Broadcast.objects.values_list('pk', flat=True)), {running.pk, recent.pk})
+        self.assertFalse(BroadcastReceipt.objects.exists())
+        self.assertCountersMatchTables()
+
+    @override_settings(NOTIFICATION_RETENTION={'SYSTEM': {'read': 0}}, BROADCAST_RETENTION=None)
+    def test_command_shows_zero_days(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('prune_notifications', '--dry-run', stdout=out)
+        self.assertIn('SYSTEM: okunmuş 0 gün, okunmamış ∞ gün', out.getvalue())
+        self.assertIn('Toplu bildirimler: ∞ gün', out.getvalue())
@@ -1,8 +1,11 @@
-from rest_framework import viewsets, permissions, status
+from django.db import transaction
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Notification
-from .serializers import NotificationSerializer
+from .models import Broadcast, Notification
+from .serializers import BroadcastStatusSerializer, InboxItemSerializer, NotificationSerializer
+from .pagination import InboxPagination
+from . import counters, inbox
 from core.permissions import IsReadOnly
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -11,6 +14,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     Only read (list/retrieve) and custom actions are available.
     """
     serializer_class = NotificationSerializer
+    pagination_class = InboxPagination
 
     def get_permissions(self):
         """
@@ -18,7 +22,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """
         if self.action == 'register_subscription':
             permission_classes = [permissions.AllowAny]
-        elif self.action == 'broadcast':
+        elif self.action in ['broadcast', 'broadcast_status']:
             permission_classes = [permissions.IsAdminUser]
         elif self.action in ['mark_read', 'mark_all_read', 'unread_count', 'save_push_info']:
             permission_classes = [permissions.IsAuthenticated]
@@ -31,19 +35,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user).order_by('-created_at')
 
+    def list(self, request, *args, **kwargs):
+        """Inbox: personal notifications and broadcasts, merged in one query (notifications/inbox.py)"""
+        page = self.paginate_queryset(inbox.parts(request.user))
+        serializer = InboxItemSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
-        """Mark notification as read"""
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        """Mark notification (or broadcast, 'b<id>') as read"""
+        if not inbox.mark_read(request.user, pk):
+            return Response({'detail': 'Bildirim bulunamadı.'}, status=status.HTTP_404_NOT_FOUND)
         return Response({'status': 'marked as read'})
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get unread notification count"""
-        count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-        return Response({'count': count})
+        """Get unread notification count (personal + broadcasts, maintained counter)"""
+        return Response({'count': counters.unread(request.user)})
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def broadcast(self, request):
@@ -52,105 +60,64 @@ class NotificationViewSet(viewsets.ModelViewSet):
         Modes:
         - target='all': Send to all devices (Anonymous + Registered).
         - target='users': Send to registered users only (PushInformation).
-        In both cases, registered users' Inbox is updated.
+        - target='single': Send to one user ('username').
+        The broadcast is stored once and appears in the inbox of every targeted user.
+        Pushes are sent by the background worker; the response carries the job id,
+        progress is at GET broadcast/{job}/.
         """
-        from webpush.models import SubscriptionInfo, PushInformation
-        
+        from django.contrib.auth.models import User
+        from jobs import queue
+        from . import push
+
         message = request.data.get('message')
         title = request.data.get('title', 'Duyuru')
-        target = request.data.get('target', 'users') # 'all' or 'users'
-        
+        target = request.data.get('target', 'users') # 'all', 'users' or 'single'
+        username = request.data.get('username')
+
         if not message:
             return Response({"detail": "Mesaj içeriği gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
 
         # 1. Target Selection
-        subscriptions = []
-        target_users_for_db = []
-
-        if target == 'all':
-            # Send to all (Anonymous + Registered)
-            subscriptions = SubscriptionInfo.objects.all()
-            from django.contrib.auth.models import User
-            target_users_for_db = User.objects.all()
-        elif target == 'single':
-            # Send to single user
-            username = request.data.get('username')
+        recipient = None
+        if target == 'single':
             if not username:
                 return Response({"detail": "target='single' için 'username' gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            from django.contrib.auth.models import User
-            try:
-                user = User.objects.get(username=username)
-                subscriptions = [pi.subscription for pi in PushInformation.objects.filter(user=user).select_related('subscription')]
-                target_users_for_db = [user]
-            except User.DoesNotExist:
+            recipient = User.objects.filter(username=username).first()
+            if recipient is None:
                 return Response({"detail": f"Kullanıcı bulunamadı: {username}"}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            # Send to registered users only (Default)
-            subscriptions = [pi.subscription for pi in PushInformation.objects.select_related('subscription').all()]
-            from django.contrib.auth.models import User
-            target_users_for_db = User.objects.all()
-
-        import json
-        payload = json.dumps({
-            "title": title,
-            "body": message,
-            "icon": "/logo1.png",
-            "url": "/"
-        })
-
-        # 2. DB Record (Inbox)
-        notifications = [
-            Notification(
-                recipient=user,
+
+        # 2. DB Record: stored once, shown in every inbox it targets (notifications/inbox.py)
+        with transaction.atomic():
+            broadcast = Broadcast.objects.create(
                 title=title,
                 message=message,
-                notification_type='SYSTEM'
-            ) for user in target_users_for_db
-        ]
-        Notification.objects.bulk_create(notifications)
-
-        # 3. PUSH Notification
-        from pywebpush import webpush
-        import sys 
-
-        print(f"DEBUG: Starting Broadcast to {len(subscriptions)} subs...", file=sys.stdout, flush=True)
-        
-        success_count = 0
-        for sub in subscriptions:
-            try:
-                webpush(
-                    subscription_info={
-                        "endpoint": sub.endpoint,
-                        "keys": {
-                            "auth": sub.auth,
-                            "p256dh": sub.p256dh
-                        }
-                    },
-                    data=payload,
-                    vapid_private_key="vokzWx36wRxAC1BWWVKskRwR1QzhxRGkvEixejFa1zI",
-                    vapid_claims={"sub": "mailto:akdenizcselig@gmail.com"},
-                    ttl=60
-                )
-                success_count += 1
-            except Exception as e:
-                print(f"=======Push Error for {sub.endpoint[:20]}...", file=sys.stdout, flush=True)
-                print(f"=======Error: {str(e)}", file=sys.stdout, flush=True)
-                if hasattr(e, 'response') and e.response:
-                    try:
-                        print(f"   Response: {e.response.text}", file=sys.stdout, flush=True)
-                    except:
-                        pass
-                pass
+                target=target if target in ('all', 'single') else 'users',
+                recipient=recipient,
+                created_by=request.user
+            )
+            # 3. PUSH Notification (sent concurrently by the background worker; a retry
+            # skips the devices that already got it, see push.run_broadcast)
+            queue.enqueue(push.run_broadcast, broadcast_id=broadcast.pk)
 
         return Response({
-            "detail": f"Bildirim gönderildi. ({success_count}/{len(subscriptions)} Başarılı)"
-        }, status=status.HTTP_201_CREATED)
+            "detail": "Bildirim kuyruğa alındı, cihazlara arka planda gönderilecek.",
+            "job": broadcast.pk,
+            "status_url": request.build_absolute_uri(f'{broadcast.pk}/')
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'broadcast/(?P<job>\d+)', permission_classes=[permissions.IsAdminUser])
+    def broadcast_status(self, request, job=None):
+        """
+        Delivery progress of a broadcast.
+        GET /api/notifications/broadcast/{job}/ -> status, total, sent, failed, pruned
+        """
+        broadcast = generics.get_object_or_404(Broadcast, pk=job)
+        return Response(BroadcastStatusSerializer(broadcast).data)
 
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request, pk=None):
-        """Mark all notifications as read"""
-        Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+        """Mark all notifications and broadcasts as read"""
+        inbox.mark_all_read(request.user)
         return Response({'status': 'all marked as read'})
 
     @action(detail=False, methods=['post'])
@@ -205,3 +172,26 @@ class NotificationViewSet(viewsets.ModelViewSet):
             if "user_agent" in str(e):
                  return Response({"detail": "Model error: user_agent mismatch. Contact admin."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events: every new inbox item (notification or broadcast) together with the new unread count.
+    GET /api/notifications/stream/?token=<access token>  (EventSource cannot send headers)
+    Reconnects resume from the Last-Event-ID header. Serve under ASGI (config/asgi.py).
+    """
+    from asgiref.sync import sync_to_async
+    from django.http import JsonResponse, StreamingHttpResponse
+    from . import stream
+
+    user = await sync_to_async(stream.authenticate)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Geçerli bir token gereklidir.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    cursor = stream.parse_cursor(last_event_id) if last_event_id else None
+
+    response = StreamingHttpResponse(stream.event_stream(user, cursor), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # no proxy buffering (nginx)
+    return response
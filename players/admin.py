@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Player
+from .models import Player, PlayerCareerStats, LeaderboardSnapshot, OneTimeCode, StoredBlob
 
 
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
@@ -47,3 +47,31 @@ class PlayerAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(PlayerCareerStats)
+class PlayerCareerStatsAdmin(admin.ModelAdmin):
+    list_display = ['player', 'goals', 'assists', 'appearances', 'last_played']
+    search_fields = ['player__name']
+    readonly_fields = ['player', 'goals', 'assists', 'appearances', 'last_played', 'updated_at']
+
+
+@admin.register(LeaderboardSnapshot)
+class LeaderboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['board', 'version', 'is_stale', 'built_at']
+    readonly_fields = ['board', 'version', 'built_at']
+
+
+@admin.register(OneTimeCode)
+class OneTimeCodeAdmin(admin.ModelAdmin):
+    list_display = ['email', 'purpose', 'user', 'attempts', 'created_at', 'expires_at']
+    list_filter = ['purpose']
+    search_fields = ['email']
+    readonly_fields = ['purpose', 'email', 'user', 'code', 'attempts', 'created_at', 'expires_at']
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'name', 'size', 'created_at', 'stored_at']
+    search_fields = ['sha256', 'name']
+    readonly_fields = ['sha256', 'extension', 'size', 'name', 'created_at', 'stored_at']
@@ -0,0 +1,207 @@
+"""
+Async login, register and password reset.
+
+The password hashing runs in the process pool of core/hashing.py, so under ASGI
+(config/asgi.py) a login burst no longer ties up the threads every other request runs on;
+when the pool's queue is full they answer 503 with Retry-After. Database work is sync and
+runs through sync_to_async. Same request/response bodies as the DRF views they replace.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+from rest_framework.fields import Field
+
+from core import hashing
+
+INVALID_CREDENTIALS = 'No active account found with the given credentials'
+
+
+def request_data(request):
+    """JSON or form body as a dict; None if the JSON is malformed"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    data = request.POST.dict()
+    data.update(request.FILES.dict())
+    return data
+
+
+def throttle_wait(request, scope=None):
+    """
+    Apply the DRF throttles the old views had (the scoped one, or the defaults).
+    Returns None if the request may go on, else the seconds to wait (0 if unknown).
+    """
+    from types import SimpleNamespace
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+    from rest_framework.throttling import ScopedRateThrottle
+
+    drf_request = Request(request, authenticators=())
+    throttles = [ScopedRateThrottle()] if scope else [throttle() for throttle in api_settings.DEFAULT_THROTTLE_CLASSES]
+    view = SimpleNamespace(throttle_scope=scope)
+    waits = [throttle.wait() for throttle in throttles if not throttle.allow_request(drf_request, view)]
+    if not waits:
+        return None
+    return max(wait or 0 for wait in waits)
+
+
+def throttled(wait):
+    from rest_framework.exceptions import Throttled
+
+    response = JsonResponse({'detail': str(Throttled(wait).detail)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    if wait:
+        response['Retry-After'] = str(int(wait))
+    return response
+
+
+def overloaded(error):
+    response = JsonResponse(
+        {'detail': 'Sunucu şu anda çok yoğun. Lütfen birkaç saniye sonra tekrar deneyin.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def bad_json():
+    return JsonResponse({'detail': 'Geçersiz JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """
+    POST /api/auth/login/
+    Body: { "username": "<email>", "password": "..." }
+    """
+    from .backends import EmailBackend
+    from .serializers import EmailTokenObtainPairSerializer
+
+    data = request_data(request)
+    if data is None:
+        return bad_json()
+    wait = await sync_to_async(throttle_wait)(request)
+    if wait is not None:
+        return throttled(wait)
+
+    required = str(Field.default_error_messages['required'])
+    missing = {field: [required] for field in ('username', 'password') if not data.get(field)}
+    if missing:
+        return JsonResponse(missing, status=status.HTTP_400_BAD_REQUEST)
+
+    backend = EmailBackend()
+    user = await sync_to_async(backend.get_by_email)(data['username'])
+    try:
+        if user is None:
+            # Hash anyway so unknown addresses take as long as wrong passwords
+            await hashing.make_password(data['password'])
+            valid = False
+        else:
+            valid = await hashing.check_password(data['password'], user.password) and backend.user_can_authenticate(user)
+    except hashing.Overloaded as error:
+        return overloaded(error)
+
+    if not valid:
+        return JsonResponse({'non_field_errors': [INVALID_CREDENTIALS]}, status=status.HTTP_400_BAD_REQUEST)
+    return JsonResponse(await sync_to_async(EmailTokenObtainPairSerializer.token_response)(user))
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    """
+    POST /api/auth/register/
+    Body: { "name", "position", "email", "password", ... } (JSON or multipart with a photo)
+    """
+    from .serializers import PlayerRegisterSerializer
+
+    data = request_data(request)
+    if data is None:
+        return bad_json()
+    wait = await sync_to_async(throttle_wait)(request, 'register')
+    if wait is not None:
+        return throttled(wait)
+
+    serializer = PlayerRegisterSerializer(data=data, context={'request': request})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        password_hash = await hashing.make_password(serializer.validated_data['password'])
+    except hashing.Overloaded as error:
+        return overloaded(error)
+
+    await sync_to_async(serializer.save)(password_hash=password_hash)
+    return JsonResponse(await sync_to_async(lambda: serializer.data)(), status=status.HTTP_201_CREATED)
+
+
+def apply_password_reset(email, code, password_hash):
+    """Consume the reset code and store the new password; returns the codes.check result"""
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from notifications.models import Notification
+    from . import codes
+    from .models import OneTimeCode, Player
+
+    with transaction.atomic():
+        result, user_id = codes.check(OneTimeCode.RESET_PASSWORD, email, code, consume=True)
+        if result != codes.VALID:
+            return result
+
+        # Change Password; implicitly verify email if they own it enough to receive code
+        User.objects.filter(pk=user_id).update(password=password_hash)
+        Player.objects.filter(user_id=user_id).update(is_email_verified=True)
+
+        # Send password changed notification
+        Notification.objects.create(
+            recipient_id=user_id,
+            message="Şifreniz başarıyla değiştirildi. Güvenliğiniz için bu işlemi siz yapmadıysanız lütfen bizimle iletişime geçin.",
+            notification_type='SYSTEM'
+        )
+    return result
+
+
+@csrf_exempt
+@require_POST
+async def reset_password(request):
+    """
+    Completes Reset password.
+    POST /api/players/reset-password/
+    Body: { "email": "...", "code": "...", "new_password": "..." }
+    """
+    from . import codes
+    from .models import OneTimeCode
+    from .views import code_error
+
+    data = request_data(request)
+    if data is None:
+        return bad_json()
+    email = data.get('email')
+    code = data.get('code')
+    new_password = data.get('new_password')
+
+    if not email or not code or not new_password:
+        return JsonResponse({"detail": "E-posta, kod ve yeni şifre gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Check the code first: a wrong code never costs a hash
+    result, _ = await sync_to_async(codes.check)(OneTimeCode.RESET_PASSWORD, email, code)
+    if result == codes.VALID:
+        try:
+            password_hash = await hashing.make_password(new_password)
+        except hashing.Overloaded as error:
+            return overloaded(error)
+        # Checked again while consuming it: the code may have been used meanwhile
+        result = await sync_to_async(apply_password_reset)(email, code, password_hash)
+
+    if result != codes.VALID:
+        response = await sync_to_async(code_error)(result, email)
+        return JsonResponse(response.data, status=response.status_code)
+
+    return JsonResponse({"detail": "Şifreniz başarıyla değiştirildi. Şimdi giriş yapabilirsiniz."})
@@ -0,0 +1,134 @@
+"""
+JWT authentication without loading the User row (and profile, team) on every request.
+
+Tokens carry the claims the views need: player_id, team_id, is_staff and the player's
+profile_version. The current claims of each user are kept in a small per-process TTL cache,
+so a user costs one query per TTL instead of 2-3 per request. request.user is a User with
+only these fields loaded (others load on first access) and player_profile already set.
+
+Changing a player's team bumps profile_version (PlayerQuerySet.set_team / Player.save) and
+clears this process' cache entry; other processes pick the change up within TTL, or at once
+when a token newer than their cached claims comes in. The token's own claims are only a hint:
+request.user is always built from the cached ones.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth.models import User
+from django.db.models.base import DEFERRED
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+TTL = 30              # seconds a user's claims are served without asking the database
+MAX_ENTRIES = 10000   # oldest entries are dropped past this
+
+
+def token_claims(user):
+    """Claims added to a user's tokens (user.player_profile should be loaded already)"""
+    player = getattr(user, 'player_profile', None)
+    return {
+        'player_id': player.pk if player else None,
+        'team_id': player.current_team_id if player else None,
+        'is_staff': user.is_staff,
+        'profile_version': player.profile_version if player else 0,
+    }
+
+
+def load_claims(user_id):
+    """Current claims of a user from the database (one query); None if there is no such user"""
+    row = User.objects.filter(pk=user_id).values(
+        'username', 'is_active', 'is_staff',
+        'player_profile__id', 'player_profile__current_team_id', 'player_profile__profile_version',
+    ).first()
+    if row is None:
+        return None
+    return {
+        'username': row['username'],
+        'is_active': row['is_active'],
+        'is_staff': row['is_staff'],
+        'player_id': row['player_profile__id'],
+        'team_id': row['player_profile__current_team_id'],
+        'profile_version': row['player_profile__profile_version'] or 0,
+    }
+
+
+class ClaimsCache:
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # user_id -> (expires, claims)
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        claims = load_claims(user_id)
+        with self.lock:
+            self.entries[user_id] = (now + self.ttl, claims)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return claims
+
+    def invalidate(self, *user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+claims_cache = ClaimsCache()
+
+
+def _partial(model, **values):
+    """A model instance with only `values` loaded; other fields are fetched on first access"""
+    fields = model._meta.concrete_fields
+    return model.from_db(
+        'default',
+        [field.attname for field in fields if field.attname in values],
+        [values.get(field.attname, DEFERRED) for field in fields if field.attname in values],
+    )
+
+
+def build_user(user_id, claims):
+    from .models import Player
+
+    user = _partial(User, id=user_id, username=claims['username'], is_active=claims['is_active'], is_staff=claims['is_staff'])
+    player = None
+    if claims['player_id'] is not None:
+        player = _partial(
+            Player, id=claims['player_id'], user_id=user_id,
+            current_team_id=claims['team_id'], profile_version=claims['profile_version'],
+        )
+        Player.user.field.set_cached_value(player, user)
+    # hasattr(user, 'player_profile') is False without a profile, as with a loaded User
+    User.player_profile.related.set_cached_value(user, player)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        claims = claims_cache.get(user_id)
+        if claims is not None and validated_token.get('profile_version', 0) > claims['profile_version']:
+            # Issued after a change this process has not seen yet
+            claims_cache.invalidate(user_id)
+            claims = claims_cache.get(user_id)
+        if claims is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not claims['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return build_user(user_id, claims)
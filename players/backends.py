@@ -0,0 +1,44 @@
+"""
+Login by email address.
+
+auth_user.email has no index of its own; migration players/0011 adds one on LOWER(email) and
+every email lookup here filters on that exact expression, so it is an index seek. Addresses
+are matched case-insensitively.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+
+
+def normalize(email):
+    return (email or '').strip().lower()
+
+
+def filter_by_email(queryset, email, field='email'):
+    """`queryset` narrowed to the given address, through the LOWER(email) index"""
+    return queryset.alias(email_lower=Lower(field)).filter(email_lower=normalize(email))
+
+
+class EmailBackend(ModelBackend):
+    """
+    authenticate(request, email=..., password=...).
+    Loads the user with its player profile and team in one query and checks the password once.
+    Username logins (e.g. the admin) are left to ModelBackend.
+    """
+    def get_by_email(self, email):
+        """The user (profile and team included) with this address, or None"""
+        queryset = User.objects.select_related('player_profile__current_team').order_by('pk')
+        return filter_by_email(queryset, email).first()
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        user = self.get_by_email(email)
+        if user is None:
+            # Hash anyway so unknown addresses take as long as wrong passwords
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
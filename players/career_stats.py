@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Player, PlayerCareerStats
+from . import leaderboards
+
+
+def apply_delta(player_id, goals=0, assists=0, appearances=0, match_date=None, rebuild_missing=True):
+    """
+    Apply an incremental change to a player's career row with a single UPDATE.
+    `match_date` is only passed when a played match is added, so last_played can move forward.
+    `rebuild_missing=False` leaves a missing row missing (deletes: the player may be going too).
+    """
+    if not (goals or assists or appearances or match_date):
+        return
+
+    updates = {
+        'goals': F('goals') + goals,
+        'assists': F('assists') + assists,
+        'appearances': F('appearances') + appearances,
+    }
+    if match_date is not None:
+        updates['last_played'] = Greatest(Coalesce('last_played', match_date), match_date)
+
+    updated = PlayerCareerStats.objects.filter(player_id=player_id).update(**updates)
+    if not updated and rebuild_missing:
+        # Row is missing (e.g. player created before the table existed) -> build it from history
+        rebuild_for_player(player_id)
+
+
+def refresh_last_played(player_id):
+    """Recompute last_played after a played match was removed or moved."""
+    from matches.models import PlayerMatchStats
+
+    latest = PlayerMatchStats.objects.filter(
+        player_id=OuterRef('player_id'),
+        played=True
+    ).order_by('-match__date').values('match__date')[:1]
+
+    PlayerCareerStats.objects.filter(player_id=player_id).update(last_played=Subquery(latest))
+
+
+def _history_totals():
+    from matches.models import PlayerMatchStats
+
+    return PlayerMatchStats.objects.values('player_id').annotate(
+        goals=Sum('goals'),
+        assists=Sum('assists'),
+        appearances=Count('id', filter=Q(played=True)),
+        last_played=Max('match__date', filter=Q(played=True)),
+    ).order_by()
+
+
+def rebuild_for_player(player_id):
+    """Rebuild a single player's career row from PlayerMatchStats."""
+    totals = _history_totals().filter(player_id=player_id).order_by('player_id').first() or {}
+    PlayerCareerStats.objects.update_or_create(
+        player_id=player_id,
+        defaults={
+            'goals': totals.get('goals') or 0,
+            'assists': totals.get('assists') or 0,
+            'appearances': totals.get('appearances') or 0,
+            'last_played': totals.get('last_played'),
+        }
+    )
+
+
+def rebuild_all(batch_size=1000):
+    """
+    Rebuild every career row from scratch (one aggregate query over PlayerMatchStats).
+    Returns the number of rows written.
+    """
+    totals = {row['player_id']: row for row in _history_totals()}
+
+    rows = []
+    for player_id in Player.objects.values_list('id', flat=True).iterator():
+        row = totals.get(player_id, {})
+        rows.append(PlayerCareerStats(
+            player_id=player_id,
+            goals=row.get('goals') or 0,
+            assists=row.get('assists') or 0,
+            appearances=row.get('appearances') or 0,
+            last_played=row.get('last_played'),
+        ))
+
+    with transaction.atomic():
+        PlayerCareerStats.objects.all().delete()
+        PlayerCareerStats.objects.bulk_create(rows, batch_size=batch_size)
+        leaderboards.mark_stale()
+
+    return len(rows)
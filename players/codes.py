@@ -0,0 +1,96 @@
+"""
+One-time email codes (OneTimeCode) for email verification and password reset.
+
+Codes are looked up through the (purpose, email) unique index and changed with narrow
+UPDATE/DELETE statements on their own table; the Player row is never loaded or saved for a code.
+"""
+import math
+import secrets
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OneTimeCode
+
+TTL = timedelta(minutes=15)
+COOLDOWN = timedelta(seconds=60)  # between two codes sent to the same address
+MAX_ATTEMPTS = 5                  # wrong guesses before the code stops working
+
+# Results of check()
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+MISSING = 'missing'
+
+
+def normalize(email):
+    return (email or '').strip().lower()
+
+
+def generate():
+    return str(100000 + secrets.randbelow(900000))
+
+
+def cooldown_left(purpose, email):
+    """Seconds to wait before another code may be sent to `email` (0: send now)"""
+    created_at = OneTimeCode.objects.filter(
+        purpose=purpose, email=normalize(email)
+    ).values_list('created_at', flat=True).first()
+    if created_at is None:
+        return 0
+    return max(math.ceil((COOLDOWN - (timezone.now() - created_at)).total_seconds()), 0)
+
+
+def issue(user_id, purpose, email):
+    """Create (or replace) the user's code for `purpose`, sent to `email`"""
+    email = normalize(email)
+    now = timezone.now()
+    code = generate()
+    # A code sent to another address (before an email change) stops working
+    OneTimeCode.objects.filter(user_id=user_id, purpose=purpose).exclude(email=email).delete()
+    OneTimeCode.objects.update_or_create(
+        purpose=purpose,
+        email=email,
+        defaults={'user_id': user_id, 'code': code, 'created_at': now, 'expires_at': now + TTL, 'attempts': 0},
+    )
+    return code
+
+
+def check(purpose, email, code, consume=False):
+    """
+    Check a code; returns (result, user_id). A wrong code counts an attempt.
+    With consume=True a valid code is deleted, so it works only once.
+    """
+    row = OneTimeCode.objects.filter(purpose=purpose, email=normalize(email)).values(
+        'pk', 'code', 'expires_at', 'attempts', 'user_id'
+    ).first()
+    if row is None:
+        return MISSING, None
+    if row['attempts'] >= MAX_ATTEMPTS:
+        return LOCKED, row['user_id']
+    if row['expires_at'] <= timezone.now():
+        return EXPIRED, row['user_id']
+    if not secrets.compare_digest(row['code'], str(code)):
+        OneTimeCode.objects.filter(pk=row['pk']).update(attempts=F('attempts') + 1)
+        return INVALID, row['user_id']
+
+    # Conditional delete: of two concurrent requests only one can use the code
+    if consume and not OneTimeCode.objects.filter(pk=row['pk'], code=row['code']).delete()[0]:
+        return MISSING, None
+    return VALID, row['user_id']
+
+
+def prune(batch_size=1000, dry_run=False):
+    """Delete expired codes, `batch_size` rows per statement. Returns the number of codes."""
+    expired = OneTimeCode.objects.filter(expires_at__lte=timezone.now())
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    while True:
+        pks = list(expired.order_by('expires_at').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += OneTimeCode.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,143 @@
+"""
+Precomputed leaderboards.
+
+A rebuild writes the entries of a new snapshot version next to the current ones and then
+switches LeaderboardSnapshot.version in one UPDATE, so readers always see one complete
+version: never an empty or half-written board. Only one rebuild of a board runs at a time;
+the lock is LeaderboardSnapshot.building_since, taken with a conditional UPDATE (which also
+works on SQLite, where select_for_update does nothing).
+
+Changes mark boards stale and queue `rebuild_stale`; reads never rebuild, except for a board
+that was never built. `manage.py rebuild_leaderboards` rebuilds them by hand.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import LeaderboardEntry, LeaderboardSnapshot, PlayerCareerStats
+
+BOARDS = {
+    'goals': F('goals'),
+    'assists': F('assists'),
+    'contributions': F('goals') + F('assists'),
+}
+
+CACHE_TIMEOUT = 60 * 10
+BUILD_TIMEOUT = 10 * 60  # seconds; a lock older than this belongs to a crashed rebuild
+RETRY_DELAY = 30         # seconds before a stale board whose rebuild was locked is tried again
+
+
+def mark_stale(boards=None):
+    """Mark snapshots as stale; the background job rebuilds them."""
+    LeaderboardSnapshot.objects.filter(board__in=boards or BOARDS).update(is_stale=True)
+
+
+def acquire(board):
+    """
+    Take the rebuild lock of a board. Clears is_stale at the same time, so a change made
+    while the rebuild runs marks it stale again.
+    """
+    now = timezone.now()
+    LeaderboardSnapshot.objects.get_or_create(board=board)
+    free = Q(building_since__isnull=True) | Q(building_since__lt=now - timedelta(seconds=BUILD_TIMEOUT))
+    return LeaderboardSnapshot.objects.filter(free, board=board).update(building_since=now, is_stale=False) == 1
+
+
+def rebuild(board):
+    """
+    Rebuild a snapshot from PlayerCareerStats (never from the raw match stats table).
+    Ties get the same dense rank; players with a zero value are left out.
+    Returns the new snapshot, or None if another rebuild of the board holds the lock.
+    """
+    if not acquire(board):
+        return None
+
+    try:
+        version = LeaderboardSnapshot.objects.get(board=board).version + 1
+        rows = PlayerCareerStats.objects.annotate(value=BOARDS[board]).filter(
+            value__gt=0
+        ).order_by('-value', 'player__name', 'player_id').values_list(
+            'player_id', 'value', 'goals', 'assists', 'appearances'
+        )
+
+        entries = []
+        rank, previous = 0, None
+        for position, (player_id, value, goals, assists, appearances) in enumerate(rows, start=1):
+            if value != previous:
+                rank += 1
+                previous = value
+            entries.append(LeaderboardEntry(
+                board=board,
+                version=version,
+                position=position,
+                rank=rank,
+                value=value,
+                player_id=player_id,
+                goals=goals,
+                assists=assists,
+                appearances=appearances,
+            ))
+
+        with transaction.atomic():
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=500)
+            LeaderboardSnapshot.objects.filter(board=board).update(
+                version=version, built_at=timezone.now(), building_since=None
+            )
+    except Exception:
+        LeaderboardSnapshot.objects.filter(board=board).update(building_since=None, is_stale=True)
+        raise
+
+    # Old versions are no longer read (cached pages are keyed by version)
+    LeaderboardEntry.objects.filter(board=board, version__lt=version).delete()
+    return LeaderboardSnapshot.objects.get(board=board)
+
+
+def rebuild_stale():
+    """Background job: rebuild every stale snapshot; retried later if a rebuild is running."""
+    from jobs import queue
+
+    locked = [
+        board for board in LeaderboardSnapshot.objects.filter(is_stale=True).values_list('board', flat=True)
+        if rebuild(board) is None
+    ]
+    if locked:
+        queue.enqueue(rebuild_stale, run_at=timezone.now() + timedelta(seconds=RETRY_DELAY), unique=True)
+    return locked
+
+
+def get_snapshot(board):
+    """
+    Current snapshot of a board. A stale one is still served while the job rebuilds it;
+    only a board that was never built is built here (behind the same lock).
+    """
+    from jobs import queue
+
+    snapshot = LeaderboardSnapshot.objects.filter(board=board).first()
+    if snapshot is None or not snapshot.version:
+        snapshot = rebuild(board) or LeaderboardSnapshot.objects.get(board=board)
+    elif snapshot.is_stale:
+        queue.enqueue(rebuild_stale, unique=True)
+    return snapshot
+
+
+def entries(snapshot):
+    return LeaderboardEntry.objects.filter(
+        board=snapshot.board, version=snapshot.version
+    ).select_related('player__current_team')
+
+
+def cache_key(snapshot, *parts):
+    return ':'.join(['leaderboard', snapshot.board, str(snapshot.version), *map(str, parts)])
+
+
+def cached_page(snapshot, params, build):
+    """Return a cached page for this snapshot version, building it with `build()` on a miss."""
+    key = cache_key(snapshot, *params)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,34 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core import thumbnails
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Queue thumbnail jobs for player photos and team logos that have no current thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--now', action='store_true', help='Render here instead of queueing jobs')
+        parser.add_argument('--force', action='store_true', help='Also redo images that already have thumbnails')
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, spec in thumbnails.FIELDS.items():
+            field = spec['field']
+            rows = (
+                apps.get_model(model).objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list('pk', field, thumbnails.variants_field(field)).iterator()
+            )
+            for pk, name, variants in rows:
+                if not options['force'] and (variants or {}).get('source') == name:
+                    continue
+                if options['now']:
+                    thumbnails.generate(model, pk, field, force=options['force'])
+                else:
+                    queue.enqueue(thumbnails.generate, model=model, pk=pk, field=field, force=options['force'], unique=True)
+                total += 1
+
+        if options['now']:
+            self.stdout.write(self.style.SUCCESS(f"{total} görselin küçük resimleri oluşturuldu."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{total} görsel için küçük resim işi kuyruğa eklendi."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from players import codes
+
+
+class Command(BaseCommand):
+    help = 'Delete expired one-time codes (email verification / password reset) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired codes')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Codes deleted per statement')
+
+    def handle(self, *args, **options):
+        count = codes.prune(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{count} kodun süresi dolmuş (silinmedi)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{count} süresi dolmuş kod silindi."))
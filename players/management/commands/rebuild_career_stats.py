@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from players import career_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild PlayerCareerStats from scratch using PlayerMatchStats history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        count = career_stats.rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{count} oyuncunun kariyer istatistiği yeniden oluşturuldu."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from players import leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the leaderboard snapshots from the career stats.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--board', choices=list(leaderboards.BOARDS), help='Only this board')
+
+    def handle(self, *args, **options):
+        for board in [options['board']] if options['board'] else leaderboards.BOARDS:
+            snapshot = leaderboards.rebuild(board)
+            if snapshot is None:
+                self.stdout.write(self.style.WARNING(f"{board}: başka bir güncelleme sürüyor, atlandı."))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{board}: v{snapshot.version} oluşturuldu."))
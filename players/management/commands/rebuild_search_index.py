@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from players import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of players and teams (SQLite FTS5).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError("Tam metin arama indeksi yalnızca SQLite (FTS5) ile kullanılabilir.")
+        players, teams = search.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Arama indeksi yenilendi: {players} oyuncu, {teams} takım."))
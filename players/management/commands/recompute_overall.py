@@ -0,0 +1,39 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from players import rating
+
+
+class Command(BaseCommand):
+    help = 'Recompute every player\'s overall with the position weight matrix (players/rating.py).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the differences, do not write')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='bulk_update chunk size')
+        parser.add_argument('--show', type=int, default=20, help='Number of largest changes to list')
+        parser.add_argument('--background', action='store_true', help='Queue the recompute for run_worker instead')
+
+    def handle(self, *args, **options):
+        if options['background']:
+            from jobs import queue
+            queue.enqueue(rating.recompute_all, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+            self.stdout.write(self.style.SUCCESS("Overall hesaplaması kuyruğa alındı (run_worker çalıştırın)."))
+            return
+
+        changes = rating.recompute_all(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+
+        if not changes:
+            self.stdout.write(self.style.SUCCESS("Tüm overall değerleri güncel."))
+            return
+
+        deltas = Counter(new - old for _, _, old, new in changes)
+        self.stdout.write("Fark dağılımı (yeni - eski: oyuncu sayısı):")
+        for delta in sorted(deltas):
+            self.stdout.write(f"  {delta:+d}: {deltas[delta]}")
+
+        largest = sorted(changes, key=lambda change: abs(change[3] - change[2]), reverse=True)
+        self.stdout.write(f"En büyük {min(options['show'], len(changes))} değişiklik:")
+        for pk, name, old, new in largest[:options['show']]:
+            self.stdout.write(f"  #{pk} {name}: {old} -> {new}")
+
+        verb = "değişecek" if options['dry_run'] else "güncellendi"
+        self.stdout.write(self.style.SUCCESS(f"{len(changes)} oyuncunun overall değeri {verb}."))
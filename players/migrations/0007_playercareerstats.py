@@ -0,0 +1,58 @@
+# Generated by Django 5.0 on 2026-10-17 00:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_career_stats(apps, schema_editor):
+    Player = apps.get_model('players', 'Player')
+    PlayerCareerStats = apps.get_model('players', 'PlayerCareerStats')
+    PlayerMatchStats = apps.get_model('matches', 'PlayerMatchStats')
+
+    totals = {
+        row['player_id']: row
+        for row in PlayerMatchStats.objects.values('player_id').annotate(
+            goals=Sum('goals'),
+            assists=Sum('assists'),
+            appearances=Count('id', filter=Q(played=True)),
+            last_played=Max('match__date', filter=Q(played=True)),
+        ).order_by()
+    }
+    PlayerCareerStats.objects.bulk_create([
+        PlayerCareerStats(
+            player_id=player_id,
+            goals=totals.get(player_id, {}).get('goals') or 0,
+            assists=totals.get(player_id, {}).get('assists') or 0,
+            appearances=totals.get(player_id, {}).get('appearances') or 0,
+            last_played=totals.get(player_id, {}).get('last_played'),
+        )
+        for player_id in Player.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0006_player_jersey_number_player_preferred_foot_and_more'),
+        ('matches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerCareerStats',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='career_stats', serialize=False, to='players.player', verbose_name='Oyuncu')),
+                ('goals', models.IntegerField(default=0, verbose_name='Toplam Gol')),
+                ('assists', models.IntegerField(default=0, verbose_name='Toplam Asist')),
+                ('appearances', models.IntegerField(default=0, verbose_name='Oynadığı Maç')),
+                ('last_played', models.DateTimeField(blank=True, null=True, verbose_name='Son Maç Tarihi')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Oyuncu Kariyer İstatistiği',
+                'verbose_name_plural': 'Oyuncu Kariyer İstatistikleri',
+            },
+        ),
+        migrations.RunPython(backfill_career_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-17 00:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0007_playercareerstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('board', models.CharField(choices=[('goals', 'Gol Krallığı'), ('assists', 'Asist Krallığı'), ('contributions', 'Gol + Asist')], max_length=20, primary_key=True, serialize=False, verbose_name='Liste')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Versiyon')),
+                ('is_stale', models.BooleanField(default=True, verbose_name='Güncellenmeli mi?')),
+                ('built_at', models.DateTimeField(blank=True, null=True, verbose_name='Oluşturulma Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Liderlik Tablosu',
+                'verbose_name_plural': 'Liderlik Tabloları',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('goals', 'Gol Krallığı'), ('assists', 'Asist Krallığı'), ('contributions', 'Gol + Asist')], max_length=20, verbose_name='Liste')),
+                ('position', models.PositiveIntegerField(verbose_name='Sıra')),
+                ('rank', models.PositiveIntegerField(verbose_name='Derece')),
+                ('value', models.IntegerField(verbose_name='Değer')),
+                ('goals', models.IntegerField(default=0, verbose_name='Gol')),
+                ('assists', models.IntegerField(default=0, verbose_name='Asist')),
+                ('appearances', models.IntegerField(default=0, verbose_name='Maç')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='players.player', verbose_name='Oyuncu')),
+            ],
+            options={
+                'verbose_name': 'Liderlik Tablosu Satırı',
+                'verbose_name_plural': 'Liderlik Tablosu Satırları',
+                'ordering': ['board', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'position'), name='unique_leaderboard_position'),
+        ),
+    ]
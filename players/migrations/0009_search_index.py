@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from players.search import PLAYER_TABLE, TEAM_TABLE, create_tables, normalize
+
+    Player = apps.get_model('players', 'Player')
+    Team = apps.get_model('teams', 'Team')
+
+    with schema_editor.connection.cursor() as cursor:
+        create_tables(cursor)
+        cursor.executemany(
+            f"INSERT INTO {TEAM_TABLE} (rowid, name, short_name) VALUES (%s, %s, %s)",
+            [(pk, normalize(name), normalize(short_name))
+             for pk, name, short_name in Team.objects.values_list('pk', 'name', 'short_name')]
+        )
+        cursor.executemany(
+            f"INSERT INTO {PLAYER_TABLE} (rowid, name, team) VALUES (%s, %s, %s)",
+            [(pk, normalize(name), normalize(team_name))
+             for pk, name, team_name in Player.objects.values_list('pk', 'name', 'current_team__name')]
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from players.search import drop_tables
+
+    with schema_editor.connection.cursor() as cursor:
+        drop_tables(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0008_leaderboards'),
+        ('teams', '0003_alter_team_options_team_draws_team_goals_conceded_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
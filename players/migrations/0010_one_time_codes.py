@@ -0,0 +1,75 @@
+# Generated by Django 5.0 on 2026-10-17 01:04
+
+import django.db.models.deletion
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def copy_pending_codes(apps, schema_editor):
+    """
+    Move the codes stored on Player. The field was shared by both flows: an unverified
+    player's code was for email verification, a verified player's for a password reset.
+    """
+    Player = apps.get_model('players', 'Player')
+    OneTimeCode = apps.get_model('players', 'OneTimeCode')
+
+    pending = Player.objects.exclude(verification_code__isnull=True).exclude(verification_code='').filter(
+        verification_code_created_at__isnull=False
+    ).values_list('user_id', 'user__email', 'is_email_verified', 'verification_code', 'verification_code_created_at')
+
+    OneTimeCode.objects.bulk_create([
+        OneTimeCode(
+            purpose='RESET_PASSWORD' if is_verified else 'VERIFY_EMAIL',
+            email=email.strip().lower(),
+            user_id=user_id,
+            code=code,
+            created_at=created_at,
+            expires_at=created_at + timedelta(minutes=15),
+        )
+        for user_id, email, is_verified, code, created_at in pending.iterator()
+        if email
+    ], batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OneTimeCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('VERIFY_EMAIL', 'E-posta Doğrulama'), ('RESET_PASSWORD', 'Şifre Sıfırlama')], max_length=20, verbose_name='Amaç')),
+                ('email', models.CharField(max_length=254, verbose_name='E-posta')),
+                ('code', models.CharField(max_length=6, verbose_name='Kod')),
+                ('created_at', models.DateTimeField(verbose_name='Oluşturulma Tarihi')),
+                ('expires_at', models.DateTimeField(verbose_name='Son Geçerlilik Tarihi')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Hatalı Deneme')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='one_time_codes', to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+            ],
+            options={
+                'verbose_name': 'Tek Kullanımlık Kod',
+                'verbose_name_plural': 'Tek Kullanımlık Kodlar',
+                'indexes': [models.Index(fields=['expires_at'], name='code_expires_at_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='onetimecode',
+            constraint=models.UniqueConstraint(fields=('purpose', 'email'), name='unique_code_purpose_email'),
+        ),
+        migrations.RunPython(copy_pending_codes, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='player',
+            name='verification_code',
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='verification_code_created_at',
+        ),
+    ]
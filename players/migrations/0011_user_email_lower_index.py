@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    auth_user is not ours, so the index players.backends looks users up with
+    (LOWER(email)) is created here.
+    """
+
+    dependencies = [
+        ('players', '0010_one_time_codes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS auth_user_email_lower_idx ON auth_user (LOWER(email));',
+            'DROP INDEX IF EXISTS auth_user_email_lower_idx;',
+        ),
+    ]
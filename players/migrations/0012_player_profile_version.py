@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0011_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='profile_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Profil Versiyonu'),
+        ),
+    ]
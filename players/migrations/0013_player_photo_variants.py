@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0012_player_profile_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Fotoğraf Küçük Resimleri'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-17 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0013_player_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('extension', models.CharField(blank=True, max_length=10, verbose_name='Uzantı')),
+                ('size', models.PositiveIntegerField(verbose_name='Boyut (bayt)')),
+                ('name', models.CharField(blank=True, max_length=255, verbose_name='Depolama Adı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')),
+                ('stored_at', models.DateTimeField(blank=True, null=True, verbose_name='Yüklenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Yüklenen Dosya',
+                'verbose_name_plural': 'Yüklenen Dosyalar',
+            },
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='photo_upload',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Yüklenen Fotoğraf'),
+        ),
+    ]
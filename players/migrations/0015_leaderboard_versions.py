@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-17 01:26
+
+from django.db import migrations, models
+
+
+def tag_current_entries(apps, schema_editor):
+    """Existing entries belong to the current version of their snapshot"""
+    LeaderboardSnapshot = apps.get_model('players', 'LeaderboardSnapshot')
+    LeaderboardEntry = apps.get_model('players', 'LeaderboardEntry')
+    for board, version in LeaderboardSnapshot.objects.values_list('board', 'version'):
+        LeaderboardEntry.objects.filter(board=board).update(version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0014_stored_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='leaderboardentry',
+            options={'ordering': ['board', 'version', 'position'], 'verbose_name': 'Liderlik Tablosu Satırı', 'verbose_name_plural': 'Liderlik Tablosu Satırları'},
+        ),
+        migrations.RemoveConstraint(
+            model_name='leaderboardentry',
+            name='unique_leaderboard_position',
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Versiyon'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardsnapshot',
+            name='building_since',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Oluşturma Başlangıcı'),
+        ),
+        migrations.RunPython(tag_current_entries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'version', 'position'), name='unique_leaderboard_version_position'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 import os
 import uuid
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from teams.models import Team
+from . import rating
 from PIL import Image
 
 
@@ -14,6 +16,47 @@ def secure_file_upload(instance, filename):
     return os.path.join('player_photos/', filename)
 
 
+class PlayerQuerySet(models.QuerySet):
+    """Chainable querysets for every player-facing endpoint"""
+
+    def verified(self):
+        return self.filter(is_email_verified=True)
+
+    def with_team(self):
+        return self.select_related('current_team')
+
+    def with_career_stats(self):
+        """
+        Annotate career totals from PlayerCareerStats in the same SQL statement.
+        Annotations: career_goals, career_assists, career_appearances, career_last_played
+        """
+        return self.annotate(
+            career_goals=Coalesce('career_stats__goals', 0),
+            career_assists=Coalesce('career_stats__assists', 0),
+            career_appearances=Coalesce('career_stats__appearances', 0),
+            career_last_played=models.F('career_stats__last_played'),
+        )
+
+    def set_team(self, team):
+        """
+        Move these players to `team` (None: no team) with one UPDATE. Bumps profile_version,
+        so the team_id in auth claims (players/authentication.py) is refreshed.
+        """
+        from django.db import transaction
+        from . import authentication, search
+
+        rows = list(self.values_list('pk', 'user_id'))
+        if not rows:
+            return 0
+        player_ids, user_ids = zip(*rows)
+        updated = Player.objects.filter(pk__in=player_ids).update(
+            current_team=team, profile_version=models.F('profile_version') + 1
+        )
+        search.set_players_team(player_ids, team.name if team else '')
+        transaction.on_commit(lambda: authentication.claims_cache.invalidate(*user_ids))
+        return updated
+
+
 class Player(models.Model):
     """Player Profile (User related)"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='player_profile')
@@ -28,9 +71,9 @@ class Player(models.Model):
     )
 
     # Verification Fields
-    is_email_verified = models.BooleanField(default=False, verbose_name='E-posta Doğrulandı mı?')
-    verification_code = models.CharField(max_length=6, blank=True, null=True, verbose_name='Doğrulama Kodu')
-    verification_code_created_at = models.DateTimeField(blank=True, null=True, verbose_name='Kod Oluşturulma Tarihi')
+    is_email_verified = models.BooleanField(default=False, verbose_name='E-posta Doğrulandı mı?')  # codes: OneTimeCode
+    # Bumped when the auth claims of the player (team) change; see players/authentication.py
+    profile_version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Profil Versiyonu')
     
 
     #It comes from user's First Name and Last Name
@@ -48,6 +91,10 @@ class Player(models.Model):
         blank=True,
         null=True
     )
+    # Thumbnail names, filled in by a background job (core/thumbnails.py)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Fotoğraf Küçük Resimleri')
+    # SHA-256 of a new photo still being moved to storage (players/uploads.py)
+    photo_upload = models.CharField(max_length=64, blank=True, editable=False, verbose_name='Yüklenen Fotoğraf')
 
     POSITION_CHOICES = [
         ('KL', 'Kaleci'),
@@ -109,6 +156,8 @@ class Player(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PlayerQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Oyuncu'
@@ -120,93 +169,9 @@ class Player(models.Model):
 
 
 
-    ##Gemini's base calculations 
-    ##TODO: Make it more accurate and write clean
     def calculate_overall(self):
-        """Calculate overall based on position"""
-        p = self.position
-        
-        if p == 'KL':
-            # REF(22%), DIV(22%), POS(20%), HAN(18%), KIC(10%), SPD(8%)
-            score = (
-                self.reflexes * 0.22 +
-                self.diving * 0.22 +
-                self.positioning * 0.20 +
-                self.handling * 0.18 +
-                self.kicking * 0.10 +
-                self.speed * 0.08
-            )
-        elif p == 'ST':
-            # ST (Santrafor),15,45,5,20,0,15 (PAC, SHO, PAS, DRI, DEF, PHY)
-            score = (
-                self.shooting * 0.45 +
-                self.dribbling * 0.20 +
-                self.pace * 0.15 +
-                self.physical * 0.15 +
-                self.passing * 0.05
-            )
-        elif p in ['SLK', 'SGK']:
-            # Kanat: PAC(35%), DRI(25%), PAS(20%), SHO(15%), PHY(5%)
-            score = (
-                self.pace * 0.35 +
-                self.dribbling * 0.25 +
-                self.passing * 0.20 +
-                self.shooting * 0.15 +
-                self.physical * 0.05
-            )
-        elif p == 'MOO':
-            # MOO: PAS(35%), DRI(30%), SHO(20%), PAC(10%), PHY(5%)
-            score = (
-                self.passing * 0.35 +
-                self.dribbling * 0.30 +
-                self.shooting * 0.20 +
-                self.pace * 0.10 +
-                self.physical * 0.05
-            )
-        elif p == 'MO':
-            # MO: PAS(30%), DRI(20%), PHY(15%), PAC(10%), SHO(15%), DEF(10%)
-            score = (
-                self.passing * 0.30 +
-                self.dribbling * 0.20 +
-                self.physical * 0.15 +
-                self.shooting * 0.15 +
-                self.pace * 0.10 +
-                self.defense * 0.10
-            )
-        elif p == 'DOS':
-            # DOS: DEF(30%), PHY(25%), PAS(20%), PAC(10%), DRI(10%), SHO(5%)
-            score = (
-                self.defense * 0.30 +
-                self.physical * 0.25 +
-                self.passing * 0.20 +
-                self.pace * 0.10 +
-                self.dribbling * 0.10 +
-                self.shooting * 0.05
-            )
-        elif p in ['SLB', 'SGB']:
-            # Bek: PAC(30), DEF(10), PAS(15), DRI(15), PHY(30) -> Wait user wrote:
-            # "Bek,30,0,15,15,30,10" -> Order was PAC, SHO, PAS, DRI, DEF, PHY
-            # So: PAC=30, SHO=0, PAS=15, DRI=15, DEF=30, PHY=10
-            score = (
-                self.pace * 0.30 +
-                self.defense * 0.30 +
-                self.passing * 0.15 +
-                self.dribbling * 0.15 +
-                self.physical * 0.10
-            )
-        elif p == 'STP':
-            # STP: DEF(45%), PHY(30%), PAC(15%), PAS(5%), DRI(5%)
-            score = (
-                self.defense * 0.45 +
-                self.physical * 0.30 +
-                self.pace * 0.15 +
-                self.passing * 0.05 +
-                self.dribbling * 0.05
-            )
-        else:
-            score = 50 # Default
-
-        return int(round(score))
+        """Calculate overall based on position (weights: players/rating.py)"""
+        return rating.calculate_overall(self)
 
     def initialize_stats(self):
         """Initialize stats based on position (~75 Overall) -Gemini"""
@@ -261,6 +226,7 @@ class Player(models.Model):
         
 
         ##We don't use image processing anymore (because we are using free pythonanywhere server :(( 
+        ##Thumbnails are rendered by a background job instead (core/thumbnails.py, queued in signals.py)
         # if self.photo:
         #     try:
         #         if hasattr(self.photo, 'file') and isinstance(self.photo.file, UploadedFile):
@@ -273,17 +239,155 @@ class Player(models.Model):
         super().save(*args, **kwargs)
 
     
+    # Career totals are read from the with_career_stats() annotation or the
+    # denormalized PlayerCareerStats row, never aggregated on the fly.
+    def career_stat(self, stat):
+        annotated = f'career_{stat}'
+        if annotated in self.__dict__:
+            return getattr(self, annotated)
+        stats = getattr(self, 'career_stats', None)
+        return getattr(stats, stat) if stats else 0
+
     @property
     def total_goals(self):
-        from matches.models import PlayerMatchStats
-        return PlayerMatchStats.objects.filter(player=self).aggregate(total=models.Sum('goals'))['total'] or 0
+        return self.career_stat('goals')
     
     @property
     def total_assists(self):
-        from matches.models import PlayerMatchStats
-        return PlayerMatchStats.objects.filter(player=self).aggregate(total=models.Sum('assists'))['total'] or 0
+        return self.career_stat('assists')
     
     @property
     def matches_played(self):
-        from matches.models import PlayerMatchStats
-        return PlayerMatchStats.objects.filter(player=self, played=True).count()
+        return self.career_stat('appearances')
+
+
+class PlayerCareerStats(models.Model):
+    """
+    Denormalized career totals of a player.
+    Updated incrementally from PlayerMatchStats changes (see matches/signals.py),
+    rebuilt from scratch with `manage.py rebuild_career_stats`.
+    """
+    player = models.OneToOneField(
+        Player,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='career_stats',
+        verbose_name='Oyuncu'
+    )
+    goals = models.IntegerField(default=0, verbose_name='Toplam Gol')
+    assists = models.IntegerField(default=0, verbose_name='Toplam Asist')
+    appearances = models.IntegerField(default=0, verbose_name='Oynadığı Maç')
+    last_played = models.DateTimeField(blank=True, null=True, verbose_name='Son Maç Tarihi')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Oyuncu Kariyer İstatistiği'
+        verbose_name_plural = 'Oyuncu Kariyer İstatistikleri'
+
+    def __str__(self):
+        return f"{self.player.name} ({self.goals}G, {self.assists}A, {self.appearances}M)"
+
+
+class LeaderboardSnapshot(models.Model):
+    """
+    Header row of a precomputed leaderboard.
+    `version` changes on every rebuild, so cached pages of an old snapshot are never served.
+    `building_since` is the rebuild lock (see players/leaderboards.py).
+    """
+    BOARD_CHOICES = [
+        ('goals', 'Gol Krallığı'),
+        ('assists', 'Asist Krallığı'),
+        ('contributions', 'Gol + Asist'),
+    ]
+
+    board = models.CharField(max_length=20, choices=BOARD_CHOICES, primary_key=True, verbose_name='Liste')
+    version = models.PositiveIntegerField(default=0, verbose_name='Versiyon')
+    is_stale = models.BooleanField(default=True, verbose_name='Güncellenmeli mi?')
+    built_at = models.DateTimeField(blank=True, null=True, verbose_name='Oluşturulma Tarihi')
+    building_since = models.DateTimeField(blank=True, null=True, verbose_name='Oluşturma Başlangıcı')
+
+    class Meta:
+        verbose_name = 'Liderlik Tablosu'
+        verbose_name_plural = 'Liderlik Tabloları'
+
+    def __str__(self):
+        return f"{self.get_board_display()} (v{self.version})"
+
+
+class LeaderboardEntry(models.Model):
+    """One ranked row of a leaderboard snapshot (of the snapshot version it was built for)"""
+    board = models.CharField(max_length=20, choices=LeaderboardSnapshot.BOARD_CHOICES, verbose_name='Liste')
+    version = models.PositiveIntegerField(default=0, verbose_name='Versiyon')
+    position = models.PositiveIntegerField(verbose_name='Sıra')  # row number, used as the cursor key
+    rank = models.PositiveIntegerField(verbose_name='Derece')  # dense rank, ties share the same rank
+    value = models.IntegerField(verbose_name='Değer')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='leaderboard_entries', verbose_name='Oyuncu')
+    goals = models.IntegerField(default=0, verbose_name='Gol')
+    assists = models.IntegerField(default=0, verbose_name='Asist')
+    appearances = models.IntegerField(default=0, verbose_name='Maç')
+
+    class Meta:
+        verbose_name = 'Liderlik Tablosu Satırı'
+        verbose_name_plural = 'Liderlik Tablosu Satırları'
+        ordering = ['board', 'version', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'version', 'position'], name='unique_leaderboard_version_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.board} #{self.rank} {self.player.name} ({self.value})"
+
+
+class OneTimeCode(models.Model):
+    """
+    A 6-digit code sent by email (see players/codes.py). One live code per purpose and address;
+    used or expired codes are deleted (`manage.py prune_codes` sweeps the expired ones).
+    """
+    VERIFY_EMAIL = 'VERIFY_EMAIL'
+    RESET_PASSWORD = 'RESET_PASSWORD'
+    PURPOSE_CHOICES = (
+        (VERIFY_EMAIL, 'E-posta Doğrulama'),
+        (RESET_PASSWORD, 'Şifre Sıfırlama'),
+    )
+
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES, verbose_name='Amaç')
+    email = models.CharField(max_length=254, verbose_name='E-posta')  # lowercased
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='one_time_codes', verbose_name='Kullanıcı')
+    code = models.CharField(max_length=6, verbose_name='Kod')
+    created_at = models.DateTimeField(verbose_name='Oluşturulma Tarihi')
+    expires_at = models.DateTimeField(verbose_name='Son Geçerlilik Tarihi')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Hatalı Deneme')
+
+    class Meta:
+        verbose_name = 'Tek Kullanımlık Kod'
+        verbose_name_plural = 'Tek Kullanımlık Kodlar'
+        constraints = [
+            models.UniqueConstraint(fields=['purpose', 'email'], name='unique_code_purpose_email'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='code_expires_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.get_purpose_display()})"
+
+
+class StoredBlob(models.Model):
+    """
+    An uploaded photo, identified by the SHA-256 of its content (see players/uploads.py).
+    `name` is empty until a job has copied it from the local spool to the storage backend;
+    the same content uploaded again reuses the stored object.
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    extension = models.CharField(max_length=10, blank=True, verbose_name='Uzantı')
+    size = models.PositiveIntegerField(verbose_name='Boyut (bayt)')
+    name = models.CharField(max_length=255, blank=True, verbose_name='Depolama Adı')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
+    stored_at = models.DateTimeField(blank=True, null=True, verbose_name='Yüklenme Tarihi')
+
+    class Meta:
+        verbose_name = 'Yüklenen Dosya'
+        verbose_name_plural = 'Yüklenen Dosyalar'
+
+    def __str__(self):
+        return self.name or f"{self.sha256} (yükleniyor)"
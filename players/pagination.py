@@ -1,6 +1,20 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from core.pagination import KeysetPagination
 
 class PlayerPagination(PageNumberPagination):
     page_size = 5
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class LeaderboardPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'position'
+
+
+class PlayerMatchHistoryPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    ordering = ('-match__date', '-id')
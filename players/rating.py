@@ -0,0 +1,99 @@
+"""
+Overall rating formula.
+
+Weights are stored as a position x attribute matrix, so re-tuning the formula only means
+editing the table below and running `manage.py recompute_overall`.
+"""
+
+ATTRIBUTES = (
+    'pace', 'shooting', 'passing', 'dribbling', 'defense', 'physical',
+    'diving', 'handling', 'kicking', 'reflexes', 'speed', 'positioning',
+)
+
+POSITION_WEIGHTS = {
+    #        PAC   SHO   PAS   DRI   DEF   PHY   DIV   HAN   KIC   REF   SPD   POS
+    'KL':  (0.00, 0.00, 0.00, 0.00, 0.00, 0.00, 0.22, 0.18, 0.10, 0.22, 0.08, 0.20),
+    'ST':  (0.15, 0.45, 0.05, 0.20, 0.00, 0.15, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'SLK': (0.35, 0.15, 0.20, 0.25, 0.00, 0.05, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'SGK': (0.35, 0.15, 0.20, 0.25, 0.00, 0.05, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'MOO': (0.10, 0.20, 0.35, 0.30, 0.00, 0.05, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'MO':  (0.10, 0.15, 0.30, 0.20, 0.10, 0.15, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'DOS': (0.10, 0.05, 0.20, 0.10, 0.30, 0.25, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'SLB': (0.30, 0.00, 0.15, 0.15, 0.30, 0.10, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'SGB': (0.30, 0.00, 0.15, 0.15, 0.30, 0.10, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+    'STP': (0.15, 0.00, 0.05, 0.05, 0.45, 0.30, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00),
+}
+
+DEFAULT_OVERALL = 50  # unknown position
+
+
+def _round(score):
+    # Round away float noise first so the single-row and the batch path always agree
+    return int(round(round(score, 6)))
+
+
+def calculate_overall(player):
+    """Overall of a single player (used by Player.save)"""
+    weights = POSITION_WEIGHTS.get(player.position)
+    if weights is None:
+        return DEFAULT_OVERALL
+    return _round(sum(w * getattr(player, attr) for w, attr in zip(weights, ATTRIBUTES)))
+
+
+def calculate_overall_bulk(positions, attributes):
+    """
+    Overall of many players at once.
+    positions: sequence of position codes, attributes: (n x len(ATTRIBUTES)) array-like.
+    Scores every player against every position with one matrix product, then picks
+    each player's own position column.
+    """
+    import numpy as np
+
+    codes = list(POSITION_WEIGHTS)
+    weights = np.array([POSITION_WEIGHTS[code] for code in codes], dtype=np.float64)
+    column = {code: i for i, code in enumerate(codes)}
+
+    attributes = np.asarray(attributes, dtype=np.float64).reshape(-1, len(ATTRIBUTES))
+    index = np.array([column.get(p, -1) for p in positions], dtype=np.int64)
+
+    scores = attributes @ weights.T
+    own = scores[np.arange(len(index)), np.clip(index, 0, None)]
+    overall = np.rint(np.round(own, 6)).astype(np.int64)
+    overall[index < 0] = DEFAULT_OVERALL
+    return overall
+
+
+def recompute_all(queryset=None, chunk_size=2000, dry_run=False):
+    """
+    Recompute `overall` for every player in `queryset` and write back only the changed rows
+    with bulk_update in chunks. Returns a list of (player_id, name, old, new) changes.
+    """
+    from .models import Player
+
+    if queryset is None:
+        queryset = Player.objects.all()
+
+    rows = list(queryset.order_by().values_list('id', 'name', 'position', 'overall', *ATTRIBUTES))
+    if not rows:
+        return []
+
+    new_overall = calculate_overall_bulk(
+        [row[2] for row in rows],
+        [row[4:] for row in rows],
+    )
+
+    changes = [
+        (row[0], row[1], row[3], int(new))
+        for row, new in zip(rows, new_overall)
+        if row[3] != new
+    ]
+
+    if not dry_run:
+        # One short transaction per chunk instead of one long write lock
+        for start in range(0, len(changes), chunk_size):
+            Player.objects.bulk_update(
+                [Player(pk=pk, overall=new) for pk, _, _, new in changes[start:start + chunk_size]],
+                ['overall'],
+            )
+
+    return changes
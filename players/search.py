@@ -0,0 +1,215 @@
+"""
+Full-text search index for players and teams (SQLite FTS5).
+
+The index stores a normalized shadow of the searchable text: Turkish-aware casefolded
+(İ/I/ı -> i) and accent-folded (ş -> s, ğ -> g, ...), so "sukru", "ŞÜKRÜ" and "Şükrü"
+all match each other. Queries are normalized the same way before MATCH.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+PLAYER_TABLE = 'players_player_search'
+TEAM_TABLE = 'players_team_search'
+
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+})
+_TOKEN = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Casefold + accent-fold text for the search index (Turkish dotted/dotless i aware)"""
+    if not text:
+        return ''
+    text = text.translate(_TURKISH_FOLD).casefold()
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def match_expression(query, prefix=False):
+    """
+    Build an FTS5 MATCH expression from user input.
+    Every token is quoted (no FTS syntax injection); in prefix mode the last token
+    also matches as a prefix for autocomplete.
+    """
+    tokens = _TOKEN.findall(normalize(query))
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+# --- Index maintenance ---
+
+def create_tables(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {PLAYER_TABLE} "
+        f"USING fts5(name, team, tokenize='unicode61 remove_diacritics 2')"
+    )
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TEAM_TABLE} "
+        f"USING fts5(name, short_name, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_tables(cursor):
+    cursor.execute(f"DROP TABLE IF EXISTS {PLAYER_TABLE}")
+    cursor.execute(f"DROP TABLE IF EXISTS {TEAM_TABLE}")
+
+
+def index_player(player, team_name=None):
+    if not is_available():
+        return
+    if team_name is None:
+        team_name = player.current_team.name if player.current_team_id else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PLAYER_TABLE} WHERE rowid = %s", [player.pk])
+        cursor.execute(
+            f"INSERT INTO {PLAYER_TABLE} (rowid, name, team) VALUES (%s, %s, %s)",
+            [player.pk, normalize(player.name), normalize(team_name)]
+        )
+
+
+def remove_player(player_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PLAYER_TABLE} WHERE rowid = %s", [player_id])
+
+
+def index_team(team):
+    """Index a team and refresh the team column of its players"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TEAM_TABLE} WHERE rowid = %s", [team.pk])
+        cursor.execute(
+            f"INSERT INTO {TEAM_TABLE} (rowid, name, short_name) VALUES (%s, %s, %s)",
+            [team.pk, normalize(team.name), normalize(team.short_name)]
+        )
+    set_players_team(team.players.values_list('pk', flat=True), team.name)
+
+
+def remove_team(team_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TEAM_TABLE} WHERE rowid = %s", [team_id])
+
+
+def set_players_team(player_ids, team_name):
+    player_ids = list(player_ids)
+    if not player_ids or not is_available():
+        return
+    placeholders = ', '.join(['%s'] * len(player_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {PLAYER_TABLE} SET team = %s WHERE rowid IN ({placeholders})",
+            [normalize(team_name), *player_ids]
+        )
+
+
+def rebuild(batch_size=1000):
+    """Rebuild both indexes from scratch. Returns (players, teams) indexed."""
+    from teams.models import Team
+    from .models import Player
+
+    with connection.cursor() as cursor:
+        drop_tables(cursor)
+        create_tables(cursor)
+
+        teams = Team.objects.values_list('pk', 'name', 'short_name')
+        cursor.executemany(
+            f"INSERT INTO {TEAM_TABLE} (rowid, name, short_name) VALUES (%s, %s, %s)",
+            [(pk, normalize(name), normalize(short_name)) for pk, name, short_name in teams]
+        )
+
+        players = Player.objects.values_list('pk', 'name', 'current_team__name').iterator(chunk_size=batch_size)
+        batch, player_count = [], 0
+        for pk, name, team_name in players:
+            batch.append((pk, normalize(name), normalize(team_name)))
+            if len(batch) >= batch_size:
+                cursor.executemany(f"INSERT INTO {PLAYER_TABLE} (rowid, name, team) VALUES (%s, %s, %s)", batch)
+                player_count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(f"INSERT INTO {PLAYER_TABLE} (rowid, name, team) VALUES (%s, %s, %s)", batch)
+            player_count += len(batch)
+
+    return player_count, len(teams)
+
+
+# --- Queries ---
+
+MAX_LIMIT = 50
+
+
+def clamp_limit(value, default=20):
+    """`?limit=` of the search endpoints, kept between 1 and MAX_LIMIT"""
+    try:
+        return max(1, min(int(value), MAX_LIMIT))
+    except (TypeError, ValueError):
+        return default
+
+
+def _ranked_ids(table, weights, query, prefix, limit, join=''):
+    """
+    rowids of the best `limit` matches. `join` narrows them down inside the same statement
+    (before LIMIT), so filtered-out rows never use up the limit.
+    """
+    expression = match_expression(query, prefix)
+    if expression is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {table}.rowid FROM {table} {join} WHERE {table} MATCH %s "
+            f"ORDER BY bm25({table}, {weights}) LIMIT %s",
+            [expression, clamp_limit(limit)]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_player_ids(query, prefix=False, limit=20, verified_only=False):
+    """Player ids ranked by relevance (a name hit outweighs a team-name hit)"""
+    join = ''
+    if verified_only:
+        from .models import Player
+        player_table = Player._meta.db_table
+        join = f"JOIN {player_table} ON {player_table}.id = {PLAYER_TABLE}.rowid AND {player_table}.is_email_verified"
+    return _ranked_ids(PLAYER_TABLE, '10.0, 1.0', query, prefix, limit, join)
+
+
+def search_team_ids(query, prefix=False, limit=20):
+    return _ranked_ids(TEAM_TABLE, '10.0, 5.0', query, prefix, limit)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` filter backed by the player FTS index.
+    Falls back to DRF's icontains SearchFilter on databases without FTS5.
+    """
+    def filter_queryset(self, request, queryset, view):
+        if not is_available():
+            return super().filter_queryset(request, queryset, view)
+
+        expression = match_expression(request.query_params.get(self.search_param, ''), prefix=True)
+        if expression is None:
+            return queryset
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {PLAYER_TABLE} WHERE {PLAYER_TABLE} MATCH %s", [expression]
+        ))
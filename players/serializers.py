@@ -1,12 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Player
+from .models import Player, LeaderboardEntry, OneTimeCode
 from teams.models import Team
+from core.thumbnails import ThumbnailField
 
-from django.utils import timezone
 from django.utils.text import slugify
 import uuid
-import random
 from utils.email_service import EmailService
 
 class PlayerRegisterSerializer(serializers.ModelSerializer):
@@ -33,45 +32,58 @@ class PlayerRegisterSerializer(serializers.ModelSerializer):
         read_only_fields = ('overall',)
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        from .backends import filter_by_email
+        if filter_by_email(User.objects.all(), value).exists():
             raise serializers.ValidationError("Bu E-posta adresi zaten kullanımda.")
         return value
 
     def create(self, validated_data):
         from django.db import transaction
-        
+        from jobs import queue
+        from notifications import inbox
+        from . import codes, uploads
+
+        # 1. Generate unique username
+        base_username = slugify(validated_data['name']).replace('-', '') or 'user'
+        unique_suffix = uuid.uuid4().hex[:6]
+        generated_username = f"{base_username}_{unique_suffix}"
+
+        name_parts = validated_data['name'].strip().split(' ', 1)
+        first_name = name_parts[0]
+        last_name = name_parts[1] if len(name_parts) > 1 else ''
+
+        user = User(
+            username=generated_username,
+            email=User.objects.normalize_email(validated_data.pop('email', '')),
+            first_name=first_name,
+            last_name=last_name
+        )
+        # Hash before the transaction starts: the slow part never holds the write lock.
+        # The async register view hashes in core.hashing's process pool and passes password_hash.
+        password = validated_data.pop('password')
+        password_hash = validated_data.pop('password_hash', None)
+        if password_hash:
+            user.password = password_hash
+        else:
+            user.set_password(password)
+
+        # The photo is not uploaded here: players/uploads.py spools it and a job stores it
+        photo = validated_data.pop('photo', None)
+        spooled = uploads.spool(photo) if photo else None
+
         try:
+            # Only the rows are written here; the email and the welcome notification go to the
+            # job outbox in the same transaction and are sent by the worker after the commit.
             with transaction.atomic():
-                # 1. Generate unique username
-                base_username = slugify(validated_data['name']).replace('-', '') or 'user'
-                unique_suffix = uuid.uuid4().hex[:6]
-                generated_username = f"{base_username}_{unique_suffix}"
-    
                 # CREATE USER
-                name_parts = validated_data['name'].strip().split(' ', 1)
-                first_name = name_parts[0]
-                last_name = name_parts[1] if len(name_parts) > 1 else ''
-    
-                user_data = {
-                    'username': generated_username,
-                    'password': validated_data.pop('password'),
-                    'email': validated_data.get('email', ''),
-                    'first_name': first_name,
-                    'last_name': last_name
-                }
-                if 'email' in validated_data: validated_data.pop('email')
-                
-                user = User.objects.create_user(**user_data)
-                
+                user.save()
+
                 # CREATE PLAYER PROFILE
-                verification_code = str(random.randint(100000, 999999))
-                player = Player.objects.create(
-                    user=user, 
-                    verification_code=verification_code,
-                    verification_code_created_at=timezone.now(),
-                    **validated_data
-                )
-                
+                player = Player.objects.create(user=user, **validated_data)
+                if spooled:
+                    uploads.attach_spooled(player, *spooled)
+                verification_code = codes.issue(user.pk, OneTimeCode.VERIFY_EMAIL, user.email)
+
                 # VERIFICATION EMAIL
                 EmailService.send_html(
                     'Akdeniz CSE Halısaha - E-posta Doğrulama',
@@ -79,22 +91,22 @@ class PlayerRegisterSerializer(serializers.ModelSerializer):
                     {'name': first_name, 'code': verification_code},
                     [user.email]
                 )
-                
-                
-                player.save() 
 
                 # Welcome Notification
-                from notifications.models import Notification
-                Notification.objects.create(
-                    recipient=user,
+                queue.enqueue(
+                    inbox.deliver,
+                    outbox=True,
+                    recipient_id=user.pk,
                     message="Hoş geldiniz! Hesabınız başarıyla oluşturuldu. Keyifli vakitler dileriz.",
                     notification_type='SYSTEM'
                 )
+        except BaseException:
+            # Rolled back: the spooled photo has no row pointing at it
+            if spooled:
+                uploads.discard_unclaimed(spooled[0])
+            raise
 
-                return player
-        except Exception as e:
-            # SEND ERROR TO CLIENT
-            raise e
+        return player
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
@@ -102,55 +114,75 @@ from django.contrib.auth import authenticate
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         # FRONTEND USERNAME -> EMAIL
-        email = attrs.get('username') 
-        password = attrs.get('password')
-
-        if email and password:
-            try:
-                
-                user_obj = User.objects.get(email=email)
-                username = user_obj.username
-                
-                
-                user = authenticate(username=username, password=password)
-                
-                if user:
-                     
-                    data = super().validate({'username': username, 'password': password})
-                    
-                  
-                    data['username'] = user.username
-                    data['email'] = user.email
-                    if hasattr(user, 'player_profile'):
-                        data['name'] = user.player_profile.name
-                        data['id'] = user.player_profile.id
-                        data['photo'] = user.player_profile.photo.url if user.player_profile.photo else None
-                        data['id'] = user.player_profile.id
-                        data['photo'] = user.player_profile.photo.url if user.player_profile.photo else None
-                        data['current_team'] = user.player_profile.current_team.id if user.player_profile.current_team else None
-                        data['current_team'] = user.player_profile.current_team.id if user.player_profile.current_team else None
-                        data['current_team'] = user.player_profile.current_team.id if user.player_profile.current_team else None
-                        data['is_email_verified'] = user.player_profile.is_email_verified
-                        data['jersey_number'] = user.player_profile.jersey_number
-                        data['preferred_foot'] = user.player_profile.preferred_foot
-                    
-                    data['is_staff'] = user.is_staff 
-                    
-                    return data
-            except User.DoesNotExist:
-                pass
-        
-        # IF FAILS
-        raise serializers.ValidationError('No active account found with the given credentials')
+        # players.backends.EmailBackend: indexed email lookup, one password check,
+        # and the profile/team come with the user in the same query
+        user = authenticate(self.context.get('request'), email=attrs.get('username'), password=attrs.get('password'))
+        if user is None:
+            # IF FAILS
+            raise serializers.ValidationError('No active account found with the given credentials')
+        return self.token_response(user)
+
+    @classmethod
+    def get_token(cls, user):
+        from .authentication import token_claims
+
+        token = super().get_token(user)
+        # Served by players.authentication.ClaimsJWTAuthentication
+        for claim, value in token_claims(user).items():
+            token[claim] = value
+        return token
+
+    @classmethod
+    def token_response(cls, user):
+        """Tokens plus the profile fields the frontend keeps after login"""
+        from django.contrib.auth.models import update_last_login
+        from rest_framework_simplejwt.settings import api_settings
+
+        refresh = cls.get_token(user)
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
+
+        data['username'] = user.username
+        data['email'] = user.email
+        if hasattr(user, 'player_profile'):
+            player = user.player_profile
+            data['name'] = player.name
+            data['id'] = player.id
+            data['photo'] = player.photo.url if player.photo else None
+            data['current_team'] = player.current_team_id
+            data['is_email_verified'] = player.is_email_verified
+            data['jersey_number'] = player.jersey_number
+            data['preferred_foot'] = player.preferred_foot
+
+        data['is_staff'] = user.is_staff
+
+        return data
+
+class CareerStatField(serializers.ReadOnlyField):
+    """
+    Career total of a player.
+    Uses the Player.objects.with_career_stats() annotation when the queryset has it,
+    otherwise the PlayerCareerStats row.
+    """
+    def __init__(self, stat, **kwargs):
+        self.stat = stat
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return value.career_stat(self.stat)
+
 
 class PlayerListSerializer(serializers.ModelSerializer):
     """Player list serializer"""
-    total_goals = serializers.ReadOnlyField()
-    total_assists = serializers.ReadOnlyField()
-    matches_played = serializers.ReadOnlyField()
+    total_goals = CareerStatField('goals')
+    total_assists = CareerStatField('assists')
+    matches_played = CareerStatField('appearances')
     current_team_name = serializers.CharField(source='current_team.name', read_only=True)
-    current_team_logo = serializers.ImageField(source='current_team.logo', read_only=True)
+    current_team_logo = ThumbnailField('list', source='current_team.logo')
     username = serializers.CharField(source='user.username', read_only=True)
+    photo = ThumbnailField('card')
     
     class Meta:
         model = Player
@@ -170,14 +202,17 @@ class PlayerListSerializer(serializers.ModelSerializer):
 
 class PlayerDetailSerializer(serializers.ModelSerializer):
     """Player detail serializer"""
-    total_goals = serializers.ReadOnlyField()
-    total_assists = serializers.ReadOnlyField()
-    matches_played = serializers.ReadOnlyField()
+    total_goals = CareerStatField('goals')
+    total_assists = CareerStatField('assists')
+    matches_played = CareerStatField('appearances')
     current_team_name = serializers.CharField(source='current_team.name', read_only=True)
-    current_team_logo = serializers.ImageField(source='current_team.logo', read_only=True)
+    current_team_logo = ThumbnailField('list', source='current_team.logo')
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
-    match_history = serializers.SerializerMethodField()
+    photo = ThumbnailField('detail')
+    # A new photo is being stored; `photo` is still the previous one
+    photo_uploading = serializers.SerializerMethodField()
+    recent_form = serializers.SerializerMethodField()
     
     class Meta:
         model = Player
@@ -191,8 +226,8 @@ class PlayerDetailSerializer(serializers.ModelSerializer):
             # GK Stats
             'diving', 'handling', 'kicking', 'reflexes', 'speed', 'positioning',
             'total_goals', 'total_assists', 'matches_played',
-            'match_history',
-            'created_at', 'updated_at', 'is_email_verified'
+            'recent_form',
+            'created_at', 'updated_at', 'is_email_verified', 'photo_uploading'
         ]
         read_only_fields = [
             'overall', 'pace', 'shooting', 'passing', 'dribbling', 'defense', 'physical',
@@ -201,29 +236,41 @@ class PlayerDetailSerializer(serializers.ModelSerializer):
             'current_team', 'username', 'email'
         ]
     
-    def get_match_history(self, obj):
-        """Get player match history"""
+    RECENT_FORM_SIZE = 5
+
+    def get_photo_uploading(self, obj):
+        return bool(obj.photo_upload)
+
+    def get_recent_form(self, obj):
+        """
+        Last few matches only (full history: GET /api/players/{id}/matches/)
+        """
         from matches.models import PlayerMatchStats
         from matches.serializers import PlayerMatchHistorySerializer
         
         stats = PlayerMatchStats.objects.filter(
             player=obj,
             played=True
-        ).select_related('match', 'team').order_by('-match__date')
+        ).select_related('match__team1', 'match__team2', 'team').order_by('-match__date', '-id')[:self.RECENT_FORM_SIZE]
         
         return PlayerMatchHistorySerializer(stats, many=True).data
 
 class LeaderboardSerializer(serializers.ModelSerializer):
-    """Leaderboard serializer"""
-    total_goals = serializers.ReadOnlyField()
-    total_assists = serializers.ReadOnlyField()
-    matches_played = serializers.ReadOnlyField()
-    current_team_name = serializers.CharField(source='current_team.name', read_only=True)
-    current_team_logo = serializers.ImageField(source='current_team.logo', read_only=True)
+    """Leaderboard serializer (one row of a precomputed snapshot)"""
+    id = serializers.IntegerField(source='player.id', read_only=True)
+    name = serializers.CharField(source='player.name', read_only=True)
+    photo = ThumbnailField('list', source='player.photo')
+    position = serializers.CharField(source='player.position', read_only=True)
+    current_team_name = serializers.CharField(source='player.current_team.name', read_only=True)
+    current_team_logo = ThumbnailField('list', source='player.current_team.logo')
+    total_goals = serializers.IntegerField(source='goals', read_only=True)
+    total_assists = serializers.IntegerField(source='assists', read_only=True)
+    matches_played = serializers.IntegerField(source='appearances', read_only=True)
     
     class Meta:
-        model = Player
+        model = LeaderboardEntry
         fields = [
+            'rank', 'value',
             'id', 'name', 'photo', 'position',
             'current_team_name', 'current_team_logo',
             'total_goals', 'total_assists', 'matches_played'
@@ -246,8 +293,9 @@ class PlayerUpdateSerializer(serializers.ModelSerializer):
         fields = ['name', 'position', 'photo', 'email', 'jersey_number', 'preferred_foot']
 
     def validate_email(self, value):
+        from .backends import filter_by_email
         user = self.context['request'].user
-        if User.objects.filter(email=value).exclude(id=user.id).exists():
+        if filter_by_email(User.objects.exclude(id=user.id), value).exists():
             raise serializers.ValidationError("Bu E-posta adresi zaten kullanımda.")
         return value
 
@@ -260,6 +308,9 @@ class PlayerUpdateSerializer(serializers.ModelSerializer):
         return value
 
     def update(self, instance, validated_data):
+        # A new photo is stored in the background (players/uploads.py); null still removes it
+        photo = validated_data.pop('photo', None) if validated_data.get('photo') else None
+
         # Update Player fields
         for attr, value in validated_data.items():
             if attr != 'email': # Handle email separately
@@ -281,12 +332,10 @@ class PlayerUpdateSerializer(serializers.ModelSerializer):
             user.email = new_email
             
             # Generate new code
-            import random
-            verification_code = str(random.randint(100000, 999999))
-            
+            from . import codes
+            verification_code = codes.issue(user.pk, OneTimeCode.VERIFY_EMAIL, new_email)
+
             instance.is_email_verified = False # Reset verification
-            instance.verification_code = verification_code
-            instance.verification_code_created_at = timezone.now()
             
             # Send Verification Email
             EmailService.send_html(
@@ -298,7 +347,11 @@ class PlayerUpdateSerializer(serializers.ModelSerializer):
         
         user.save()
 
-        # Save Player (triggers overall recalculation and photo processing in model.save())
+        # Save Player (triggers overall recalculation in model.save())
         ##TODO make this trigger with signals.
         instance.save()
+
+        if photo:
+            from . import uploads
+            uploads.attach_photo(instance, photo)
         return instance
@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Player
+from core import thumbnails
+from .models import Player, PlayerCareerStats
+from . import authentication, search
 
 @receiver(post_save, sender=User)
 def sync_user_to_player(sender, instance, **kwargs):
@@ -16,3 +19,54 @@ def sync_user_to_player(sender, instance, **kwargs):
         if full_name and player.name != full_name:
             player.name = full_name
             player.save(update_fields=['name'])
+
+
+@receiver(post_save, sender=Player)
+def create_career_stats(sender, instance, created, **kwargs):
+    """
+    Her yeni oyuncu için boş bir kariyer istatistik satırı aç.
+    """
+    if created:
+        PlayerCareerStats.objects.get_or_create(player=instance)
+
+
+@receiver(post_save, sender=Player)
+def update_player_search_index(sender, instance, **kwargs):
+    search.index_player(instance)
+
+
+@receiver(post_save, sender=Player)
+def queue_photo_thumbnails(sender, instance, update_fields=None, **kwargs):
+    thumbnails.schedule(instance, update_fields)
+
+
+@receiver(post_delete, sender=Player)
+def remove_player_from_search_index(sender, instance, **kwargs):
+    search.remove_player(instance.pk)
+
+
+@receiver(pre_save, sender=Player)
+def bump_profile_version(sender, instance, update_fields=None, **kwargs):
+    """
+    Team changed through save() (e.g. the admin): bump the version in the auth claims.
+    The views move players with PlayerQuerySet.set_team, which bumps it itself.
+    """
+    if not instance.pk or (update_fields is not None and 'current_team' not in update_fields):
+        return
+    old_team_id = Player.objects.filter(pk=instance.pk).values_list('current_team_id', flat=True).first()
+    if old_team_id != instance.current_team_id:
+        instance.profile_version += 1
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_claims(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: authentication.claims_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def invalidate_player_claims(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: authentication.claims_cache.invalidate(user_id))
@@ -0,0 +1,678 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import hashing
+from jobs.models import Job
+from notifications.models import Notification
+from . import authentication, codes
+from .authentication import ClaimsJWTAuthentication
+from .backends import filter_by_email
+from .models import OneTimeCode, Player, PlayerCareerStats, StoredBlob
+from .serializers import PlayerRegisterSerializer
+
+REGISTRATION = {
+    'name': 'Ali Yılmaz',
+    'position': 'MO',
+    'email': 'ali@example.com',
+    'password': 'GucluSifre123',
+}
+
+
+class RegistrationOutboxTests(TestCase):
+    """Registration only writes rows; the email and welcome notification wait in the job outbox."""
+
+    def test_register_writes_outbox_jobs_in_the_same_transaction(self):
+        response = APIClient().post('/api/auth/register/', REGISTRATION, format='json')
+        self.assertEqual(response.status_code, 201, response.json())
+
+        tasks = set(Job.objects.values_list('task', flat=True))
+        self.assertEqual(tasks, {'utils.email_service.send_html_now', 'notifications.inbox.deliver'})
+        # Nothing is delivered inline
+        self.assertFalse(Notification.objects.exists())
+
+    def test_rolled_back_signup_leaves_no_jobs(self):
+        serializer = PlayerRegisterSerializer(data=REGISTRATION)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                serializer.save()
+                raise RuntimeError('istek iptal')
+
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+
+class OneTimeCodeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.post('/api/auth/register/', REGISTRATION, format='json')
+        self.user = User.objects.get()
+        self.code = OneTimeCode.objects.get(purpose=OneTimeCode.VERIFY_EMAIL).code
+
+    def post(self, path, data):
+        return self.client.post(f'/api/players/{path}/', data, format='json')
+
+    def test_verify_email_uses_the_code_once(self):
+        data = {'email': 'ALI@example.com', 'code': self.code}
+        self.assertEqual(self.post('verify-email', data).status_code, 200)
+        self.assertTrue(Player.objects.get().is_email_verified)
+        self.assertFalse(OneTimeCode.objects.exists())
+        self.assertEqual(self.post('verify-email', data).status_code, 400)
+
+    def test_code_is_locked_after_too_many_wrong_guesses(self):
+        wrong = '000000' if self.code != '000000' else '111111'
+        for _ in range(codes.MAX_ATTEMPTS):
+            self.assertEqual(self.post('verify-email', {'email': 'ali@example.com', 'code': wrong}).status_code, 400)
+        response = self.post('verify-email', {'email': 'ali@example.com', 'code': self.code})
+        self.assertEqual(response.status_code, 429)
+
+    def test_expired_code(self):
+        OneTimeCode.objects.update(expires_at=timezone.now())
+        response = self.post('verify-email', {'email': 'ali@example.com', 'code': self.code})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('süresi dolmuş', response.data['detail'])
+
+    def test_unknown_email(self):
+        response = self.post('verify-email', {'email': 'yok@example.com', 'code': '123456'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_password_reset(self):
+        OneTimeCode.objects.update(created_at=timezone.now() - codes.COOLDOWN)
+        self.assertEqual(self.post('forgot-password', {'email': 'ali@example.com'}).status_code, 200)
+        self.assertEqual(self.post('forgot-password', {'email': 'ali@example.com'}).status_code, 429)
+        code = OneTimeCode.objects.get(purpose=OneTimeCode.RESET_PASSWORD).code
+
+        self.assertEqual(self.post('verify-forgot-password-code', {'email': 'ali@example.com', 'code': code}).status_code, 200)
+        response = self.post('reset-password', {'email': 'ali@example.com', 'code': code, 'new_password': 'YeniSifre456'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('YeniSifre456'))
+        self.assertFalse(OneTimeCode.objects.filter(purpose=OneTimeCode.RESET_PASSWORD).exists())
+
+    def test_prune_deletes_only_expired_codes(self):
+        codes.issue(self.user.pk, OneTimeCode.RESET_PASSWORD, self.user.email)
+        OneTimeCode.objects.filter(purpose=OneTimeCode.VERIFY_EMAIL).update(expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(codes.prune(batch_size=1), 1)
+        self.assertEqual(list(OneTimeCode.objects.values_list('purpose', flat=True)), [OneTimeCode.RESET_PASSWORD])
+
+
+class EmailLoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        APIClient().post('/api/auth/register/', REGISTRATION, format='json')
+
+    def login(self, email, password):
+        return APIClient().post('/api/auth/login/', {'username': email, 'password': password}, format='json')
+
+    def test_login_checks_the_password_once_in_one_query(self):
+        submit = mock.patch.object(hashing.pool, 'submit', wraps=hashing.pool.submit)
+        with submit as submitted, self.assertNumQueries(1):
+            response = self.login('  ALI@Example.com', REGISTRATION['password'])
+
+        self.assertEqual(response.status_code, 200, response.json())
+        self.assertEqual([call.args[0] for call in submitted.call_args_list], [hashing._check_password])
+        data = response.json()
+        self.assertEqual(data['email'], 'ali@example.com')
+        self.assertEqual(data['name'], 'Ali Yılmaz')
+        self.assertIn('access', data)
+
+    def test_wrong_password_and_unknown_email(self):
+        self.assertEqual(self.login('ali@example.com', 'yanlis').status_code, 400)
+        self.assertEqual(self.login('yok@example.com', 'yanlis').status_code, 400)
+
+    def test_full_hashing_queue_sheds_load(self):
+        with override_settings(PASSWORD_HASHING={'WORKERS': 1, 'MAX_PENDING': 0, 'RETRY_AFTER': 3}), \
+                mock.patch.object(hashing.pool, 'in_flight', 1):
+            response = self.login('ali@example.com', REGISTRATION['password'])
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+
+    def test_email_lookup_uses_the_lower_email_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plans are checked on SQLite')
+        plan = filter_by_email(User.objects.all(), 'ali@example.com').explain()
+        self.assertIn('USING INDEX auth_user_email_lower_idx', plan)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    """request.user comes from the token and the claims cache, not from a User query per request."""
+
+    def setUp(self):
+        authentication.claims_cache.clear()
+        APIClient().post('/api/auth/register/', REGISTRATION, format='json')
+        self.player = Player.objects.get()
+        self.client = APIClient()
+        self.token = self.client.post(
+            '/api/auth/login/', {'username': REGISTRATION['email'], 'password': REGISTRATION['password']}, format='json'
+        ).json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_token_carries_the_claims(self):
+        token = AccessToken(self.token)
+        self.assertEqual(token['player_id'], self.player.pk)
+        self.assertIsNone(token['team_id'])
+        self.assertFalse(token['is_staff'])
+        self.assertEqual(token['profile_version'], 0)
+
+    def test_cached_claims_cost_no_queries(self):
+        auth = ClaimsJWTAuthentication()
+        token = auth.get_validated_token(self.token)
+        auth.get_user(token)
+        with self.assertNumQueries(0):
+            user = auth.get_user(token)
+            self.assertEqual(user.player_profile.pk, self.player.pk)
+            self.assertIsNone(user.player_profile.current_team_id)
+
+    def test_team_change_refreshes_the_claims(self):
+        response = self.client.post('/api/teams/', {'name': 'Kartallar', 'short_name': 'KRT'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.player.refresh_from_db()
+        self.assertIsNotNone(self.player.current_team_id)
+        self.assertEqual(self.player.profile_version, 1)
+
+        # The old token still says "no team"; the claims it is served with do not
+        response = self.client.post('/api/teams/', {'name': 'Şahinler', 'short_name': 'SHN'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post('/api/teams/leave/').status_code, 400)  # captain
+
+    def test_newer_token_replaces_stale_cached_claims(self):
+        auth = ClaimsJWTAuthentication()
+        auth.get_user(auth.get_validated_token(self.token))
+        # Changed by another process: this one's cache is not told
+        Player.objects.filter(pk=self.player.pk).update(profile_version=1)
+        token = auth.get_validated_token(self.token)
+        token['profile_version'] = 1
+        self.assertEqual(auth.get_user(token).player_profile.profile_version, 1)
+
+    def test_inactive_user_is_rejected(self):
+        User.objects.update(is_active=False)
+        authentication.claims_cache.clear()
+        self.assertEqual(self.client.post('/api/teams/leave/').status_code, 401)
+
+
+def image_upload(name='photo.png', size=(900, 600), mode='RGB'):
+    from io import BytesIO
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class TemporaryMediaMixin:
+    """Media (and the upload spool) in a temporary directory on the filesystem stand-in storage"""
+    def setUp(self):
+        import os
+        import shutil
+        import tempfile
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        storage = override_settings(
+            MEDIA_ROOT=media_root,
+            UPLOAD_SPOOL_DIR=os.path.join(media_root, 'spool'),
+            STORAGES={
+                'default': {'BACKEND': 'core.storage.StandInStorage'},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+        super().setUp()
+
+
+class ThumbnailTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        user = User.objects.create_user('ali', 'ali@example.com', 'x')
+        self.player = Player.objects.create(user=user, name='Ali', position='MO')
+
+    def test_upload_queues_a_job_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.player.photo = image_upload()
+            self.player.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.player.save()
+        self.assertEqual(Job.objects.filter(task='core.thumbnails.generate').count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.player.save(update_fields=['name'])
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_generate_stores_variants_and_serializers_use_them(self):
+        from PIL import Image
+        from core import thumbnails
+        from .serializers import PlayerDetailSerializer, PlayerListSerializer
+
+        self.player.photo = image_upload()
+        self.player.save()
+        self.assertTrue(PlayerListSerializer(self.player).data['photo'].endswith('.png'))  # original until ready
+
+        thumbnails.generate('players.Player', self.player.pk, 'photo')
+        self.player.refresh_from_db()
+        variants = self.player.photo_variants
+        self.assertEqual(variants['source'], self.player.photo.name)
+        for size, box in thumbnails.get_setting('SIZES').items():
+            with self.player.photo.storage.open(variants[size]) as file, Image.open(file) as image:
+                self.assertEqual(image.format, thumbnails.output_format())
+                self.assertEqual(image.size, tuple(box))  # photos are cropped to fill the box
+
+        self.assertTrue(PlayerListSerializer(self.player).data['photo'].endswith('_card.webp'))
+        self.assertTrue(PlayerDetailSerializer(self.player).data['photo'].endswith('_detail.webp'))
+
+        # A new photo: the old thumbnails are not served, and are deleted once the new ones exist
+        old_list = variants['list']
+        self.player.photo = image_upload()
+        self.player.save()
+        self.assertTrue(PlayerListSerializer(self.player).data['photo'].endswith('.png'))
+        thumbnails.generate('players.Player', self.player.pk, 'photo')
+        self.assertFalse(self.player.photo.storage.exists(old_list))
+
+    def test_unreadable_image_keeps_the_original(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from core import thumbnails
+
+        Player.objects.filter(pk=self.player.pk).update(photo='player_photos/bozuk.png')
+        self.player.photo.storage.save('player_photos/bozuk.png', SimpleUploadedFile('bozuk.png', b'not an image'))
+        thumbnails.generate('players.Player', self.player.pk, 'photo')
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.photo_variants, {'source': 'player_photos/bozuk.png'})
+
+
+class PhotoUploadTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        APIClient().post('/api/auth/register/', REGISTRATION, format='json')
+        self.player = Player.objects.get()
+        self.client = APIClient()
+        self.client.force_authenticate(self.player.user)
+
+    def upload(self, client, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.patch('/api/players/me/', {'photo': photo}, format='multipart')
+
+    def test_photo_is_stored_in_the_background_under_its_hash(self):
+        import hashlib
+        from . import uploads
+
+        photo = image_upload()
+        sha256 = hashlib.sha256(photo.read()).hexdigest()
+        photo.seek(0)
+
+        with mock.patch('core.storage.StandInStorage._save') as save:
+            response = self.upload(self.client, photo)
+        self.assertEqual(response.status_code, 200, response.data)
+        save.assert_not_called()  # nothing is uploaded inside the request
+        self.assertTrue(response.data['photo_uploading'])
+        self.assertIsNone(response.data['photo'])
+        job = Job.objects.get(task='players.uploads.store_photo')
+
+        uploads.store_photo(**job.payload)
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.photo.name, f'player_photos/{sha256}.png')
+        self.assertEqual(self.player.photo_upload, '')
+        self.assertTrue(self.player.photo.storage.exists(self.player.photo.name))
+        self.assertFalse(os.path.exists(uploads.spool_path(sha256)))
+
+    def test_same_content_reuses_the_stored_object(self):
+        from . import uploads
+
+        self.upload(self.client, image_upload())
+        uploads.store_photo(**Job.objects.get(task='players.uploads.store_photo').payload)
+        name = Player.objects.get().photo.name
+
+        other = Player.objects.create(user=User.objects.create_user('veli', 'veli@example.com', 'x'), name='Veli', position='KL')
+        client = APIClient()
+        client.force_authenticate(other.user)
+        response = self.upload(client, image_upload('baska_ad.png'))
+        self.assertFalse(response.data['photo_uploading'])
+        other.refresh_from_db()
+        self.assertEqual(other.photo.name, name)
+        self.assertEqual(Job.objects.filter(task='players.uploads.store_photo').count(), 1)
+        self.assertEqual(StoredBlob.objects.count(), 1)
+
+    def test_newer_upload_wins(self):
+        from . import uploads
+
+        self.upload(self.client, image_upload(size=(300, 300)))
+        first = Job.objects.get(task='players.uploads.store_photo').payload
+        self.upload(self.client, image_upload(size=(400, 400)))
+        uploads.store_photo(**first)
+        self.player.refresh_from_db()
+        self.assertFalse(self.player.photo)
+        self.assertNotEqual(self.player.photo_upload, '')
+
+    def test_rolled_back_registration_deletes_its_spool_file(self):
+        from . import uploads
+
+        data = dict(REGISTRATION, email='veli@example.com', photo=image_upload())
+        with mock.patch('players.codes.issue', side_effect=RuntimeError('kod yok')):
+            with self.assertRaises(RuntimeError):
+                APIClient().post('/api/auth/register/', data, format='multipart')
+        self.assertEqual(Player.objects.count(), 1)
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertEqual(os.listdir(uploads.spool_dir()), [])
+
+    def test_failed_update_deletes_its_spool_file(self):
+        from . import uploads
+
+        with mock.patch('jobs.queue.enqueue', side_effect=RuntimeError('kuyruk yok')):
+            response = self.upload(self.client, image_upload())
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(StoredBlob.objects.exists())
+        self.assertEqual(Player.objects.get().photo_upload, '')
+        self.assertEqual(os.listdir(uploads.spool_dir()), [])
+
+    def test_rollback_keeps_the_spool_file_of_a_pending_upload(self):
+        from . import uploads
+
+        self.upload(self.client, image_upload())
+        sha256 = Player.objects.get().photo_upload
+        uploads.discard_unclaimed(sha256)
+        self.assertTrue(os.path.exists(uploads.spool_path(sha256)))
+
+    def test_interrupted_upload_leaves_no_temp_file(self):
+        from . import uploads
+
+        class Interrupted:
+            name = 'photo.png'
+
+            def chunks(self, chunk_size):
+                yield b'x' * chunk_size
+                raise OSError('bağlantı koptu')
+
+        with self.assertRaises(OSError):
+            uploads.spool(Interrupted())
+        self.assertEqual(os.listdir(uploads.spool_dir()), [])
+
+
+class CareerStatsTests(TestCase):
+    """PlayerCareerStats follows PlayerMatchStats through F() deltas (matches/signals.py)."""
+
+    def setUp(self):
+        from matches.models import Match
+        from teams.models import Team
+
+        self.home = Team.objects.create(name='Ev Sahibi')
+        self.away = Team.objects.create(name='Deplasman')
+        self.player = Player.objects.create(user=User.objects.create_user('ali', 'ali@example.com', 'x'), name='Ali')
+        self.other = Player.objects.create(user=User.objects.create_user('veli', 'veli@example.com', 'x'), name='Veli')
+        now = timezone.now()
+        self.early = Match.objects.create(date=now - timedelta(days=10), team1=self.home, team2=self.away)
+        self.late = Match.objects.create(date=now - timedelta(days=2), team1=self.home, team2=self.away)
+
+    def stats(self, match, player=None, **values):
+        from matches.models import PlayerMatchStats
+        return PlayerMatchStats.objects.create(match=match, player=player or self.player, team=self.home, **values)
+
+    def career(self, player=None):
+        row = PlayerCareerStats.objects.get(player=player or self.player)
+        return row.goals, row.assists, row.appearances, row.last_played
+
+    def test_create_update_and_delete_apply_deltas(self):
+        first = self.stats(self.early, goals=2, assists=1)
+        second = self.stats(self.late, goals=1)
+        self.assertEqual(self.career(), (3, 1, 2, self.late.date))
+
+        second.goals = 4
+        second.played = False
+        second.save()
+        self.assertEqual(self.career(), (6, 1, 1, self.early.date))
+
+        first.delete()
+        self.assertEqual(self.career(), (4, 0, 0, None))
+
+    def test_row_moved_to_another_player(self):
+        row = self.stats(self.late, goals=2)
+        row.player = self.other
+        row.save()
+        self.assertEqual(self.career(), (0, 0, 0, None))
+        self.assertEqual(self.career(self.other), (2, 0, 1, self.late.date))
+
+    def test_rescheduling_a_match_moves_last_played(self):
+        self.stats(self.early)
+        self.stats(self.late)
+        self.late.date = self.early.date - timedelta(days=1)
+        self.late.save()
+        self.assertEqual(self.career()[3], self.early.date)
+
+    def test_missing_row_is_rebuilt_from_history(self):
+        from . import career_stats
+
+        self.stats(self.early, goals=1)
+        PlayerCareerStats.objects.filter(player=self.player).delete()
+        self.stats(self.late, goals=2)
+        self.assertEqual(self.career(), (3, 0, 2, self.late.date))
+
+        PlayerCareerStats.objects.update(goals=99)
+        self.assertEqual(career_stats.rebuild_all(), 2)
+        self.assertEqual(self.career(), (3, 0, 2, self.late.date))
+
+    def test_deleting_a_player_with_match_history(self):
+        from matches.models import PlayerMatchStats
+
+        self.stats(self.early, goals=1)
+        self.stats(self.late, assists=1)
+        self.stats(self.late, player=self.other, goals=2)
+        with transaction.atomic():
+            self.player.user.delete()
+            connection.check_constraints()
+
+        self.assertFalse(Player.objects.filter(pk=self.player.pk).exists())
+        self.assertEqual(list(PlayerMatchStats.objects.values_list('player', flat=True)), [self.other.pk])
+        self.assertEqual(list(PlayerCareerStats.objects.values_list('player', flat=True)), [self.other.pk])
+        self.assertEqual(self.career(self.other)[0], 2)
+
+
+class PlayerQuerySetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from matches.models import Match, PlayerMatchStats
+        from teams.models import Team
+
+        cls.team = Team.objects.create(name='Akdeniz FC')
+        rival = Team.objects.create(name='Rakip FC')
+        cls.players = []
+        for i in range(8):
+            user = User.objects.create_user(f'oyuncu{i}', f'oyuncu{i}@example.com', 'x')
+            cls.players.append(Player.objects.create(
+                user=user, name=f'Oyuncu {i}', current_team=cls.team, is_email_verified=i % 2 == 0
+            ))
+        match = Match.objects.create(date=timezone.now(), team1=cls.team, team2=rival)
+        for player in cls.players:
+            PlayerMatchStats.objects.create(match=match, player=player, team=cls.team, goals=2, assists=1)
+
+    def test_verified(self):
+        self.assertEqual(Player.objects.verified().count(), 4)
+
+    def test_career_stats_come_from_the_annotation(self):
+        player = Player.objects.with_career_stats().get(pk=self.players[0].pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((player.total_goals, player.total_assists, player.matches_played), (2, 1, 1))
+
+        # Without the annotation the PlayerCareerStats row is read
+        self.assertEqual(Player.objects.get(pk=self.players[0].pk).total_goals, 2)
+
+    def test_list_page_query_count_does_not_grow_with_page_size(self):
+        client = APIClient()
+        with self.assertNumQueries(2):  # count + page
+            response = client.get('/api/players/?page_size=4')
+        self.assertEqual(response.data['count'], 4)
+        first = response.data['results'][0]
+        self.assertEqual((first['total_goals'], first['current_team_name']), (2, 'Akdeniz FC'))
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = []
+        for i, goals in enumerate([5, 3, 3, 1, 0]):
+            player = Player.objects.create(user=User.objects.create_user(f'golcu{i}', f'golcu{i}@example.com', 'x'), name=f'Golcü {i}')
+            PlayerCareerStats.objects.filter(player=player).update(goals=goals, assists=1)
+            cls.players.append(player)
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def get(self, url):
+        return APIClient().get(url).data
+
+    def test_pages_follow_the_cursor_with_dense_ranks(self):
+        page = self.get('/api/players/leaderboard/goals/?page_size=2')
+        self.assertEqual([(row['rank'], row['value']) for row in page['results']], [(1, 5), (2, 3)])
+        page = self.get(page['next'])
+        self.assertEqual([(row['rank'], row['value']) for row in page['results']], [(2, 3), (3, 1)])
+        self.assertIsNone(page['next'])  # zero goals are left out
+
+    def test_reads_serve_the_current_version_while_a_rebuild_is_queued(self):
+        from . import leaderboards
+
+        self.get('/api/players/leaderboard/goals/')
+        PlayerCareerStats.objects.filter(player=self.players[3]).update(goals=9)
+        leaderboards.mark_stale()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page = self.get('/api/players/leaderboard/goals/')
+        self.assertEqual(page['results'][0]['value'], 5)  # not rebuilt on read
+        self.assertTrue(Job.objects.filter(task='players.leaderboards.rebuild_stale').exists())
+
+        leaderboards.rebuild_stale()
+        page = self.get('/api/players/leaderboard/goals/')
+        self.assertEqual(page['results'][0]['value'], 9)
+        snapshot = leaderboards.LeaderboardSnapshot.objects.get(board='goals')
+        self.assertEqual(set(leaderboards.LeaderboardEntry.objects.filter(board='goals').values_list('version', flat=True)), {snapshot.version})
+
+    def test_only_one_rebuild_at_a_time(self):
+        from . import leaderboards
+
+        first = leaderboards.rebuild('assists')
+        self.assertTrue(leaderboards.acquire('assists'))
+        self.assertIsNone(leaderboards.rebuild('assists'))  # locked
+        self.assertEqual(leaderboards.LeaderboardEntry.objects.filter(board='assists').count(), 5)
+
+        # A lock left by a crashed rebuild expires
+        leaderboards.LeaderboardSnapshot.objects.filter(board='assists').update(
+            building_since=timezone.now() - timedelta(seconds=leaderboards.BUILD_TIMEOUT + 1)
+        )
+        second = leaderboards.rebuild('assists')
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(leaderboards.LeaderboardEntry.objects.filter(board='assists').count(), 5)
+
+    def test_change_during_a_rebuild_keeps_the_board_stale(self):
+        from . import leaderboards
+
+        leaderboards.rebuild('goals')
+        self.assertTrue(leaderboards.acquire('goals'))
+        leaderboards.mark_stale(['goals'])  # a match is saved meanwhile
+        self.assertEqual(leaderboards.rebuild_stale(), ['goals'])
+        self.assertTrue(leaderboards.LeaderboardSnapshot.objects.get(board='goals').is_stale)
+
+
+class OverallRatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.players = []
+        for i, position in enumerate(['KL', 'ST', 'MO', 'STP', 'DOS']):
+            user = User.objects.create_user(f'p{i}', f'p{i}@example.com', 'x')
+            cls.players.append(Player.objects.create(user=user, name=f'Oyuncu {i}', position=position))
+
+    def test_bulk_engine_matches_the_single_player_formula(self):
+        from . import rating
+
+        players = list(Player.objects.all())
+        bulk = rating.calculate_overall_bulk(
+            [player.position for player in players],
+            [[getattr(player, attr) for attr in rating.ATTRIBUTES] for player in players],
+        )
+        self.assertEqual(list(bulk), [rating.calculate_overall(player) for player in players])
+        self.assertEqual(list(rating.calculate_overall_bulk(['??'], [[99] * len(rating.ATTRIBUTES)])), [rating.DEFAULT_OVERALL])
+
+    def test_dry_run_reports_without_writing(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from . import rating
+
+        Player.objects.filter(pk=self.players[1].pk).update(overall=1)
+        expected = rating.calculate_overall(self.players[1])
+
+        out = StringIO()
+        call_command('recompute_overall', '--dry-run', stdout=out)
+        self.assertIn(f'1 -> {expected}', out.getvalue())
+        self.assertEqual(Player.objects.get(pk=self.players[1].pk).overall, 1)
+
+        changes = rating.recompute_all(chunk_size=1)
+        self.assertEqual([(pk, old, new) for pk, _, old, new in changes], [(self.players[1].pk, 1, expected)])
+        self.assertEqual(Player.objects.get(pk=self.players[1].pk).overall, expected)
+        self.assertEqual(rating.recompute_all(), [])
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from teams.models import Team
+
+        # The unverified ones rank higher ("Ahmet" twice), so a LIMIT before the filter loses everything
+        for i in range(60):
+            user = User.objects.create(username=f'ahmet{i}', email=f'ahmet{i}@example.com')
+            verified = i < 30
+            Player.objects.create(user=user, name=f'Ahmet {i}' if verified else f'Ahmet Ahmet {i}', is_email_verified=verified)
+        for i in range(3):
+            Team.objects.create(name=f'Ahmet Spor {i}')
+
+    def setUp(self):
+        from . import search
+        if not search.is_available():
+            self.skipTest('FTS5 search index is SQLite only')
+
+    def search(self, url):
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_limit_applies_to_verified_players_only(self):
+        for mode in ('', '&mode=prefix'):
+            results = self.search(f'/api/players/search/?q=ahmet&limit=20{mode}')
+            self.assertEqual(len(results), 20)
+            self.assertTrue(all(int(row['name'].split()[-1]) < 30 for row in results))
+        self.assertEqual(len(self.search('/api/players/search/?q=ahm&mode=prefix&limit=50')), 30)
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.search('/api/players/search/?q=ahmet&limit=-1')), 1)
+        self.assertEqual(len(self.search('/api/players/search/?q=ahmet&limit=0')), 1)
+        self.assertEqual(len(self.search('/api/players/search/?q=ahmet&limit=abc')), 20)
+        self.assertEqual(len(self.search('/api/teams/search/?q=ahmet&limit=-1')), 1)
+        self.assertEqual(len(self.search('/api/teams/search/?q=ahmet&limit=500')), 3)
+
+
+class MatchHistoryPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from matches.models import Match, PlayerMatchStats
+        from teams.models import Team
+
+        home, away = Team.objects.create(name='Ev'), Team.objects.create(name='Deplasman')
+        cls.player = Player.objects.create(user=User.objects.create_user('ali', 'ali@example.com', 'x'), name='Ali')
+        for day in range(5):
+            match = Match.objects.create(date=timezone.now() - timedelta(days=day), team1=home, team2=away)
+            PlayerMatchStats.objects.create(match=match, player=cls.player, team=home)
+
+    def test_tampered_cursor_is_not_found(self):
+        from .pagination import PlayerMatchHistoryPagination
+
+        url = f'/api/players/{self.player.pk}/matches/'
+        page = APIClient().get(f'{url}?page_size=2').data
+        self.assertEqual(len(APIClient().get(page['next']).data['results']), 2)
+
+        for values in (['notadate', 'abc'], [None, [1]]):
+            cursor = PlayerMatchHistoryPagination().encode_cursor(values)
+            self.assertEqual(APIClient().get(f'{url}?cursor={cursor}').status_code, 404, values)
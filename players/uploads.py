@@ -0,0 +1,151 @@
+"""
+Photo uploads without waiting on the storage backend.
+
+The request only streams the upload to a local spool file while hashing it (SHA-256) and
+looks the hash up in StoredBlob:
+
+- content already stored: the photo field points at the stored object at once, nothing is uploaded;
+- new content: Player.photo_upload is set and a job (jobs/queue.py) copies the spool file to
+  the storage backend, then sets Player.photo. The old photo is shown until then.
+
+Stored objects are named after their hash, so the same image is never stored twice.
+The spool directory (settings.UPLOAD_SPOOL_DIR) must be shared by the web and worker processes.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+DIRECTORY = 'player_photos'
+CHUNK_SIZE = 64 * 1024
+
+
+def spool_dir():
+    path = str(settings.UPLOAD_SPOOL_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool_path(sha256):
+    return os.path.join(spool_dir(), sha256)
+
+
+def spool(upload):
+    """Copy an uploaded file to the spool while hashing it; returns (sha256, extension, size)"""
+    digest = hashlib.sha256()
+    size = 0
+    spooled = tempfile.NamedTemporaryFile(dir=spool_dir(), delete=False)
+    try:
+        with spooled:
+            for chunk in upload.chunks(CHUNK_SIZE):
+                digest.update(chunk)
+                spooled.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        # Same content, same path: a concurrent upload of it just replaces an identical file
+        os.replace(spooled.name, spool_path(sha256))
+    finally:
+        # Only left behind if the upload was interrupted
+        if os.path.exists(spooled.name):
+            os.remove(spooled.name)
+    extension = os.path.splitext(upload.name or '')[1].lower()[:10]
+    return sha256, extension, size
+
+
+def discard_spool(sha256):
+    try:
+        os.remove(spool_path(sha256))
+    except FileNotFoundError:
+        pass
+
+
+def discard_unclaimed(sha256):
+    """After a rollback: delete the spool file, unless a committed upload of the same content still needs it"""
+    from .models import StoredBlob
+
+    if not StoredBlob.objects.filter(sha256=sha256, name='').exists():
+        discard_spool(sha256)
+
+
+def set_photo(player, name):
+    player.photo = name
+    player.photo_upload = ''
+    # update_fields: only the photo; signals queue its thumbnails
+    player.save(update_fields=['photo', 'photo_upload'])
+
+
+def attach_photo(player, upload):
+    """
+    Give `player` the uploaded photo. Returns True if it is in place already (duplicate
+    content), False if a job is storing it.
+    """
+    from django.db import transaction
+
+    spooled = spool(upload)
+    try:
+        with transaction.atomic():
+            return attach_spooled(player, *spooled)
+    except BaseException:
+        discard_unclaimed(spooled[0])
+        raise
+
+
+def attach_spooled(player, sha256, extension, size):
+    """
+    attach_photo for a file spool() already wrote. Inside a transaction of the caller, the
+    caller calls discard_unclaimed(sha256) if it rolls back.
+    """
+    from jobs import queue
+    from .models import Player, StoredBlob
+
+    blob, _ = StoredBlob.objects.get_or_create(sha256=sha256, defaults={'extension': extension, 'size': size})
+    if blob.name:
+        discard_spool(sha256)
+        set_photo(player, blob.name)
+        return True
+
+    Player.objects.filter(pk=player.pk).update(photo_upload=sha256)
+    player.photo_upload = sha256
+    # outbox: the job row commits together with photo_upload
+    queue.enqueue(store_photo, outbox=True, unique=True, player_id=player.pk, sha256=sha256)
+    return False
+
+
+def store_blob(blob):
+    """Copy a spooled blob to the storage backend (once, even with concurrent jobs)"""
+    from django.core.files import File
+    from .models import Player, StoredBlob
+
+    storage = Player._meta.get_field('photo').storage
+    try:
+        with open(spool_path(blob.sha256), 'rb') as spooled:
+            name = storage.save(f'{DIRECTORY}/{blob.sha256}{blob.extension}', File(spooled))
+    except FileNotFoundError:
+        # Removed by a job that stored it first; if not, fail and retry
+        blob.refresh_from_db()
+        if not blob.name:
+            raise
+        return
+
+    if StoredBlob.objects.filter(pk=blob.pk, name='').update(name=name, stored_at=timezone.now()):
+        blob.name = name
+        discard_spool(blob.sha256)
+    else:
+        # Another job was faster
+        storage.delete(name)
+        blob.refresh_from_db()
+
+
+def store_photo(player_id, sha256):
+    """Job: store a spooled photo, then make it the player's photo (unless they uploaded another one since)"""
+    from .models import Player, StoredBlob
+
+    blob = StoredBlob.objects.get(sha256=sha256)
+    if not blob.name:
+        store_blob(blob)
+
+    player = Player.objects.filter(pk=player_id, photo_upload=sha256).first()
+    if player is not None:
+        set_photo(player, blob.name)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import PlayerViewSet, RegisterView, CustomTokenObtainPairView
+from . import auth_views
+from .views import PlayerViewSet
 
 router = DefaultRouter()
 router.register(r'', PlayerViewSet, basename='player')
 
 urlpatterns = [
+    # Async, hashes in core.hashing's process pool (see players/auth_views.py)
+    path('reset-password/', auth_views.reset_password, name='player-reset-password'),
     path('', include(router.urls)),
 ]
@@ -3,32 +3,35 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.views import TokenObtainPairView
-from django.db.models import Sum, Count
-from django.utils import timezone
-from .models import Player
+from django.db import transaction
+from .models import OneTimeCode, Player
 from .serializers import (
     PlayerListSerializer,
     PlayerDetailSerializer,
     LeaderboardSerializer,
-    PlayerRegisterSerializer,
-    EmailTokenObtainPairSerializer,
     PlayerUpdateSerializer
 )
-from .pagination import PlayerPagination
-from rest_framework.throttling import ScopedRateThrottle
-
-
-class RegisterView(generics.CreateAPIView):
-    queryset = Player.objects.all()
-    permission_classes = (AllowAny,)
-    serializer_class = PlayerRegisterSerializer
-    throttle_classes = [ScopedRateThrottle]
-    throttle_scope = 'register'
-
-
-class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = EmailTokenObtainPairSerializer
+from .pagination import PlayerPagination, LeaderboardPagination, PlayerMatchHistoryPagination
+from . import leaderboards, search
+from .search import FullTextSearchFilter
+
+
+def code_error(result, email, expired_detail="Kodun süresi dolmuş."):
+    """Response for a code that did not pass players.codes.check"""
+    from django.contrib.auth.models import User
+    from . import codes
+    from .backends import filter_by_email
+
+    if result == codes.EXPIRED:
+        return Response({"detail": expired_detail}, status=status.HTTP_400_BAD_REQUEST)
+    if result == codes.LOCKED:
+        return Response(
+            {"detail": "Çok fazla hatalı deneme yapıldı. Lütfen yeni kod isteyiniz."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    if result == codes.MISSING and not filter_by_email(User.objects.all(), email).exists():
+        return Response({"detail": "Kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"detail": "Geçersiz doğrulama kodu."}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class PlayerViewSet(viewsets.ModelViewSet):
@@ -41,7 +44,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
     # queryset = Player.objects.all().select_related('current_team') # Moved to get_queryset
     permission_classes = [AllowAny]
     pagination_class = PlayerPagination
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['name', 'current_team__name']
     filterset_fields = ['position']
 
@@ -62,11 +65,11 @@ class PlayerViewSet(viewsets.ModelViewSet):
         List all players with teams and sort by overall.
         Show all players in detail.
         """
-        qs = Player.objects.select_related('current_team').order_by('-overall')
+        qs = Player.objects.with_team().with_career_stats().select_related('user').order_by('-overall')
         
         #Show only verified users
         if self.action == 'list':
-            qs = qs.filter(is_email_verified=True)
+            qs = qs.verified()
         
         # if self.action == 'list':
         #     qs = qs.filter(current_team__isnull=False)
@@ -78,40 +81,94 @@ class PlayerViewSet(viewsets.ModelViewSet):
             return PlayerDetailSerializer
         return PlayerListSerializer
     
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Ranked full-text player search (name and team name, Turkish-aware).
+        GET /api/players/search/?q=...            -> ranked results
+        GET /api/players/search/?q=...&mode=prefix -> autocomplete (last word as prefix)
+        """
+        query = request.query_params.get('q', '').strip()
+        prefix = request.query_params.get('mode') == 'prefix'
+        limit = search.clamp_limit(request.query_params.get('limit', 20))
+
+        if not query:
+            return Response([])
+
+        players = Player.objects.verified().with_team().with_career_stats().select_related('user')
+        if search.is_available():
+            ids = search.search_player_ids(query, prefix=prefix, limit=limit, verified_only=True)
+            by_id = players.in_bulk(ids)
+            results = [by_id[pk] for pk in ids if pk in by_id]
+        else:
+            results = players.filter(name__icontains=query)[:limit]
+
+        serializer = PlayerListSerializer(results, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='matches')
+    def matches(self, request, pk=None):
+        """
+        Player match history, newest first (keyset paginated on match date + id).
+        GET /api/players/{id}/matches/?cursor=...
+        """
+        from matches.models import PlayerMatchStats
+        from matches.serializers import PlayerMatchHistorySerializer
+
+        player = generics.get_object_or_404(Player.objects.only('id'), pk=pk)
+
+        stats = PlayerMatchStats.objects.filter(
+            player=player,
+            played=True
+        ).select_related('match__team1', 'match__team2', 'team')
+
+        paginator = PlayerMatchHistoryPagination()
+        page = paginator.paginate_queryset(stats, request)
+        serializer = PlayerMatchHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def _leaderboard(self, request, board):
+        """
+        Serve a page of a precomputed leaderboard snapshot.
+        Pages are cached per snapshot version, so a rebuild invalidates them all at once.
+        """
+        snapshot = leaderboards.get_snapshot(board)
+        paginator = LeaderboardPagination()
+
+        def build():
+            page = paginator.paginate_queryset(leaderboards.entries(snapshot), request)
+            serializer = LeaderboardSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data).data
+
+        params = (
+            request.query_params.get(paginator.cursor_query_param, ''),
+            request.query_params.get(paginator.page_size_query_param, ''),
+        )
+        return Response(leaderboards.cached_page(snapshot, params, build))
+
     @action(detail=False, methods=['get'], url_path='leaderboard/goals')
     def goal_leaderboard(self, request):
         """
         Goal leaderboard
-        GET /api/players/leaderboard/goals/
+        GET /api/players/leaderboard/goals/?cursor=...
         """
-        from matches.models import PlayerMatchStats
-        
-        players = Player.objects.annotate(
-            total_goals=Sum('playermatchstats__goals')
-        ).filter(total_goals__gt=0).order_by('-total_goals')
-
-        serializer = LeaderboardSerializer(players, many=True, context={'request': request})
-        return Response(serializer.data)
+        return self._leaderboard(request, 'goals')
     
     @action(detail=False, methods=['get'], url_path='leaderboard/assists')
     def assist_leaderboard(self, request):
         """
         Assist leaderboard
-        GET /api/players/leaderboard/assists/
+        GET /api/players/leaderboard/assists/?cursor=...
         """
+        return self._leaderboard(request, 'assists')
 
-        players = Player.objects.annotate(
-            total_assists=Sum('playermatchstats__assists')
-        ).filter(
-            total_assists__gt=0
-        ).order_by('-total_assists')
-
-        serializer = LeaderboardSerializer(
-            players,
-            many=True,
-            context={'request': request}
-        )
-        return Response(serializer.data)
+    @action(detail=False, methods=['get'], url_path='leaderboard/contributions')
+    def contribution_leaderboard(self, request):
+        """
+        Goals + assists leaderboard
+        GET /api/players/leaderboard/contributions/?cursor=...
+        """
+        return self._leaderboard(request, 'contributions')
 
     @action(detail=False, methods=['get', 'put', 'patch'], permission_classes=[IsAuthenticated], url_path='me')
     def me(self, request):
@@ -121,7 +178,9 @@ class PlayerViewSet(viewsets.ModelViewSet):
         PUT/PATCH /api/players/me/ -> Updates profile
         """
         try:
-            player = getattr(request.user, 'player_profile', None)
+            player = Player.objects.with_team().with_career_stats().select_related('user').filter(
+                user=request.user
+            ).first()
             if not player:
                 return Response(
                     {"detail": "Kullanıcıya ait oyuncu profili bulunamadı."}, 
@@ -147,7 +206,6 @@ class PlayerViewSet(viewsets.ModelViewSet):
 
 
 
-    ##TODO Maybe move this to a different file and make a generic verification service.
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path='verify-email')
     def verify_email(self, request):
         """
@@ -155,6 +213,8 @@ class PlayerViewSet(viewsets.ModelViewSet):
         POST /api/players/verify-email/
         Body: { "email": "...", "code": "..." }
         """
+        from . import codes
+
         email = request.data.get('email')
         code = request.data.get('code')
 
@@ -164,43 +224,21 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            player = Player.objects.get(user__email=email)
-            
-            # Check Expiration (15 minutes)
-            if player.verification_code_created_at:
-                from datetime import timedelta
-                
-                if timezone.now() - player.verification_code_created_at > timedelta(minutes=15):
-                     return Response(
-                        {"detail": "Doğrulama kodunun süresi dolmuş. Lütfen yeni kod isteyiniz."}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-            if player.verification_code == code:
-                player.is_email_verified = True
-                player.verification_code = "" # Clear code after usage
-                player.save()
-
-                # Send Notification
-                from notifications.models import Notification
-                Notification.objects.create(
-                    recipient=player.user,
-                    message="E-posta adresiniz başarıyla doğrulandı. Hesabınız artık aktif.",
-                    notification_type='SYSTEM'
-                )
+        result, user_id = codes.check(OneTimeCode.VERIFY_EMAIL, email, code, consume=True)
+        if result != codes.VALID:
+            return code_error(result, email, "Doğrulama kodunun süresi dolmuş. Lütfen yeni kod isteyiniz.")
 
-                return Response({"detail": "E-posta başarıyla doğrulandı!"}, status=status.HTTP_200_OK)
-            else:
-                return Response(
-                    {"detail": "Geçersiz doğrulama kodu."}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        except Player.DoesNotExist:
-            return Response(
-                {"detail": "Kullanıcı bulunamadı."}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        Player.objects.filter(user_id=user_id).update(is_email_verified=True)
+
+        # Send Notification
+        from notifications.models import Notification
+        Notification.objects.create(
+            recipient_id=user_id,
+            message="E-posta adresiniz başarıyla doğrulandı. Hesabınız artık aktif.",
+            notification_type='SYSTEM'
+        )
+
+        return Response({"detail": "E-posta başarıyla doğrulandı!"}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path='resend-code')
     def resend_verification_code(self, request):
@@ -209,48 +247,39 @@ class PlayerViewSet(viewsets.ModelViewSet):
         POST /api/players/resend-code/
         Body: { "email": "..." }
         """
-        import random
         from utils.email_service import EmailService
+        from . import codes
+        from .backends import filter_by_email
 
         email = request.data.get('email')
         if not email:
             return Response({"detail": "E-posta gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            player = Player.objects.get(user__email=email)
-            if player.is_email_verified:
-                return Response({"detail": "Bu hesap zaten doğrulanmış."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Check cooldown (60 seconds)
-            if player.verification_code_created_at:
-                from datetime import timedelta
-                
-                time_elapsed = timezone.now() - player.verification_code_created_at
-                if time_elapsed < timedelta(seconds=60):
-                    wait_seconds = 60 - int(time_elapsed.total_seconds())
-                    return Response(
-                        {"detail": f"Lütfen tekrar denemeden önce {wait_seconds} saniye bekleyiniz."}, 
-                        status=status.HTTP_429_TOO_MANY_REQUESTS
-                    )
-
-            # Generate new code 
-            new_code = str(random.randint(100000, 999999))
-            player.verification_code = new_code
-            player.verification_code_created_at = timezone.now()
-            player.save()
-            
-            # Send Email
+
+        # Check cooldown (60 seconds)
+        wait_seconds = codes.cooldown_left(OneTimeCode.VERIFY_EMAIL, email)
+        if wait_seconds:
+            return Response(
+                {"detail": f"Lütfen tekrar denemeden önce {wait_seconds} saniye bekleyiniz."}, 
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        player = filter_by_email(Player.objects.all(), email, 'user__email').values('user_id', 'name', 'is_email_verified').first()
+        if player is None:
+            return Response({"detail": "Kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+        if player['is_email_verified']:
+            return Response({"detail": "Bu hesap zaten doğrulanmış."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Generate new code and send email
+        with transaction.atomic():
+            new_code = codes.issue(player['user_id'], OneTimeCode.VERIFY_EMAIL, email)
             EmailService.send_html(
                 'Akdeniz CSE Halısaha - Yeni Doğrulama Kodu',
                 'emails/verification.html',
-                {'name': player.name, 'code': new_code},
+                {'name': player['name'], 'code': new_code},
                 [email]
             )
-            
-            return Response({"detail": "Yeni doğrulama kodu gönderildi."}, status=status.HTTP_200_OK)
-            
-        except Player.DoesNotExist:
-            return Response({"detail": "Kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({"detail": "Yeni doğrulama kodu gönderildi."}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path='verify-forgot-password-code')
     def verify_forgot_password_code(self, request):
@@ -259,31 +288,20 @@ class PlayerViewSet(viewsets.ModelViewSet):
         POST /api/players/verify-forgot-password-code/
         Body: { "email": "...", "code": "..." }
         """
+        from . import codes
+
         email = request.data.get('email')
         code = request.data.get('code')
 
         if not email or not code:
             return Response({"detail": "E-posta ve kod gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            player = Player.objects.get(user__email=email)
-            
-            # Verify Code match
-            if player.verification_code != code:
-                return Response({"detail": "Geçersiz doğrulama kodu."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Verify Expiration (15 minutes)
-            if player.verification_code_created_at:
-                from datetime import timedelta
-                if timezone.now() - player.verification_code_created_at > timedelta(minutes=15):
-                     return Response({"detail": "Kodun süresi dolmuş."}, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                 return Response({"detail": "Geçersiz işlem."}, status=status.HTTP_400_BAD_REQUEST)
-
-            return Response({"detail": "Kod doğrulandı."}, status=status.HTTP_200_OK)
+        # The code stays valid for reset-password
+        result, _ = codes.check(OneTimeCode.RESET_PASSWORD, email, code)
+        if result != codes.VALID:
+            return code_error(result, email)
 
-        except Player.DoesNotExist:
-             return Response({"detail": "Kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Kod doğrulandı."}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path='forgot-password')
     def forgot_password(self, request):
@@ -292,93 +310,34 @@ class PlayerViewSet(viewsets.ModelViewSet):
         POST /api/players/forgot-password/
         Body: { "email": "..." }
         """
-        import random
         from utils.email_service import EmailService
+        from . import codes
+        from .backends import filter_by_email
 
         email = request.data.get('email')
         if not email:
             return Response({"detail": "E-posta gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            player = Player.objects.get(user__email=email)
-            
-            # Check cooldown (60 seconds)
-            if player.verification_code_created_at:
-                from datetime import timedelta
-                time_elapsed = timezone.now() - player.verification_code_created_at
-                if time_elapsed < timedelta(seconds=60):
-                    wait_seconds = 60 - int(time_elapsed.total_seconds())
-                    return Response(
-                        {"detail": f"Lütfen {wait_seconds} saniye bekleyiniz."}, 
-                        status=status.HTTP_429_TOO_MANY_REQUESTS
-                    )
-
-            # Generate new code and send email
-            new_code = str(random.randint(100000, 999999))
-            player.verification_code = new_code
-            player.verification_code_created_at = timezone.now()
-            player.save()
-            
+
+        # Check cooldown (60 seconds)
+        wait_seconds = codes.cooldown_left(OneTimeCode.RESET_PASSWORD, email)
+        if wait_seconds:
+            return Response(
+                {"detail": f"Lütfen {wait_seconds} saniye bekleyiniz."}, 
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        player = filter_by_email(Player.objects.all(), email, 'user__email').values('user_id', 'name').first()
+        if player is None:
+            return Response({"detail": "Bu e-posta adresiyle kayıtlı kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Generate new code and send email
+        with transaction.atomic():
+            new_code = codes.issue(player['user_id'], OneTimeCode.RESET_PASSWORD, email)
             EmailService.send_html(
                 'Akdeniz CSE Halısaha - Şifre Sıfırlama Kodu',
                 'emails/password_reset.html', 
-                {'name': player.name, 'code': new_code},
+                {'name': player['name'], 'code': new_code},
                 [email]
             )
-            
-            return Response({"detail": "Doğrulama kodu gönderildi."}, status=status.HTTP_200_OK)
-            
-        except Player.DoesNotExist:
-            return Response({"detail": "Bu e-posta adresiyle kayıtlı kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
-
-    @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path='reset-password')
-    def reset_password(self, request):
-        """
-        Completes Reset password.
-        POST /api/players/reset-password/
-        Body: { "email": "...", "code": "...", "new_password": "..." }
-        """
-        email = request.data.get('email')
-        code = request.data.get('code')
-        new_password = request.data.get('new_password')
-
-        if not email or not code or not new_password:
-            return Response({"detail": "E-posta, kod ve yeni şifre gereklidir."}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            player = Player.objects.select_related('user').get(user__email=email)
-            
-            # Verify Code match
-            if player.verification_code != code:
-                return Response({"detail": "Geçersiz doğrulama kodu."}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Verify Expiration
-            if player.verification_code_created_at:
-                from datetime import timedelta
-                if timezone.now() - player.verification_code_created_at > timedelta(minutes=15):
-                     return Response({"detail": "Kodun süresi dolmuş."}, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                 return Response({"detail": "Geçersiz işlem."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Change Password and clean up
-            user = player.user
-            user.set_password(new_password)
-            user.save()
-            
-            player.verification_code = "" # Invalidate code
-            player.is_email_verified = True # Implicitly verify email if they own it enough to receive code
-            player.save()
-
-
-            # Send password changed notification
-            from notifications.models import Notification
-            Notification.objects.create(
-                recipient=user,
-                message="Şifreniz başarıyla değiştirildi. Güvenliğiniz için bu işlemi siz yapmadıysanız lütfen bizimle iletişime geçin.",
-                notification_type='SYSTEM'
-            )
-
-            return Response({"detail": "Şifreniz başarıyla değiştirildi. Şimdi giriş yapabilirsiniz."}, status=status.HTTP_200_OK)
 
-        except Player.DoesNotExist:
-             return Response({"detail": "Kullanıcı bulunamadı."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "Doğrulama kodu gönderildi."}, status=status.HTTP_200_OK)
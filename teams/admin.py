@@ -7,14 +7,15 @@ class TeamAdmin(admin.ModelAdmin):
     list_display = ['name', 'short_name', 'wins', 'losses', 'total_matches', 'win_rate', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'short_name']
-    readonly_fields = ['created_at']
+    # Standings follow the matches (fix drift with `manage.py rebuild_standings`)
+    readonly_fields = ['created_at', 'wins', 'draws', 'losses', 'goals_scored', 'goals_conceded', 'points']
     
     fieldsets = (
         ('Takım Bilgileri', {
             'fields': ('captain','name', 'short_name', 'logo')
         }),
         ('İstatistikler', {
-            'fields': ('wins', 'losses')
+            'fields': ('wins', 'draws', 'losses', 'goals_scored', 'goals_conceded', 'points')
         }),
         ('Diğer', {
             'fields': ('created_at',)
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0003_alter_team_options_team_draws_team_goals_conceded_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='logo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Logo Küçük Resimleri'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0004_team_logo_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='draws',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Beraberlikler'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='goals_conceded',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Yenen Goller'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='goals_scored',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Atılan Goller'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='losses',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Kaybedilen Maçlar'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='points',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Puan'),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='wins',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Kazanılan Maçlar'),
+        ),
+    ]
@@ -6,12 +6,15 @@ class Team(models.Model):
     name = models.CharField(max_length=100, verbose_name='Takım Adı', unique=True)
     short_name = models.CharField(max_length=5, verbose_name='Kısaltma', blank=True, null=True)
     logo = models.ImageField(upload_to='team_logos/', verbose_name='Takım Logosu', blank=True, null=True)
-    wins = models.IntegerField(default=0, verbose_name='Kazanılan Maçlar')
-    draws = models.IntegerField(default=0, verbose_name='Beraberlikler')
-    losses = models.IntegerField(default=0, verbose_name='Kaybedilen Maçlar')
-    goals_scored = models.IntegerField(default=0, verbose_name='Atılan Goller')
-    goals_conceded = models.IntegerField(default=0, verbose_name='Yenen Goller')
-    points = models.IntegerField(default=0, verbose_name='Puan')
+    # Thumbnail names, filled in by a background job (core/thumbnails.py)
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Logo Küçük Resimleri')
+    # Standings: written only by matches/standings.py (F() deltas, rebuild_standings)
+    wins = models.IntegerField(default=0, editable=False, verbose_name='Kazanılan Maçlar')
+    draws = models.IntegerField(default=0, editable=False, verbose_name='Beraberlikler')
+    losses = models.IntegerField(default=0, editable=False, verbose_name='Kaybedilen Maçlar')
+    goals_scored = models.IntegerField(default=0, editable=False, verbose_name='Atılan Goller')
+    goals_conceded = models.IntegerField(default=0, editable=False, verbose_name='Yenen Goller')
+    points = models.IntegerField(default=0, editable=False, verbose_name='Puan')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Oluşturulma Tarihi')
     captain = models.ForeignKey('players.Player', on_delete=models.SET_NULL, null=True, blank=True, related_name='captain_of', verbose_name='Kaptan')
     
@@ -37,7 +40,16 @@ class Team(models.Model):
     def goal_difference(self):
         return self.goals_scored - self.goals_conceded
 
+    STANDING_FIELDS = ('wins', 'draws', 'losses', 'goals_scored', 'goals_conceded', 'points')
+
     def save(self, *args, **kwargs):
+        # A loaded Team may hold standings that matches have moved since: never write them back
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.STANDING_FIELDS and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
 
 class TransferRequest(models.Model):
@@ -1,11 +1,12 @@
 from rest_framework import serializers
+from core.thumbnails import ThumbnailField
 from .models import Team, TransferRequest
 
 
 class TransferRequestSerializer(serializers.ModelSerializer):
     """Transfer request serializer"""
     player_name = serializers.CharField(source='player.name', read_only=True)
-    player_photo = serializers.ImageField(source='player.photo', read_only=True)
+    player_photo = ThumbnailField('list', source='player.photo')
     player_position = serializers.CharField(source='player.position', read_only=True)
     player_overall = serializers.IntegerField(source='player.overall', read_only=True)
     
@@ -22,6 +23,7 @@ class TeamListSerializer(serializers.ModelSerializer):
     draws = serializers.ReadOnlyField()
     
     goal_difference = serializers.ReadOnlyField()
+    logo = ThumbnailField('list')
 
     class Meta:
         model = Team
@@ -55,6 +57,7 @@ class TeamDetailSerializer(serializers.ModelSerializer):
     captain_name = serializers.ReadOnlyField(source='captain.name')
     pending_requests = serializers.SerializerMethodField()
     user_request_status = serializers.SerializerMethodField()
+    logo = ThumbnailField('detail')
     
     class Meta:
         model = Team
@@ -62,10 +65,11 @@ class TeamDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['wins', 'losses', 'draws', 'goals_scored', 'goals_conceded', 'points', 'created_at']
     
     def get_players(self, obj):
-        """Get team players"""
+        """Get team players (prefetched by TeamViewSet.retrieve, with annotated career stats)"""
         from players.serializers import PlayerListSerializer
-        # Optimize: Prefetch user to avoid N+1 when serializing 'username'
-        players = obj.players.all().select_related('user')
+        players = getattr(obj, 'prefetched_players', None)
+        if players is None:
+            players = obj.players.with_career_stats().select_related('user', 'current_team')
         return PlayerListSerializer(players, many=True, context=self.context).data
 
     def get_recent_matches(self, obj):
@@ -76,37 +80,33 @@ class TeamDetailSerializer(serializers.ModelSerializer):
         
         matches = Match.objects.filter(
             Q(team1=obj) | Q(team2=obj)
-        ).order_by('-date')[:5]
+        ).select_related('team1', 'team2').order_by('-date')[:5]
         
         return MatchListSerializer(matches, many=True, context=self.context).data
 
+    def _pending_requests(self, obj):
+        pending = getattr(obj, 'pending_transfer_requests', None)
+        if pending is None:
+            pending = list(TransferRequest.objects.filter(team=obj, status='PENDING').select_related('player'))
+        return pending
+
+    def _viewer_player(self):
+        """Player profile of the requesting user (None for anonymous users / users without a profile)"""
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return None
+        return getattr(request.user, 'player_profile', None)
+
     def get_pending_requests(self, obj):
         """Show pending requests only for captains"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            # Check if user is the captain of THIS team
-            # Note: request.user.player_profile might not exist if user is superuser without profile, handle potential error
-            try:
-                if hasattr(request.user, 'player_profile') and obj.captain == request.user.player_profile:
-                    requests = TransferRequest.objects.filter(team=obj, status='PENDING')
-                    return TransferRequestSerializer(requests, many=True, context=self.context).data
-            except Exception as e:
-                pass
+        player = self._viewer_player()
+        if player and obj.captain_id == player.id:
+            return TransferRequestSerializer(self._pending_requests(obj), many=True, context=self.context).data
         return []
 
     def get_user_request_status(self, obj):
         """Check if the logged in user has a pending request for this team"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-             try:
-                if hasattr(request.user, 'player_profile'):
-                    req = TransferRequest.objects.filter(
-                        team=obj, 
-                        player=request.user.player_profile,
-                        status='PENDING'
-                    ).first()
-                    if req:
-                        return 'PENDING'
-             except:
-                 pass
+        player = self._viewer_player()
+        if player and any(req.player_id == player.id for req in self._pending_requests(obj)):
+            return 'PENDING'
         return None
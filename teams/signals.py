@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from .models import TransferRequest
+from .models import Team, TransferRequest
+from core import thumbnails
+from players import search
 from notifications.models import Notification
 
 @receiver(post_save, sender=TransferRequest)
@@ -38,3 +40,29 @@ def notify_on_transfer_request_update(sender, instance, created, **kwargs):
                     notification_type='TEAM_RESPONSE',
                     related_link=f"/teams/{team.id}"
                 )
+
+
+@receiver(post_save, sender=Team)
+def update_team_search_index(sender, instance, **kwargs):
+    search.index_team(instance)
+
+
+@receiver(post_save, sender=Team)
+def queue_logo_thumbnails(sender, instance, update_fields=None, **kwargs):
+    thumbnails.schedule(instance, update_fields)
+
+
+@receiver(pre_delete, sender=Team)
+def remember_team_players(sender, instance, **kwargs):
+    # Players are detached with SET_NULL (no post_save), so their index rows
+    # and auth claims are fixed here
+    instance._player_ids = list(instance.players.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Team)
+def remove_team_from_search_index(sender, instance, **kwargs):
+    from players.models import Player
+
+    search.remove_team(instance.pk)
+    # Already NULL; set_team also bumps their profile_version and updates the search index
+    Player.objects.filter(pk__in=getattr(instance, '_player_ids', [])).set_team(None)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from matches.models import Match, PlayerMatchStats
+from players.models import Player
+from .models import Team, TransferRequest
+
+
+class TeamDetailQueryBudgetTests(TestCase):
+    """
+    GET /api/teams/{id}/ must cost the same number of queries whatever the squad size:
+    team + players + pending requests + recent matches (+ viewer's profile when logged in).
+    """
+    ANONYMOUS_BUDGET = 4
+    AUTHENTICATED_BUDGET = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = Team.objects.create(name='Akdeniz FC', short_name='AKD')
+        cls.rival = Team.objects.create(name='Rakip FC', short_name='RKP')
+
+        players = [cls.make_player(f'oyuncu{i}', cls.team) for i in range(15)]
+        cls.captain = players[0]
+        cls.team.captain = cls.captain
+        cls.team.save()
+
+        for day in range(6):
+            match = Match.objects.create(
+                date=timezone.now() - timedelta(days=day),
+                team1=cls.team, team2=cls.rival,
+                team1_score=2, team2_score=1, is_finished=True
+            )
+            for player in players[:11]:
+                PlayerMatchStats.objects.create(match=match, player=player, team=cls.team, goals=1, assists=1)
+
+        cls.applicant = cls.make_player('aday', None)
+        TransferRequest.objects.create(player=cls.applicant, team=cls.team)
+
+    @staticmethod
+    def make_player(username, team):
+        user = User.objects.create_user(username, f'{username}@example.com', 'x', first_name=username.title())
+        return Player.objects.create(user=user, current_team=team, is_email_verified=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = f'/api/teams/{self.team.id}/'
+
+    def test_anonymous_budget(self):
+        with self.assertNumQueries(self.ANONYMOUS_BUDGET):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['players']), 15)
+        self.assertEqual(response.data['players'][0]['matches_played'], 6)
+        self.assertEqual(len(response.data['recent_matches']), 5)
+        self.assertEqual(response.data['pending_requests'], [])
+
+    def test_captain_budget(self):
+        self.client.force_authenticate(User.objects.get(pk=self.captain.user_id))
+        with self.assertNumQueries(self.AUTHENTICATED_BUDGET):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['pending_requests']), 1)
+        self.assertIsNone(response.data['user_request_status'])
+
+    def test_applicant_budget(self):
+        self.client.force_authenticate(User.objects.get(pk=self.applicant.user_id))
+        with self.assertNumQueries(self.AUTHENTICATED_BUDGET):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['pending_requests'], [])
+        self.assertEqual(response.data['user_request_status'], 'PENDING')
+
+    def test_budget_does_not_grow_with_squad(self):
+        for i in range(10):
+            self.make_player(f'yedek{i}', self.team)
+        with self.assertNumQueries(self.ANONYMOUS_BUDGET):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['players']), 25)
@@ -2,7 +2,9 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
+from players.models import Player
 from .models import Team, TransferRequest
 from .serializers import TeamListSerializer, TeamDetailSerializer, TeamCreateSerializer, TeamUpdateSerializer, TransferRequestSerializer
 
@@ -18,6 +20,21 @@ class TeamViewSet(viewsets.ModelViewSet):
     """
     def get_queryset(self):
         qs = Team.objects.all().select_related('captain')
+        if self.action == 'retrieve':
+            # Team detail in a fixed number of queries, whatever the squad size
+            # (budget enforced in teams/tests.py)
+            qs = qs.prefetch_related(
+                Prefetch(
+                    'players',
+                    queryset=Player.objects.with_career_stats().select_related('user'),
+                    to_attr='prefetched_players'
+                ),
+                Prefetch(
+                    'transfer_requests',
+                    queryset=TransferRequest.objects.filter(status='PENDING').select_related('player'),
+                    to_attr='pending_transfer_requests'
+                ),
+            )
         return qs
     
     def get_permissions(self):
@@ -76,24 +93,52 @@ class TeamViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Oyuncu profili bulunamadı.'}, status=status.HTTP_400_BAD_REQUEST)
         
         player = request.user.player_profile
+        already_in_team = Response({'detail': 'Zaten bir takımınız var. Yeni takım oluşturamazsınız.'}, status=status.HTTP_400_BAD_REQUEST)
         
         # 2. Check if player is already in a team
-        if player.current_team:
-            return Response({'detail': 'Zaten bir takımınız var. Yeni takım oluşturamazsınız.'}, status=status.HTTP_400_BAD_REQUEST)
+        if player.current_team_id:
+            return already_in_team
             
         # 3. Create Team
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        # 3.1 Assign create as captain
-        team = serializer.save(captain=player) 
-        
-        # 4. Assign Player to Team
-        player.current_team = team
-        player.save()
+        with transaction.atomic():
+            # 3.1 Assign create as captain
+            team = serializer.save(captain=player)
+
+            # 4. Assign Player to Team (only if still teamless: the claims may be up to a TTL old)
+            if not Player.objects.filter(pk=player.pk, current_team__isnull=True).set_team(team):
+                transaction.set_rollback(True)
+                return already_in_team
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Ranked full-text team search (name and short name, Turkish-aware).
+        GET /api/teams/search/?q=...&mode=prefix
+        """
+        from players import search
+
+        query = request.query_params.get('q', '').strip()
+        prefix = request.query_params.get('mode') == 'prefix'
+        limit = search.clamp_limit(request.query_params.get('limit', 20))
+
+        if not query:
+            return Response([])
+
+        if search.is_available():
+            ids = search.search_team_ids(query, prefix=prefix, limit=limit)
+            by_id = Team.objects.in_bulk(ids)
+            teams = [by_id[pk] for pk in ids if pk in by_id]
+        else:
+            teams = Team.objects.filter(name__icontains=query)[:limit]
+
+        serializer = TeamListSerializer(teams, many=True, context={'request': request})
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
         """Send join request to team"""
@@ -105,7 +150,7 @@ class TeamViewSet(viewsets.ModelViewSet):
             
         player = user.player_profile
         
-        if player.current_team:
+        if player.current_team_id:
             return Response({'detail': 'Zaten bir takımınız var.'}, status=400)
             
         # Check existing PENDING request
@@ -123,18 +168,19 @@ class TeamViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Oyuncu profili bulunamadı.'}, status=400)
             
         player = user.player_profile
-        team = player.current_team
+        team_id = player.current_team_id
+        not_in_team = Response({'detail': 'Herhangi bir takımda değilsiniz.'}, status=400)
         
-        if not team:
-             return Response({'detail': 'Herhangi bir takımda değilsiniz.'}, status=400)
+        if not team_id:
+             return not_in_team
              
         # Check if Captain
-        if team.captain == player:
+        if Team.objects.filter(pk=team_id, captain_id=player.pk).exists():
             return Response({'detail': 'Takım kaptanı takımdan ayrılamaz. Önce kaptanlığı devredin veya takımı silin.'}, status=400)
             
-        # Leave
-        player.current_team = None
-        player.save()
+        # Leave (only the team the player is really in: the claims may be up to a TTL old)
+        if not Player.objects.filter(pk=player.pk, current_team_id=team_id).set_team(None):
+            return not_in_team
         
         return Response({'detail': 'Takımdan başarıyla ayrıldınız.'}, status=200)
 
@@ -156,26 +202,24 @@ class TransferRequestViewSet(viewsets.GenericViewSet, viewsets.mixins.ListModelM
              return Response({'detail': 'Yetkisiz işlem.'}, status=403)
              
         captain = request.user.player_profile
-        if transfer_request.team.captain != captain:
+        if transfer_request.team.captain_id != captain.pk:
             return Response({'detail': 'Bu isteği yönetmek için takım kaptanı olmalısınız.'}, status=403)
             
         if transfer_request.status != 'PENDING':
             return Response({'detail': 'Bu istek zaten işlenmiş.'}, status=400)
             
         if action == 'ACCEPT':
-            # Check if player joined another team in the meantime
-            if transfer_request.player.current_team:
+            # Add player to team, unless they joined another team in the meantime
+            joined = Player.objects.filter(
+                pk=transfer_request.player_id, current_team__isnull=True
+            ).set_team(transfer_request.team)
+            if not joined:
                 transfer_request.status = 'REJECTED'
                 transfer_request.save()
                 return Response({'detail': 'Oyuncu zaten başka bir takıma girmiş.'}, status=400)
                 
             transfer_request.status = 'ACCEPTED'
             transfer_request.save()
-            
-            # Add player to team
-            player = transfer_request.player
-            player.current_team = transfer_request.team
-            player.save()
             return Response({'detail': 'Oyuncu takıma kabul edildi.'})
             
         elif action == 'REJECT':
@@ -1,52 +1,201 @@
+import logging
+import queue as queue_module
 import threading
-from django.core.mail import send_mail
+import time
+from collections import deque
+from concurrent.futures import Future
+
 from django.conf import settings
+from jobs import queue
+
+logger = logging.getLogger(__name__)
+
+POOL_DEFAULTS = {
+    'WORKERS': 2,           # sender threads = SMTP connections open at most
+    'BATCH_SIZE': 20,       # messages sent per send_messages() call
+    'MAX_QUEUE': 1000,      # submit() blocks when this many messages are waiting
+    'IDLE_TIMEOUT': 30,     # an idle connection is closed after this many seconds
+}
+
 
 class EmailService:
+    """
+    Emails are never sent on the request thread: they are written to the job outbox
+    (jobs/queue.py) in the caller's transaction and sent by the worker once it commits,
+    so a rolled-back request never sends one. The worker hands them to a MailPool,
+    which keeps SMTP connections open; a failed email fails its job, which the queue
+    retries with backoff.
+    """
     @staticmethod
     def send_async(subject, message, recipient_list):
-        """
-        Sends an email asynchronously using a background thread.
-        This prevents the API from blocking while waiting for the SMTP server.
-        """
-        email_thread = threading.Thread(
-            target=EmailService._send,
-            args=(subject, message, recipient_list)
-        )
-        email_thread.start()
-
-    @staticmethod
-    def _send(subject, message, recipient_list, html_content=None):
-        from django.core.mail import EmailMultiAlternatives
-        
-        try:
-            print(f"Starting email thread for: {recipient_list}")
-            
-            email = EmailMultiAlternatives(
-                subject,
-                message, # plain text fallback
-                settings.EMAIL_HOST_USER,
-                recipient_list
-            )
-            
-            if html_content:
-                email.attach_alternative(html_content, "text/html")
-                
-            email.send(fail_silently=False)
-            print(f"Email sent successfully to {recipient_list}")
-        except Exception as e:
-            print(f"Failed to send email to {recipient_list}: {e}")
+        """Queue a plain-text email."""
+        queue.enqueue(send_now, outbox=True, subject=subject, message=message, recipient_list=recipient_list)
 
     @staticmethod
     def send_html(subject, template_name, context, recipient_list):
-        from django.template.loader import render_to_string
-        from django.utils.html import strip_tags
-        
-        html_content = render_to_string(template_name, context)
-        text_content = strip_tags(html_content)
-        
-        email_thread = threading.Thread(
-            target=EmailService._send,
-            args=(subject, text_content, recipient_list, html_content)
+        """Queue a templated HTML email (rendered by the worker). `context` must be JSON-serializable."""
+        queue.enqueue(
+            send_html_now,
+            outbox=True,
+            subject=subject,
+            template_name=template_name,
+            context=context,
+            recipient_list=recipient_list
         )
-        email_thread.start()
+
+
+class _Progress(list):
+    """A batch that remembers how far send_messages() got, so a failure is pinned to one message"""
+    position = 0
+
+    def __iter__(self):
+        for self.position, item in enumerate(super().__iter__()):
+            yield item
+
+
+class MailPool:
+    """
+    Bounded pool of sender threads. Each thread keeps one connection from get_connection()
+    open across messages and sends whatever is waiting in batches with send_messages(),
+    so a burst of emails reuses a few SMTP/TLS sessions instead of opening one per message.
+    The Future of each message reports its outcome. A failed message is not retried here:
+    retries belong to the job that sent it (jobs/queue.py), so there is one retry loop.
+    """
+    def __init__(self, backend=None, **options):
+        self.backend = backend
+        self.options = {**POOL_DEFAULTS, **getattr(settings, 'EMAIL_POOL', {}), **options}
+        self.queue = queue_module.Queue(maxsize=self.options['MAX_QUEUE'])
+        self.lock = threading.Lock()
+        self.threads = []
+        self.latencies = deque(maxlen=500)
+        self.counts = {'sent': 0, 'failed': 0, 'batches': 0, 'connections': 0}
+
+    def start(self):
+        with self.lock:
+            while len(self.threads) < self.options['WORKERS']:
+                thread = threading.Thread(target=self._work, name=f'mail-pool-{len(self.threads)}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, message):
+        """Queue an EmailMessage; returns a Future resolved when it is sent (or finally fails)."""
+        self.start()
+        future = Future()
+        self.queue.put((message, future, time.monotonic()))
+        return future
+
+    def send(self, message, timeout=None):
+        """Send through the pool and wait; raises the error if sending failed."""
+        return self.submit(message).result(timeout)
+
+    def stats(self):
+        """Queue depth, delivery counts and latency of this pool"""
+        latencies = sorted(self.latencies)
+        with self.lock:
+            stats = dict(self.counts, queue_depth=self.queue.qsize())
+        stats['latency_avg_ms'] = round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None
+        stats['latency_p95_ms'] = round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None
+        return stats
+
+    # --- Sender threads ---
+
+    def _next_batch(self, carried):
+        """`carried` (put back by the last failed batch) first, then what is waiting in the queue"""
+        batch = list(carried) or [self.queue.get(timeout=self.options['IDLE_TIMEOUT'])]
+        while len(batch) < self.options['BATCH_SIZE']:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue_module.Empty:
+                break
+        return batch
+
+    def _work(self):
+        from django.core.mail import get_connection
+
+        connection = None
+        # Not put back in the queue: with producers filling it, this thread would block on itself
+        carried = []
+        while True:
+            try:
+                batch = self._next_batch(carried)
+            except queue_module.Empty:
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                continue
+
+            messages = _Progress(message for message, _, _ in batch)
+            try:
+                if connection is None:
+                    connection = get_connection(self.backend, fail_silently=False)
+                    connection.open()
+                    self._count('connections')
+                connection.send_messages(messages)
+                sent, failed, error = batch, [], None
+            except Exception as e:
+                logger.warning("Email batch failed at message %s/%s: %s", messages.position + 1, len(batch), e)
+                sent, failed, error = batch[:messages.position], batch[messages.position:], e
+                # The connection may be broken: start a new one next time
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                connection = None
+
+            self._count('batches')
+            now = time.monotonic()
+            for message, future, queued_at in sent:
+                self.latencies.append(now - queued_at)
+                self._count('sent')
+                future.set_result(True)
+            carried = []
+            if failed:
+                # Only the message the error happened on fails; the rest go to the next batch untouched
+                message, future, _ = failed[0]
+                self._count('failed')
+                future.set_exception(error)
+                carried = failed[1:]
+
+            # Carried messages are marked done when they are finally sent (or fail)
+            for _ in range(len(batch) - len(carried)):
+                self.queue.task_done()
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = MailPool()
+        return _pool
+
+
+def send_now(subject, message, recipient_list, html_content=None):
+    """Job: send an email through the mail pool and wait. Raises on failure so the job is retried."""
+    from django.core.mail import EmailMultiAlternatives
+
+    email = EmailMultiAlternatives(
+        subject,
+        message, # plain text fallback
+        settings.EMAIL_HOST_USER,
+        recipient_list
+    )
+    if html_content:
+        email.attach_alternative(html_content, "text/html")
+
+    get_pool().send(email)
+    logger.info("Email sent to %s", recipient_list)
+
+
+def send_html_now(subject, template_name, context, recipient_list):
+    from . import email_templates
+
+    html_content, text_content = email_templates.render(template_name, context)
+    send_now(subject, text_content, recipient_list, html_content)
@@ -0,0 +1,106 @@
+"""
+Email templates compiled once per process.
+
+A template is rendered a single time with placeholder values and the result is split around
+the placeholders: an HTML layout and a plain-text layout (strip_tags runs once, here). Sending
+an email then only joins the layouts with the recipient's values, escaped for the HTML part,
+so a bulk send never parses or renders the template again.
+
+Only plain `{{ variable }}` output is supported. A template that filters or branches on its
+variables cannot be split; it is detected when compiled and rendered normally instead.
+"""
+import html
+import re
+import threading
+import uuid
+
+from django.utils.html import conditional_escape, strip_tags
+
+# Template -> the per-recipient variables it prints
+TEMPLATES = {
+    'emails/verification.html': ('name', 'code'),
+    'emails/password_reset.html': ('code',),
+}
+
+
+class CompiledEmail:
+    def __init__(self, html_layout, text_layout):
+        # Layouts are [literal, variable, literal, variable, ..., literal]
+        self.html_layout = html_layout
+        self.text_layout = text_layout
+
+    def render(self, context):
+        """(html, text) for one recipient"""
+        return (
+            _join(self.html_layout, context, conditional_escape),
+            _join(self.text_layout, context, str),
+        )
+
+
+def _join(layout, context, convert):
+    # Missing variables print as '', like in a template
+    return ''.join(
+        piece if i % 2 == 0 else convert(context.get(piece, ''))
+        for i, piece in enumerate(layout)
+    )
+
+
+def plain_text(html_content):
+    """Readable plain-text alternative of an HTML email"""
+    body = re.sub(r'<head\b.*?</head>', '', html_content, flags=re.S | re.I)
+    text = html.unescape(strip_tags(body))
+    lines = [line.strip() for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'
+
+
+def split(content, markers):
+    """Split `content` around the marker strings into [literal, name, literal, ...]"""
+    pattern = '|'.join(re.escape(marker) for marker in markers.values())
+    names = {marker: name for name, marker in markers.items()}
+    layout = []
+    position = 0
+    for match in re.finditer(pattern, content):
+        layout += [content[position:match.start()], names[match.group()]]
+        position = match.end()
+    layout.append(content[position:])
+    return layout
+
+
+def compile_template(template_name, variables):
+    """CompiledEmail, or None when the template does not print its variables as they are"""
+    from django.template.loader import render_to_string
+
+    token = uuid.uuid4().hex
+    markers = {name: f'EMAILVAR{token}{name.upper()}END' for name in variables}
+    rendered = render_to_string(template_name, markers)
+    if not all(marker in rendered for marker in markers.values()):
+        return None
+    return CompiledEmail(split(rendered, markers), split(plain_text(rendered), markers))
+
+
+_compiled = {}
+_lock = threading.Lock()
+
+
+def get(template_name):
+    with _lock:
+        if template_name not in _compiled:
+            variables = TEMPLATES.get(template_name)
+            _compiled[template_name] = variables and compile_template(template_name, variables)
+        return _compiled[template_name]
+
+
+def clear():
+    with _lock:
+        _compiled.clear()
+
+
+def render(template_name, context):
+    """(html, text) of an email; compiled layouts for known templates, a full render otherwise"""
+    compiled = get(template_name)
+    if compiled is None:
+        from django.template.loader import render_to_string
+
+        html_content = render_to_string(template_name, context)
+        return html_content, plain_text(html_content)
+    return compiled.render(context)
@@ -0,0 +1,144 @@
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+
+from . import email_templates
+from .email_service import MailPool
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that drops the connection once, on the message with subject 'kopar'"""
+    failed = set()
+
+    def send_messages(self, messages):
+        sent = 0
+        for message in messages:
+            if message.subject == 'kopar' and message.to[0] not in self.failed:
+                self.failed.add(message.to[0])
+                raise SMTPServerDisconnected('Bağlantı koptu')
+            sent += super().send_messages([message])
+        return sent
+
+
+class FillingBackend(FlakyBackend):
+    """FlakyBackend that lets producers fill the pool's queue (`fill`) before its first batch"""
+    fill = None
+
+    def send_messages(self, messages):
+        fill, FillingBackend.fill = FillingBackend.fill, None
+        if fill:
+            fill()
+        return super().send_messages(messages)
+
+
+class BrokenBackend(EmailBackend):
+    calls = 0
+
+    def send_messages(self, messages):
+        BrokenBackend.calls += 1
+        raise SMTPServerDisconnected('Sunucu yok')
+
+
+def pool(backend='django.core.mail.backends.locmem.EmailBackend', **options):
+    return MailPool(backend, WORKERS=1, IDLE_TIMEOUT=60, **options)
+
+
+class MailPoolTests(SimpleTestCase):
+    def setUp(self):
+        mail.outbox = []
+        FlakyBackend.failed = set()
+
+    def message(self, subject, to):
+        return EmailMessage(subject, 'İçerik', 'noreply@example.com', [to])
+
+    def test_reuses_one_connection_for_many_messages(self):
+        mail_pool = pool(BATCH_SIZE=5)
+        futures = [mail_pool.submit(self.message('Merhaba', f'oyuncu{i}@example.com')) for i in range(12)]
+        for future in futures:
+            self.assertTrue(future.result(timeout=5))
+
+        stats = mail_pool.stats()
+        self.assertEqual(len(mail.outbox), 12)
+        self.assertEqual(stats['sent'], 12)
+        self.assertEqual(stats['connections'], 1)
+        self.assertLessEqual(stats['batches'], 12)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertIsNotNone(stats['latency_p95_ms'])
+
+    def test_failed_message_fails_alone_and_the_rest_still_sent(self):
+        mail_pool = pool('utils.tests.FlakyBackend')
+        subjects = ['Merhaba', 'kopar', 'Merhaba']
+        futures = [mail_pool.submit(self.message(subject, f'oyuncu{i}@example.com')) for i, subject in enumerate(subjects)]
+        self.assertTrue(futures[0].result(timeout=5))
+        with self.assertRaises(SMTPServerDisconnected):
+            futures[1].result(timeout=5)
+        self.assertTrue(futures[2].result(timeout=5))
+
+        # Nothing is sent twice; only the message the error happened on failed
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['oyuncu0@example.com', 'oyuncu2@example.com'])
+        self.assertEqual(mail_pool.stats()['failed'], 1)
+
+    def test_failed_batch_does_not_block_on_a_full_queue(self):
+        from concurrent.futures import Future
+
+        mail_pool = pool('utils.tests.FillingBackend', MAX_QUEUE=3, BATCH_SIZE=3)
+        first = [Future() for _ in range(3)]
+        for i, (subject, future) in enumerate(zip(['kopar', 'Merhaba', 'Merhaba'], first)):
+            mail_pool.queue.put((self.message(subject, f'oyuncu{i}@example.com'), future, 0))
+        later = []
+        FillingBackend.fill = lambda: later.extend(
+            mail_pool.submit(self.message('Merhaba', f'sonra{i}@example.com')) for i in range(3)
+        )
+        mail_pool.start()
+
+        with self.assertRaises(SMTPServerDisconnected):
+            first[0].result(timeout=5)
+        for future in first[1:] + later:
+            self.assertTrue(future.result(timeout=5))
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_pool_does_not_retry(self):
+        BrokenBackend.calls = 0
+        mail_pool = pool('utils.tests.BrokenBackend')
+        with self.assertRaises(SMTPServerDisconnected):
+            mail_pool.send(self.message('Merhaba', 'oyuncu@example.com'), timeout=5)
+
+        # Retrying is left to the job that sent the email
+        self.assertEqual(BrokenBackend.calls, 1)
+        stats = mail_pool.stats()
+        self.assertEqual((stats['failed'], stats['sent']), (1, 0))
+
+
+class EmailTemplateTests(SimpleTestCase):
+    def setUp(self):
+        email_templates.clear()
+        self.addCleanup(email_templates.clear)
+
+    def test_compiled_html_matches_a_full_render(self):
+        context = {'name': '<Ali & "Veli">', 'code': '123456'}
+        html, text = email_templates.render('emails/verification.html', context)
+
+        self.assertEqual(html, render_to_string('emails/verification.html', context))
+        self.assertIn('Hoş Geldin, <Ali & "Veli">!', text)
+        self.assertIn('123456', text)
+        self.assertNotIn('<', text.replace('<Ali', ''))
+        self.assertNotIn('font-family', text)
+
+    def test_template_is_rendered_only_when_compiled(self):
+        email_templates.render('emails/password_reset.html', {'name': 'Ali', 'code': '1'})
+        with mock.patch('django.template.loader.render_to_string') as render:
+            for code in range(100):
+                html, text = email_templates.render('emails/password_reset.html', {'name': 'Ali', 'code': str(code)})
+        render.assert_not_called()
+        self.assertIn('99', text)
+
+    def test_templates_that_do_not_print_every_variable_are_rendered_normally(self):
+        with mock.patch.dict(email_templates.TEMPLATES, {'emails/verification.html': ('name', 'code', 'missing')}):
+            self.assertIsNone(email_templates.get('emails/verification.html'))
+            html, _ = email_templates.render('emails/verification.html', {'name': 'Ali', 'code': '1'})
+        self.assertIn('Hoş Geldin, Ali!', html)